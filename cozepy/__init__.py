@@ -47,6 +47,7 @@ from .audio.rooms import (
     RoomVideoConfig,
     TranslateConfig,
 )
+from .audio.sink import AudioSink
 from .audio.speech import (
     AsyncSpeechClient,
     AudioFormat,
@@ -181,6 +182,7 @@ from .bots.versions import (
 )
 from .chat import (
     AsyncChatClient,
+    AsyncChatStreamAccumulator,
     Chat,
     ChatClient,
     ChatError,
@@ -190,6 +192,8 @@ from .chat import (
     ChatRequiredAction,
     ChatRequiredActionType,
     ChatStatus,
+    ChatStreamAccumulator,
+    ChatStreamSnapshot,
     ChatSubmitToolOutputs,
     ChatToolCall,
     ChatToolCallFunction,
@@ -204,10 +208,16 @@ from .chat import (
     MessageType,
     ToolOutput,
 )
+from .chat.batch import AsyncBatchChat, BatchChat, ChatJob, ChatJobLike, ChatJobResult
+from .chat.cancellation import ChatCancelHook, ChatCancellation, ChatCanceller, ChatCancelStats, ChatCancelToken
+from .chat.context import ChatContext, ChatContextCache
 from .chat.message import (
     AsyncChatMessagesClient,
     ChatMessagesClient,
 )
+from .chat.multimodal import AsyncMultimodalMessageBuilder, FileIDCache, MessageAttachment, MultimodalMessageBuilder
+from .chat.speculation import ChatSpeculator, SpeculationStats
+from .chat.tools import ChatTools, ToolFunction
 from .config import (
     COZE_CN_BASE_URL,
     COZE_COM_BASE_URL,
@@ -246,6 +256,12 @@ from .conversations.message.feedback import (
     DeleteConversationMessageFeedbackResp,
     FeedbackType,
 )
+from .conversations.message.sync import (
+    AsyncMessageSync,
+    MessageStore,
+    MessageSync,
+    SQLiteMessageStore,
+)
 from .coze import (
     AsyncCoze,
     Coze,
@@ -306,7 +322,13 @@ from .exception import (
     CozeInvalidEventError,
     CozePKCEAuthError,
     CozePKCEAuthErrorType,
+    CozeStreamFirstEventTimeoutError,
+    CozeStreamIdleTimeoutError,
+    CozeStreamTimeoutError,
+    CozeStreamTotalTimeoutError,
+    CozeUsageBudgetError,
 )
+from .export import ExportTarget, aexport_csv, aexport_jsonl, export_csv, export_jsonl
 from .files import (
     AsyncFilesClient,
     File,
@@ -314,6 +336,8 @@ from .files import (
 )
 from .folders import (
     AsyncFoldersClient,
+    FolderNode,
+    FolderPath,
     FoldersClient,
     FolderType,
     SimpleFolder,
@@ -327,6 +351,15 @@ from .knowledge.documents import (
     DocumentsClient,
 )
 from .log import setup_logging
+from .metrics import StreamMetricsHook, setup_stream_metrics
+from .mirror import (
+    AsyncWorkspaceMirror,
+    MirrorChanges,
+    MirrorResource,
+    MirrorResourceType,
+    WorkspaceIndex,
+    WorkspaceMirror,
+)
 from .model import (
     AsyncIteratorHTTPResponse,
     AsyncLastIDPaged,
@@ -345,11 +378,18 @@ from .model import (
     ListResponse,
     NumberPaged,
     NumberPagedResponse,
+    PageCheckpoint,
+    PageCheckpointType,
     PagedBase,
+    PageStats,
+    PollStrategy,
     Stream,
+    StreamStats,
+    StreamTimeout,
     TokenPaged,
     TokenPagedResponse,
 )
+from .pagination import PageMetricsHook, setup_pagination
 from .request import (
     AsyncHTTPClient,
     Requester,
@@ -361,6 +401,16 @@ from .templates import (
     TemplateEntityType,
     TemplatesClient,
 )
+from .usage import (
+    UsageAccountant,
+    UsageFlushHook,
+    UsageRequestHook,
+    UsageScope,
+    UsageSnapshot,
+    UsageTotals,
+    setup_usage_accounting,
+    usage_tags,
+)
 from .users import (
     AsyncUsersClient,
     User,
@@ -480,14 +530,18 @@ from .workflows.collaborators import (
 )
 from .workflows.runs import (
     AsyncWorkflowsRunsClient,
+    AsyncWorkflowStreamAccumulator,
     WorkflowEvent,
     WorkflowEventError,
     WorkflowEventInterrupt,
     WorkflowEventInterruptData,
     WorkflowEventMessage,
     WorkflowEventType,
+    WorkflowNodeOutput,
     WorkflowRunResult,
     WorkflowsRunsClient,
+    WorkflowStreamAccumulator,
+    WorkflowStreamSnapshot,
 )
 from .workflows.runs.run_histories import (
     AsyncWorkflowsRunsRunHistoriesClient,
@@ -540,6 +594,7 @@ __all__ = [
     "AsyncAppsCollaboratorsClient",
     "AsyncAudioClient",
     "AsyncAuth",
+    "AsyncBatchChat",
     "AsyncBenefitLimitationsClient",
     "AsyncBenefitsClient",
     "AsyncBillTasksClient",
@@ -549,6 +604,7 @@ __all__ = [
     "AsyncBotsVersionsClient",
     "AsyncChatClient",
     "AsyncChatMessagesClient",
+    "AsyncChatStreamAccumulator",
     "AsyncConnectorsBotsClient",
     "AsyncConnectorsClient",
     "AsyncConversationsClient",
@@ -570,8 +626,10 @@ __all__ = [
     "AsyncKnowledgeClient",
     "AsyncLastIDPaged",
     "AsyncLiveClient",
+    "AsyncMessageSync",
     "AsyncMessagesClient",
     "AsyncMessagesFeedbackClient",
+    "AsyncMultimodalMessageBuilder",
     "AsyncNumberPaged",
     "AsyncPKCEOAuthApp",
     "AsyncPagedBase",
@@ -601,6 +659,7 @@ __all__ = [
     "AsyncWebsocketsChatClient",
     "AsyncWebsocketsChatEventHandler",
     "AsyncWebsocketsClient",
+    "AsyncWorkflowStreamAccumulator",
     "AsyncWorkflowsChatClient",
     "AsyncWorkflowsClient",
     "AsyncWorkflowsCollaboratorsClient",
@@ -608,13 +667,16 @@ __all__ = [
     "AsyncWorkflowsRunsRunHistoriesClient",
     "AsyncWorkflowsRunsRunHistoriesExecuteNodesClient",
     "AsyncWorkflowsVersionsClient",
+    "AsyncWorkspaceMirror",
     "AsyncWorkspacesClient",
     "AsyncWorkspacesMembersClient",
     "AudioClient",
     "AudioFormat",
+    "AudioSink",
     "AuditStatus",
     "Auth",
     "BackgroundImageInfo",
+    "BatchChat",
     "BenefitBasicInfo",
     "BenefitBillTask",
     "BenefitData",
@@ -650,20 +712,34 @@ __all__ = [
     "COZE_COM_BASE_URL",
     "CanvasPosition",
     "Chat",
+    "ChatCancelHook",
+    "ChatCancelStats",
+    "ChatCancelToken",
+    "ChatCancellation",
+    "ChatCanceller",
     "ChatClient",
+    "ChatContext",
+    "ChatContextCache",
     "ChatCreatedEvent",
     "ChatError",
     "ChatEvent",
     "ChatEventType",
+    "ChatJob",
+    "ChatJobLike",
+    "ChatJobResult",
     "ChatMessagesClient",
     "ChatPoll",
     "ChatRequiredAction",
     "ChatRequiredActionType",
+    "ChatSpeculator",
     "ChatStatus",
+    "ChatStreamAccumulator",
+    "ChatStreamSnapshot",
     "ChatSubmitToolOutputs",
     "ChatToolCall",
     "ChatToolCallFunction",
     "ChatToolCallType",
+    "ChatTools",
     "ChatUpdateEvent",
     "ChatUpdatedEvent",
     "ChatUsage",
@@ -697,6 +773,11 @@ __all__ = [
     "CozeModel",
     "CozePKCEAuthError",
     "CozePKCEAuthErrorType",
+    "CozeStreamFirstEventTimeoutError",
+    "CozeStreamIdleTimeoutError",
+    "CozeStreamTimeoutError",
+    "CozeStreamTotalTimeoutError",
+    "CozeUsageBudgetError",
     "CreateAPIAppsEventsResp",
     "CreateBenefitLimitationResp",
     "CreateConversationMessageFeedbackResp",
@@ -745,11 +826,15 @@ __all__ = [
     "EnterprisesClient",
     "EnterprisesMembersClient",
     "EnterprisesOrganizationsClient",
+    "ExportTarget",
     "FeatureScore",
     "FeedbackType",
     "File",
     "FileHTTPResponse",
+    "FileIDCache",
     "FilesClient",
+    "FolderNode",
+    "FolderPath",
     "FolderType",
     "FoldersClient",
     "GradientPosition",
@@ -782,12 +867,19 @@ __all__ = [
     "LiveInfo",
     "LiveType",
     "Message",
+    "MessageAttachment",
     "MessageContentType",
     "MessageObjectString",
     "MessageObjectStringType",
     "MessageRole",
+    "MessageStore",
+    "MessageSync",
     "MessageType",
     "MessagesClient",
+    "MirrorChanges",
+    "MirrorResource",
+    "MirrorResourceType",
+    "MultimodalMessageBuilder",
     "NumberPaged",
     "NumberPagedResponse",
     "OAuthApp",
@@ -796,10 +888,15 @@ __all__ = [
     "OutputAudio",
     "PCMConfig",
     "PKCEOAuthApp",
+    "PageCheckpoint",
+    "PageCheckpointType",
+    "PageMetricsHook",
+    "PageStats",
     "PagedBase",
     "Photo",
     "PhotoStatus",
     "PluginIDList",
+    "PollStrategy",
     "PublishStatus",
     "RemoveAppCollaboratorResp",
     "RemoveWorkflowCollaboratorResp",
@@ -809,6 +906,7 @@ __all__ = [
     "RoomMode",
     "RoomVideoConfig",
     "RoomsClient",
+    "SQLiteMessageStore",
     "Scope",
     "ScopeAccountPermission",
     "ScopeAttributeConstraint",
@@ -818,6 +916,7 @@ __all__ = [
     "SimpleBot",
     "SimpleFolder",
     "SpeakerIdentifyResp",
+    "SpeculationStats",
     "SpeechAudioCompletedEvent",
     "SpeechAudioUpdateEvent",
     "SpeechClient",
@@ -826,6 +925,9 @@ __all__ = [
     "SpeechUpdatedEvent",
     "Stream",
     "StreamInfo",
+    "StreamMetricsHook",
+    "StreamStats",
+    "StreamTimeout",
     "SuggestReplyMode",
     "SyncAuth",
     "SyncHTTPClient",
@@ -835,6 +937,7 @@ __all__ = [
     "TokenAuth",
     "TokenPaged",
     "TokenPagedResponse",
+    "ToolFunction",
     "ToolOutput",
     "TranscriptionsClient",
     "TranscriptionsCreatedEvent",
@@ -856,6 +959,12 @@ __all__ = [
     "UpdateVariableResp",
     "UpdateVoicePrintGroupFeatureResp",
     "UpdateVoicePrintGroupResp",
+    "UsageAccountant",
+    "UsageFlushHook",
+    "UsageRequestHook",
+    "UsageScope",
+    "UsageSnapshot",
+    "UsageTotals",
     "User",
     "UserConfig",
     "UserConfigEnum",
@@ -907,10 +1016,13 @@ __all__ = [
     "WorkflowInfo",
     "WorkflowMode",
     "WorkflowNodeExecuteHistory",
+    "WorkflowNodeOutput",
     "WorkflowRunHistory",
     "WorkflowRunHistoryNodeExecuteStatus",
     "WorkflowRunMode",
     "WorkflowRunResult",
+    "WorkflowStreamAccumulator",
+    "WorkflowStreamSnapshot",
     "WorkflowUserInfo",
     "WorkflowVersionInfo",
     "WorkflowsChatClient",
@@ -921,11 +1033,21 @@ __all__ = [
     "WorkflowsRunsRunHistoriesExecuteNodesClient",
     "WorkflowsVersionsClient",
     "Workspace",
+    "WorkspaceIndex",
     "WorkspaceMember",
+    "WorkspaceMirror",
     "WorkspaceRoleType",
     "WorkspaceType",
     "WorkspacesClient",
     "WorkspacesMembersClient",
+    "aexport_csv",
+    "aexport_jsonl",
+    "export_csv",
+    "export_jsonl",
     "load_oauth_app_from_config",
     "setup_logging",
+    "setup_pagination",
+    "setup_stream_metrics",
+    "setup_usage_accounting",
+    "usage_tags",
 ]
@@ -0,0 +1,142 @@
+import binascii
+import wave
+from typing import IO, Iterator, Optional, Union
+
+from cozepy.chat import Message
+
+
+class AudioSink(object):
+    """
+    Collects the PCM audio of a stream as it arrives, and cuts it into frames of a fixed duration.
+
+    Deltas are decoded into a growable buffer that is reused as frames are read, so memory stays at the audio not yet
+    read instead of the whole answer. Frames are memoryviews into the buffer, valid until the next write. With a wav
+    target, the audio is also written to it as it arrives, and the file is a valid WAV file after each write.
+
+    Works with the audio of chat streams (conversation.audio.delta events), websocket chat
+    (ConversationAudioDeltaEvent) and websocket speech (SpeechAudioUpdateEvent).
+    """
+
+    def __init__(
+        self,
+        *,
+        frame_ms: int = 20,
+        sample_rate: int = 24000,
+        channels: int = 1,
+        sample_width: int = 2,
+        wav: Optional[Union[str, IO[bytes]]] = None,
+        capacity: int = 64 * 1024,
+    ):
+        """
+        :param frame_ms: the duration of a frame in milliseconds.
+        :param sample_rate: the sample rate of the audio, 24kHz for chat audio.
+        :param channels: the number of channels of the audio.
+        :param sample_width: the bytes per sample of the audio.
+        :param wav: the path or seekable binary file to write the audio to as WAV.
+        :param capacity: the initial size of the buffer in bytes.
+        """
+        if frame_ms < 1:
+            raise ValueError(f"invalid frame_ms: {frame_ms}")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.frame_size = sample_rate * channels * sample_width * frame_ms // 1000
+        if self.frame_size < 1:
+            raise ValueError(f"invalid frame_ms: {frame_ms}")
+        self.bytes_written = 0
+        self._buffer = bytearray(max(capacity, self.frame_size))
+        self._start = 0
+        self._end = 0
+        self._wav: Optional[wave.Wave_write] = None
+        self._wav_file: Optional[IO[bytes]] = None
+        self._owns_wav_file = isinstance(wav, str)
+        if wav is not None:
+            self._wav_file = open(wav, "wb") if isinstance(wav, str) else wav
+            self._wav = wave.open(self._wav_file, "wb")
+            self._wav.setnchannels(channels)
+            self._wav.setsampwidth(sample_width)
+            self._wav.setframerate(sample_rate)
+
+    @property
+    def duration(self) -> float:
+        """
+        The duration of the audio written, in seconds.
+        """
+        return self.bytes_written / (self.sample_rate * self.channels * self.sample_width)
+
+    @property
+    def pending(self) -> int:
+        """
+        The bytes written and not read as frames yet.
+        """
+        return self._end - self._start
+
+    def write(self, audio: Union[bytes, bytearray, memoryview, str]) -> None:
+        """
+        Write a delta of PCM audio, as bytes or as base64 text.
+        """
+        data = binascii.a2b_base64(audio) if isinstance(audio, str) else audio
+        size = len(data)
+        if not size:
+            return
+        self._reserve(size)
+        self._buffer[self._end : self._end + size] = data
+        self._end += size
+        self.bytes_written += size
+        if self._wav is not None and self._wav_file is not None:
+            self._wav.writeframes(data)
+            self._wav_file.flush()
+
+    def write_message(self, message: Message) -> None:
+        """
+        Write the audio of a message, such as the message of an audio delta event.
+        """
+        self.write(message.content)
+
+    def frames(self) -> Iterator[memoryview]:
+        """
+        Read the complete frames written so far.
+        """
+        while self._end - self._start >= self.frame_size:
+            start = self._start
+            self._start += self.frame_size
+            yield memoryview(self._buffer)[start : self._start]
+
+    def flush(self) -> Optional[memoryview]:
+        """
+        Read the rest of the audio, shorter than a frame, or None if there is none.
+        """
+        if self._start == self._end:
+            return None
+        start, self._start = self._start, self._end
+        return memoryview(self._buffer)[start : self._end]
+
+    def close(self) -> None:
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+        if self._wav_file is not None and self._owns_wav_file:
+            self._wav_file.close()
+        self._wav_file = None
+
+    def __enter__(self) -> "AudioSink":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _reserve(self, size: int) -> None:
+        """
+        Make room for size bytes at the end of the buffer. The unread audio is moved to the front, or to a new buffer
+        twice as large. The buffer is never resized in place, so that it can't fail on frames still referenced.
+        """
+        if self._end + size <= len(self._buffer):
+            return
+        pending = self._end - self._start
+        if pending + size <= len(self._buffer):
+            self._buffer[:pending] = self._buffer[self._start : self._end]
+        else:
+            buffer = bytearray(max(len(self._buffer) * 2, pending + size))
+            buffer[:pending] = self._buffer[self._start : self._end]
+            self._buffer = buffer
+        self._start, self._end = 0, pending
@@ -1,12 +1,27 @@
+import asyncio
 import base64
 import json
 import time
-from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Union, overload
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+    overload,
+)
 
 import httpx
 from typing_extensions import Literal
 
-from cozepy.exception import CozeAPIError
+from cozepy.exception import CozeAPIError, CozeInvalidEventError, CozeStreamTimeoutError
 from cozepy.model import (
     AsyncIteratorHTTPResponse,
     AsyncStream,
@@ -14,13 +29,18 @@ from cozepy.model import (
     DynamicStrEnum,
     IteratorHTTPResponse,
     ListResponse,
+    PollStrategy,
     Stream,
+    StreamTimeout,
 )
 from cozepy.request import Requester
+from cozepy.usage import _chat_usage_handler, _record_chat, _usage_scope
 from cozepy.util import remove_none_values, remove_url_trailing_slash
 
 if TYPE_CHECKING:
+    from cozepy.chat.context import ChatContext
     from cozepy.chat.message import AsyncChatMessagesClient, ChatMessagesClient
+    from cozepy.chat.tools import ChatTools
 
 
 class MessageRole(DynamicStrEnum):
@@ -391,6 +411,142 @@ class ToolOutput(CozeModel):
     output: str
 
 
+def _join_buffer(parts: List[str]) -> str:
+    # Join the buffered fragments once and keep the result, so repeated snapshots do not re-join them.
+    if len(parts) > 1:
+        parts[:] = ["".join(parts)]
+    return parts[0] if parts else ""
+
+
+class _MessageBuffer(object):
+    def __init__(self, message: Message):
+        self.message = message
+        self.content: List[str] = []
+        self.reasoning_content: List[str] = []
+
+    def add_delta(self, message: Message) -> None:
+        if message.content:
+            self.content.append(message.content)
+        if message.reasoning_content:
+            self.reasoning_content.append(message.reasoning_content)
+
+    def complete(self, message: Message) -> None:
+        # The completed message carries the spliced result of all deltas, so it replaces the buffered fragments.
+        self.message = message
+        self.content = [message.content] if message.content else []
+        if message.reasoning_content:
+            self.reasoning_content = [message.reasoning_content]
+
+    def build(self) -> Message:
+        reasoning_content = _join_buffer(self.reasoning_content)
+        return self.message.model_copy(
+            update={
+                "content": _join_buffer(self.content),
+                "reasoning_content": reasoning_content or self.message.reasoning_content,
+            }
+        )
+
+
+class ChatStreamSnapshot(CozeModel):
+    # The latest chat object of the stream, which carries the status, usage and required action.
+    chat: Optional[Chat] = None
+    # The messages of the stream, in the order they first appeared.
+    messages: List[Message] = []
+
+    @property
+    def answer(self) -> str:
+        return "".join(message.content for message in self.messages if message.type == MessageType.ANSWER)
+
+    @property
+    def status(self) -> ChatStatus:
+        return self.chat.status if self.chat else ChatStatus.UNKNOWN
+
+    @property
+    def usage(self) -> Optional[ChatUsage]:
+        return self.chat.usage if self.chat else None
+
+
+class _BaseChatStreamAccumulator(object):
+    def __init__(self):
+        self._buffers: Dict[str, _MessageBuffer] = {}
+        self._chat: Optional[Chat] = None
+
+    def add(self, event: ChatEvent) -> None:
+        """
+        Merge one stream event into the accumulated state. Audio deltas are not accumulated.
+        """
+        if event.event == ChatEventType.CONVERSATION_MESSAGE_DELTA and event.message is not None:
+            self._get_buffer(event.message).add_delta(event.message)
+        elif event.event == ChatEventType.CONVERSATION_MESSAGE_COMPLETED and event.message is not None:
+            self._get_buffer(event.message).complete(event.message)
+        elif event.chat is not None:
+            self._chat = event.chat
+
+    @property
+    def chat(self) -> Optional[Chat]:
+        return self._chat
+
+    def snapshot(self) -> ChatStreamSnapshot:
+        """
+        The messages accumulated so far, together with the latest chat object.
+        """
+        return ChatStreamSnapshot(chat=self._chat, messages=[buffer.build() for buffer in self._buffers.values()])
+
+    def _get_buffer(self, message: Message) -> _MessageBuffer:
+        key = message.id or str(message.type)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = _MessageBuffer(message)
+        return buffer
+
+
+class ChatStreamAccumulator(_BaseChatStreamAccumulator):
+    """
+    Accumulate the events of chat.stream into complete messages.
+    """
+
+    def consume(self, stream: Iterable[ChatEvent]) -> Iterator[ChatEvent]:
+        """
+        Accumulate the events while passing them through, so the caller can still render deltas.
+
+        :param stream: the events to consume, e.g. the stream returned by chat.stream.
+        :return: the events, yielded unchanged after they are accumulated.
+        """
+        for event in stream:
+            self.add(event)
+            yield event
+
+    def collect(self, stream: Iterable[ChatEvent]) -> ChatStreamSnapshot:
+        """
+        Consume the whole stream and return the final snapshot.
+        """
+        for event in stream:
+            self.add(event)
+        return self.snapshot()
+
+
+class AsyncChatStreamAccumulator(_BaseChatStreamAccumulator):
+    """
+    Accumulate the events of the async chat.stream into complete messages.
+    """
+
+    async def consume(self, stream: AsyncIterable[ChatEvent]) -> AsyncIterator[ChatEvent]:
+        """
+        Accumulate the events while passing them through, so the caller can still render deltas.
+        """
+        async for event in stream:
+            self.add(event)
+            yield event
+
+    async def collect(self, stream: AsyncIterable[ChatEvent]) -> ChatStreamSnapshot:
+        """
+        Consume the whole stream and return the final snapshot.
+        """
+        async for event in stream:
+            self.add(event)
+        return self.snapshot()
+
+
 class ChatClient(object):
     def __init__(self, base_url: str, requester: Requester):
         self._base_url = remove_url_trailing_slash(base_url)
@@ -411,12 +567,13 @@ class ChatClient(object):
         conversation_id: Optional[str] = None,
         bot_id: str,
         user_id: str,
-        additional_messages: Optional[List[Message]] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
         custom_variables: Optional[Dict[str, str]] = None,
         auto_save_history: bool = True,
         meta_data: Optional[Dict[str, str]] = None,
         enable_card: Optional[bool] = None,
         parameters: Optional[Dict[str, Any]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
     ) -> Stream[ChatEvent]:
         """
@@ -440,6 +597,8 @@ class ChatClient(object):
 
         :param conversation_id: 标识对话发生在哪一次会话中。 会话是 Bot 和用户之间的一段问答交互。一个会话包含一条或多条消息。对话是会话中对 Bot 的一次调用，Bot 会将对话中产生的消息添加到会话中。 * 可以使用已创建的会话，会话中已存在的消息将作为上下文传递给模型。创建会话的方式可参考[创建会话](/docs/developer_guides/create_conversation)。 * 对于一问一答等不需要区分 conversation 的场合可不传该参数，系统会自动生成一个会话 一个会话中，只能有一个进行中的对话，否则调用此接口时会报错 4016。
         :param parameters: key=参数名 value=值 传递给 workflows parameters 参数
+        :param stream_timeout: first event, idle and total deadlines of the stream, the response is closed and a
+        CozeStreamTimeoutError is raised when one of them expires
         """
         return self._create(
             conversation_id=conversation_id,
@@ -451,6 +610,7 @@ class ChatClient(object):
             meta_data=meta_data,
             enable_card=enable_card,
             parameters=parameters,
+            stream_timeout=stream_timeout,
             stream=True,
             **kwargs,
         )
@@ -461,7 +621,7 @@ class ChatClient(object):
         conversation_id: Optional[str] = None,
         bot_id: str,
         user_id: str,
-        additional_messages: Optional[List[Message]] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
         custom_variables: Optional[Dict[str, str]] = None,
         auto_save_history: bool = True,
         meta_data: Optional[Dict[str, str]] = None,
@@ -520,7 +680,9 @@ class ChatClient(object):
             "chat_id": chat_id,
         }
         headers: Optional[dict] = kwargs.get("headers")
-        return self._requester.request("post", url, False, cast=Chat, params=params, headers=headers)
+        chat = self._requester.request("post", url, False, cast=Chat, params=params, headers=headers)
+        _record_chat(None, chat)
+        return chat
 
     def cancel(self, *, conversation_id: str, chat_id: str, **kwargs) -> Chat:
         """
@@ -552,13 +714,14 @@ class ChatClient(object):
         bot_id: str,
         user_id: str,
         stream: Literal[True],
-        additional_messages: Optional[List[Message]] = ...,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = ...,
         custom_variables: Optional[Dict[str, str]] = ...,
         auto_save_history: bool = ...,
         meta_data: Optional[Dict[str, str]] = ...,
         conversation_id: Optional[str] = ...,
         parameters: Optional[Dict[str, Any]] = ...,
         enable_card: Optional[bool] = ...,
+        stream_timeout: Optional[StreamTimeout] = ...,
     ) -> Stream[ChatEvent]: ...
 
     @overload
@@ -568,7 +731,7 @@ class ChatClient(object):
         bot_id: str,
         user_id: str,
         stream: Literal[False],
-        additional_messages: Optional[List[Message]] = ...,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = ...,
         custom_variables: Optional[Dict[str, str]] = ...,
         auto_save_history: bool = ...,
         meta_data: Optional[Dict[str, str]] = ...,
@@ -583,13 +746,14 @@ class ChatClient(object):
         bot_id: str,
         user_id: str,
         stream: Literal[True, False],
-        additional_messages: Optional[List[Message]] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
         custom_variables: Optional[Dict[str, str]] = None,
         auto_save_history: bool = True,
         meta_data: Optional[Dict[str, str]] = None,
         conversation_id: Optional[str] = None,
         parameters: Optional[Dict[str, Any]] = None,
         enable_card: Optional[bool] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
     ) -> Union[Chat, Stream[ChatEvent]]:
         """
@@ -603,7 +767,6 @@ class ChatClient(object):
             {
                 "bot_id": bot_id,
                 "user_id": user_id,
-                "additional_messages": [i.model_dump() for i in additional_messages] if additional_messages else [],
                 "stream": stream,
                 "custom_variables": custom_variables,
                 "auto_save_history": auto_save_history,
@@ -612,32 +775,36 @@ class ChatClient(object):
                 "enable_card": enable_card,
             }
         )
+        json_body, content = _chat_body(body, additional_messages)
+        scope = _usage_scope("chat", bot_id=bot_id, user_id=user_id)
         headers: Optional[dict] = kwargs.get("headers")
         if not stream:
-            return self._requester.request(
-                "post",
-                url,
-                False,
-                Chat,
-                params=params,
-                headers=headers,
-                body=body,
+            request = self._requester.make_request(
+                "POST", url, params=params, headers=headers, json=json_body, content=content, cast=Chat
             )
+            chat = cast(Chat, self._requester.send(request))
+            _record_chat(scope, chat)
+            return chat
 
-        response: IteratorHTTPResponse[str] = self._requester.request(
-            "post",
+        request = self._requester.make_request(
+            "POST",
             url,
-            True,
-            None,
             params=params,
             headers=headers,
-            body=body,
+            json=json_body,
+            content=content,
+            stream=True,
+            stream_timeout=stream_timeout,
         )
+        response: IteratorHTTPResponse[str] = self._requester.send(request)  # type: ignore
         return Stream(
             response._raw_response,
             response.data,
             fields=["event", "data"],
-            handler=_chat_stream_handler,
+            handler=_chat_usage_handler(_chat_stream_handler, scope),
+            timeout=stream_timeout,
+            sent_at=response.sent_at,
+            headers_at=response.headers_at,
         )
 
     def create_and_poll(
@@ -646,12 +813,14 @@ class ChatClient(object):
         bot_id: str,
         user_id: str,
         conversation_id: Optional[str] = None,
-        additional_messages: Optional[List[Message]] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
         custom_variables: Optional[Dict[str, str]] = None,
         auto_save_history: bool = True,
         meta_data: Optional[Dict[str, str]] = None,
         poll_timeout: Optional[int] = None,
         parameters: Optional[Dict[str, Any]] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+        use_stream: bool = False,
     ) -> ChatPoll:
         """
         Call the Chat API with non-streaming to send messages to a published Coze bot and
@@ -666,14 +835,80 @@ class ChatClient(object):
         :param conversation_id: Indicate which conversation the chat is taking place in.
         :param additional_messages: Additional information for the conversation. You can pass the user's query for this
         conversation through this field. The array length is limited to 100, meaning up to 100 messages can be input.
+        A ChatContext is sent as its serialized history.
         :param custom_variables: The customized variable in a key-value pair.
         :param auto_save_history: Whether to automatically save the history of conversation records.
         :param meta_data: Additional information, typically used to encapsulate some business-related fields.
         :param poll_timeout: poll timeout in seconds
         :param parameters: Additional parameters for the chat API. pass through to the workflow.
+        :param poll_strategy: the waits between the retrieve calls, PollStrategy() by default.
+        :param use_stream: run the chat over a stream and build the result from its events, instead of polling the
+        chat and listing its messages. It returns as soon as the chat is done, with a single request.
         :return: chat object
         """
-        chat = self.create(
+        start = time.monotonic()
+        started = self._start_chat(
+            bot_id=bot_id,
+            user_id=user_id,
+            conversation_id=conversation_id,
+            additional_messages=additional_messages,
+            custom_variables=custom_variables,
+            auto_save_history=auto_save_history,
+            meta_data=meta_data,
+            poll_timeout=poll_timeout,
+            parameters=parameters,
+            use_stream=use_stream,
+        )
+        if isinstance(started, ChatPoll):
+            return started
+        return self._poll_chat(started, start=start, poll_timeout=poll_timeout, poll_strategy=poll_strategy)
+
+    def _start_chat(
+        self,
+        *,
+        bot_id: str,
+        user_id: str,
+        conversation_id: Optional[str],
+        additional_messages: Optional[Union[List[Message], "ChatContext"]],
+        custom_variables: Optional[Dict[str, str]],
+        auto_save_history: bool,
+        meta_data: Optional[Dict[str, str]],
+        poll_timeout: Optional[int],
+        parameters: Optional[Dict[str, Any]],
+        use_stream: bool,
+    ) -> Union[ChatPoll, Chat]:
+        """
+        Start the chat of create_and_poll: the result if the stream ended it, or the chat to poll. Over a stream, the
+        errors raised here are raised before the chat created event.
+        """
+        if use_stream:
+            stream = self._create(
+                bot_id=bot_id,
+                user_id=user_id,
+                conversation_id=conversation_id,
+                additional_messages=additional_messages,
+                custom_variables=custom_variables,
+                auto_save_history=auto_save_history,
+                meta_data=meta_data,
+                parameters=parameters,
+                stream_timeout=StreamTimeout(total=poll_timeout) if poll_timeout is not None else None,
+                stream=True,
+            )
+            accumulator = ChatStreamAccumulator()
+            try:
+                with stream:
+                    accumulator.collect(stream)
+            except (CozeStreamTimeoutError, httpx.TransportError):
+                if accumulator.chat is None:
+                    raise
+                # past poll_timeout, the polling cancels the chat. Cut short, the chat is polled instead of starting
+                # another one.
+                return accumulator.chat
+            chat_poll = _stream_chat_poll(accumulator, stream)
+            if chat_poll is not None:
+                return chat_poll
+            return cast(Chat, accumulator.chat)
+        return self.create(
             bot_id=bot_id,
             user_id=user_id,
             conversation_id=conversation_id,
@@ -684,10 +919,15 @@ class ChatClient(object):
             parameters=parameters,
         )
 
-        start = int(time.time())
-        interval = 1
-        while chat.status == ChatStatus.IN_PROGRESS:
-            if poll_timeout is not None and int(time.time()) - start > poll_timeout:
+    def _poll_chat(
+        self, chat: Chat, *, start: float, poll_timeout: Optional[int], poll_strategy: Optional[PollStrategy]
+    ) -> ChatPoll:
+        """
+        Poll the chat of create_and_poll until it is done, canceling it past poll_timeout, and list its messages.
+        """
+        intervals = (poll_strategy or PollStrategy()).intervals()
+        while chat.status in (ChatStatus.CREATED, ChatStatus.IN_PROGRESS):
+            if poll_timeout is not None and time.monotonic() - start > poll_timeout:
                 try:
                     # too long, cancel chat
                     self.cancel(conversation_id=chat.conversation_id, chat_id=chat.id)
@@ -699,7 +939,7 @@ class ChatClient(object):
                         continue
                     raise e
 
-            time.sleep(interval)
+            time.sleep(_poll_wait(next(intervals), start, poll_timeout))
             chat = self.retrieve(conversation_id=chat.conversation_id, chat_id=chat.id)
 
         messages = self.messages.list(conversation_id=chat.conversation_id, chat_id=chat.id)
@@ -752,7 +992,115 @@ class ChatClient(object):
             params=params,
             body=body,
         )
-        return Stream(resp._raw_response, resp.data, fields=["event", "data"], handler=_chat_stream_handler)
+        return Stream(
+            resp._raw_response,
+            resp.data,
+            fields=["event", "data"],
+            handler=_chat_usage_handler(_chat_stream_handler, None),
+            sent_at=resp.sent_at,
+            headers_at=resp.headers_at,
+        )
+
+    def stream_with_tools(
+        self,
+        tools: "ChatTools",
+        *,
+        bot_id: str,
+        user_id: str,
+        conversation_id: Optional[str] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
+        custom_variables: Optional[Dict[str, str]] = None,
+        auto_save_history: bool = True,
+        meta_data: Optional[Dict[str, str]] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
+    ) -> Iterator[ChatEvent]:
+        """
+        Stream a chat whose local plugin calls are answered by the tools. When the chat requires action, all its tool
+        calls run concurrently, their outputs are submitted, and the events of the continued chat follow in the same
+        iterator.
+
+        :param tools: the local plugin functions.
+        See ChatClient.stream for the other parameters.
+        """
+        stream: Optional[Stream[ChatEvent]] = self._create(
+            bot_id=bot_id,
+            user_id=user_id,
+            conversation_id=conversation_id,
+            additional_messages=additional_messages,
+            custom_variables=custom_variables,
+            auto_save_history=auto_save_history,
+            meta_data=meta_data,
+            parameters=parameters,
+            stream_timeout=stream_timeout,
+            stream=True,
+        )
+        while stream is not None:
+            with stream:
+                required_chat: Optional[Chat] = None
+                for event in stream:
+                    yield event
+                    required_chat = _required_action_chat(event)
+                    if required_chat is not None:
+                        break
+            stream = None
+            if required_chat is not None:
+                tool_outputs = tools.run(cast(ChatRequiredAction, required_chat.required_action))
+                stream = cast(
+                    Stream[ChatEvent],
+                    self.submit_tool_outputs(
+                        conversation_id=required_chat.conversation_id,
+                        chat_id=required_chat.id,
+                        tool_outputs=tool_outputs,
+                        stream=True,
+                    ),
+                )
+
+
+def _chat_body(
+    body: Dict[str, Any], additional_messages: Optional[Union[List[Message], "ChatContext"]]
+) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+    """
+    The JSON body of a chat request, or its serialized form when the messages are a ChatContext.
+    """
+    if additional_messages is None or isinstance(additional_messages, list):
+        body["additional_messages"] = [i.model_dump() for i in additional_messages] if additional_messages else []
+        return body, None
+    return None, additional_messages._json_body(body)
+
+
+def _required_action_chat(event: ChatEvent) -> Optional[Chat]:
+    """
+    The chat of a requires action event with tool calls to run, or None.
+    """
+    if event.event != ChatEventType.CONVERSATION_CHAT_REQUIRES_ACTION or event.chat is None:
+        return None
+    required_action = event.chat.required_action
+    if required_action is None or required_action.submit_tool_outputs is None:
+        return None
+    return event.chat
+
+
+def _stream_chat_poll(
+    accumulator: _BaseChatStreamAccumulator, stream: Union[Stream[ChatEvent], AsyncStream[ChatEvent]]
+) -> Optional[ChatPoll]:
+    """
+    The result of a chat run over a stream, or None if the chat is still in progress.
+    """
+    snapshot = accumulator.snapshot()
+    if snapshot.chat is None:
+        raise CozeInvalidEventError(data="chat stream ended without a chat event", logid=stream.response.logid or "")
+    if snapshot.chat.status in (ChatStatus.CREATED, ChatStatus.IN_PROGRESS):
+        return None
+    return ChatPoll(chat=snapshot.chat, messages=ListResponse(stream._raw_response, snapshot.messages))
+
+
+def _poll_wait(interval: float, start: float, poll_timeout: Optional[int]) -> float:
+    # don't sleep past the poll timeout, the chat is canceled right after it
+    if poll_timeout is None:
+        return interval
+    remaining = start + poll_timeout - time.monotonic()
+    return min(interval, max(0.0, remaining + 0.001))
 
 
 class AsyncChatClient(object):
@@ -775,12 +1123,13 @@ class AsyncChatClient(object):
         conversation_id: Optional[str] = None,
         bot_id: str,
         user_id: str,
-        additional_messages: Optional[List[Message]] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
         custom_variables: Optional[Dict[str, str]] = None,
         auto_save_history: bool = True,
         meta_data: Optional[Dict[str, str]] = None,
         enable_card: Optional[bool] = None,
         parameters: Optional[Dict[str, Any]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
     ) -> AsyncIterator[ChatEvent]:
         """
@@ -804,8 +1153,10 @@ class AsyncChatClient(object):
 
         :param conversation_id: 标识对话发生在哪一次会话中。 会话是 Bot 和用户之间的一段问答交互。一个会话包含一条或多条消息。对话是会话中对 Bot 的一次调用，Bot 会将对话中产生的消息添加到会话中。 * 可以使用已创建的会话，会话中已存在的消息将作为上下文传递给模型。创建会话的方式可参考[创建会话](/docs/developer_guides/create_conversation)。 * 对于一问一答等不需要区分 conversation 的场合可不传该参数，系统会自动生成一个会话 一个会话中，只能有一个进行中的对话，否则调用此接口时会报错 4016。
         :param parameters: key=参数名 value=值 传递给 workflows parameters 参数
+        :param stream_timeout: first event, idle and total deadlines of the stream, the response is closed and a
+        CozeStreamTimeoutError is raised when one of them expires
         """
-        async for item in await self._create(
+        async with await self._create(
             conversation_id=conversation_id,
             bot_id=bot_id,
             user_id=user_id,
@@ -815,10 +1166,12 @@ class AsyncChatClient(object):
             meta_data=meta_data,
             enable_card=enable_card,
             parameters=parameters,
+            stream_timeout=stream_timeout,
             stream=True,
             **kwargs,
-        ):
-            yield item
+        ) as stream:
+            async for item in stream:
+                yield item
 
     async def create(
         self,
@@ -826,7 +1179,7 @@ class AsyncChatClient(object):
         conversation_id: Optional[str] = None,
         bot_id: str,
         user_id: str,
-        additional_messages: Optional[List[Message]] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
         custom_variables: Optional[Dict[str, str]] = None,
         auto_save_history: bool = True,
         meta_data: Optional[Dict[str, str]] = None,
@@ -885,7 +1238,9 @@ class AsyncChatClient(object):
             "chat_id": chat_id,
         }
         headers: Optional[dict] = kwargs.get("headers")
-        return await self._requester.arequest("post", url, False, cast=Chat, params=params, headers=headers)
+        chat = await self._requester.arequest("post", url, False, cast=Chat, params=params, headers=headers)
+        _record_chat(None, chat)
+        return chat
 
     async def cancel(self, *, conversation_id: str, chat_id: str, **kwargs) -> Chat:
         """
@@ -917,13 +1272,14 @@ class AsyncChatClient(object):
         bot_id: str,
         user_id: str,
         stream: Literal[True],
-        additional_messages: Optional[List[Message]] = ...,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = ...,
         custom_variables: Optional[Dict[str, str]] = ...,
         auto_save_history: bool = ...,
         meta_data: Optional[Dict[str, str]] = ...,
         conversation_id: Optional[str] = ...,
         parameters: Optional[Dict[str, Any]] = ...,
         enable_card: Optional[bool] = ...,
+        stream_timeout: Optional[StreamTimeout] = ...,
     ) -> AsyncStream[ChatEvent]: ...
 
     @overload
@@ -933,7 +1289,7 @@ class AsyncChatClient(object):
         bot_id: str,
         user_id: str,
         stream: Literal[False],
-        additional_messages: Optional[List[Message]] = ...,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = ...,
         custom_variables: Optional[Dict[str, str]] = ...,
         auto_save_history: bool = ...,
         meta_data: Optional[Dict[str, str]] = ...,
@@ -948,13 +1304,14 @@ class AsyncChatClient(object):
         bot_id: str,
         user_id: str,
         stream: Literal[True, False],
-        additional_messages: Optional[List[Message]] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
         custom_variables: Optional[Dict[str, str]] = None,
         auto_save_history: bool = True,
         meta_data: Optional[Dict[str, str]] = None,
         conversation_id: Optional[str] = None,
         parameters: Optional[Dict[str, Any]] = None,
         enable_card: Optional[bool] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
     ) -> Union[Chat, AsyncStream[ChatEvent]]:
         """
@@ -969,7 +1326,6 @@ class AsyncChatClient(object):
             {
                 "bot_id": bot_id,
                 "user_id": user_id,
-                "additional_messages": [i.model_dump() for i in additional_messages] if additional_messages else [],
                 "stream": stream,
                 "custom_variables": custom_variables,
                 "auto_save_history": auto_save_history,
@@ -978,32 +1334,166 @@ class AsyncChatClient(object):
                 "enable_card": enable_card,
             }
         )
+        json_body, content = _chat_body(body, additional_messages)
+        scope = _usage_scope("chat", bot_id=bot_id, user_id=user_id)
         headers: Optional[dict] = kwargs.get("headers")
         if not stream:
-            return await self._requester.arequest(
-                "post",
-                url,
-                False,
-                Chat,
-                params=params,
-                body=body,
-                headers=headers,
+            request = await self._requester.amake_request(
+                "POST", url, params=params, headers=headers, json=json_body, content=content, cast=Chat
             )
+            chat = cast(Chat, await self._requester.asend(request))
+            _record_chat(scope, chat)
+            return chat
 
-        resp: AsyncIteratorHTTPResponse[str] = await self._requester.arequest(
-            "post",
+        request = await self._requester.amake_request(
+            "POST",
             url,
-            True,
-            None,
             params=params,
-            body=body,
             headers=headers,
+            json=json_body,
+            content=content,
+            stream=True,
+            stream_timeout=stream_timeout,
         )
+        resp: AsyncIteratorHTTPResponse[str] = await self._requester.asend(request)  # type: ignore
 
         return AsyncStream(
-            resp.data, fields=["event", "data"], handler=_chat_stream_handler, raw_response=resp._raw_response
+            resp.data,
+            fields=["event", "data"],
+            handler=_chat_usage_handler(_chat_stream_handler, scope),
+            raw_response=resp._raw_response,
+            timeout=stream_timeout,
+            sent_at=resp.sent_at,
+            headers_at=resp.headers_at,
         )
 
+    async def create_and_poll(
+        self,
+        *,
+        bot_id: str,
+        user_id: str,
+        conversation_id: Optional[str] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
+        custom_variables: Optional[Dict[str, str]] = None,
+        auto_save_history: bool = True,
+        meta_data: Optional[Dict[str, str]] = None,
+        poll_timeout: Optional[int] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+        use_stream: bool = False,
+    ) -> ChatPoll:
+        """
+        Call the Chat API with non-streaming to send messages to a published Coze bot and
+        fetch chat status & message, without blocking the event loop while waiting.
+
+        docs en: https://www.coze.com/docs/developer_guides/chat_v3
+        docs zh: https://www.coze.cn/docs/developer_guides/chat_v3
+
+        :param poll_timeout: poll timeout in seconds, the chat is canceled after it.
+        :param poll_strategy: the waits between the retrieve calls, PollStrategy() by default.
+        :param use_stream: run the chat over a stream and build the result from its events, instead of polling.
+        See ChatClient.create_and_poll for the other parameters.
+        :return: chat object
+        """
+        start = time.monotonic()
+        started = await self._start_chat(
+            bot_id=bot_id,
+            user_id=user_id,
+            conversation_id=conversation_id,
+            additional_messages=additional_messages,
+            custom_variables=custom_variables,
+            auto_save_history=auto_save_history,
+            meta_data=meta_data,
+            poll_timeout=poll_timeout,
+            parameters=parameters,
+            use_stream=use_stream,
+        )
+        if isinstance(started, ChatPoll):
+            return started
+        return await self._poll_chat(started, start=start, poll_timeout=poll_timeout, poll_strategy=poll_strategy)
+
+    async def _start_chat(
+        self,
+        *,
+        bot_id: str,
+        user_id: str,
+        conversation_id: Optional[str],
+        additional_messages: Optional[Union[List[Message], "ChatContext"]],
+        custom_variables: Optional[Dict[str, str]],
+        auto_save_history: bool,
+        meta_data: Optional[Dict[str, str]],
+        poll_timeout: Optional[int],
+        parameters: Optional[Dict[str, Any]],
+        use_stream: bool,
+    ) -> Union[ChatPoll, Chat]:
+        """
+        Start the chat of create_and_poll: the result if the stream ended it, or the chat to poll. Over a stream, the
+        errors raised here are raised before the chat created event.
+        """
+        if use_stream:
+            stream = await self._create(
+                bot_id=bot_id,
+                user_id=user_id,
+                conversation_id=conversation_id,
+                additional_messages=additional_messages,
+                custom_variables=custom_variables,
+                auto_save_history=auto_save_history,
+                meta_data=meta_data,
+                parameters=parameters,
+                stream_timeout=StreamTimeout(total=poll_timeout) if poll_timeout is not None else None,
+                stream=True,
+            )
+            accumulator = AsyncChatStreamAccumulator()
+            try:
+                async with stream:
+                    await accumulator.collect(stream)
+            except (CozeStreamTimeoutError, httpx.TransportError):
+                if accumulator.chat is None:
+                    raise
+                # past poll_timeout, the polling cancels the chat. Cut short, the chat is polled instead of starting
+                # another one.
+                return accumulator.chat
+            chat_poll = _stream_chat_poll(accumulator, stream)
+            if chat_poll is not None:
+                return chat_poll
+            return cast(Chat, accumulator.chat)
+        return await self.create(
+            bot_id=bot_id,
+            user_id=user_id,
+            conversation_id=conversation_id,
+            additional_messages=additional_messages,
+            custom_variables=custom_variables,
+            auto_save_history=auto_save_history,
+            meta_data=meta_data,
+            parameters=parameters,
+        )
+
+    async def _poll_chat(
+        self, chat: Chat, *, start: float, poll_timeout: Optional[int], poll_strategy: Optional[PollStrategy]
+    ) -> ChatPoll:
+        """
+        Poll the chat of create_and_poll until it is done, canceling it past poll_timeout, and list its messages.
+        """
+        intervals = (poll_strategy or PollStrategy()).intervals()
+        while chat.status in (ChatStatus.CREATED, ChatStatus.IN_PROGRESS):
+            if poll_timeout is not None and time.monotonic() - start > poll_timeout:
+                try:
+                    # too long, cancel chat
+                    await self.cancel(conversation_id=chat.conversation_id, chat_id=chat.id)
+                    return ChatPoll(chat=chat)
+                except CozeAPIError as e:
+                    if e.code == 4104:
+                        # The current conversation can't be canceled, re-retrieve the chat and continue polling.
+                        chat = await self.retrieve(conversation_id=chat.conversation_id, chat_id=chat.id)
+                        continue
+                    raise e
+
+            await asyncio.sleep(_poll_wait(next(intervals), start, poll_timeout))
+            chat = await self.retrieve(conversation_id=chat.conversation_id, chat_id=chat.id)
+
+        messages = await self.messages.list(conversation_id=chat.conversation_id, chat_id=chat.id)
+        return ChatPoll(chat=chat, messages=messages)
+
     @overload
     async def _submit_tool_outputs(
         self, *, conversation_id: str, chat_id: str, stream: Literal[True], tool_outputs: List[ToolOutput]
@@ -1034,7 +1524,12 @@ class AsyncChatClient(object):
             "post", url, True, None, params=params, body=body
         )
         return AsyncStream(
-            resp.data, fields=["event", "data"], handler=_chat_stream_handler, raw_response=resp._raw_response
+            resp.data,
+            fields=["event", "data"],
+            handler=_chat_usage_handler(_chat_stream_handler, None),
+            raw_response=resp._raw_response,
+            sent_at=resp.sent_at,
+            headers_at=resp.headers_at,
         )
 
     async def submit_tool_outputs(self, *, conversation_id: str, chat_id: str, tool_outputs: List[ToolOutput]) -> Chat:
@@ -1081,7 +1576,55 @@ class AsyncChatClient(object):
         :return:
         """
 
-        async for item in await self._submit_tool_outputs(
+        async with await self._submit_tool_outputs(
             conversation_id=conversation_id, chat_id=chat_id, stream=True, tool_outputs=tool_outputs
-        ):
-            yield item
+        ) as stream:
+            async for item in stream:
+                yield item
+
+    async def stream_with_tools(
+        self,
+        tools: "ChatTools",
+        *,
+        bot_id: str,
+        user_id: str,
+        conversation_id: Optional[str] = None,
+        additional_messages: Optional[Union[List[Message], "ChatContext"]] = None,
+        custom_variables: Optional[Dict[str, str]] = None,
+        auto_save_history: bool = True,
+        meta_data: Optional[Dict[str, str]] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
+    ) -> AsyncIterator[ChatEvent]:
+        """
+        Stream a chat whose local plugin calls are answered by the tools, see ChatClient.stream_with_tools.
+        """
+        stream: Optional[AsyncStream[ChatEvent]] = await self._create(
+            bot_id=bot_id,
+            user_id=user_id,
+            conversation_id=conversation_id,
+            additional_messages=additional_messages,
+            custom_variables=custom_variables,
+            auto_save_history=auto_save_history,
+            meta_data=meta_data,
+            parameters=parameters,
+            stream_timeout=stream_timeout,
+            stream=True,
+        )
+        while stream is not None:
+            async with stream:
+                required_chat: Optional[Chat] = None
+                async for event in stream:
+                    yield event
+                    required_chat = _required_action_chat(event)
+                    if required_chat is not None:
+                        break
+            stream = None
+            if required_chat is not None:
+                tool_outputs = await tools.arun(cast(ChatRequiredAction, required_chat.required_action))
+                stream = await self._submit_tool_outputs(
+                    conversation_id=required_chat.conversation_id,
+                    chat_id=required_chat.id,
+                    tool_outputs=tool_outputs,
+                    stream=True,
+                )
@@ -0,0 +1,429 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import httpx
+
+from cozepy.chat import Chat, ChatPoll, ChatStatus, ChatUsage, Message
+from cozepy.log import log_warning
+from cozepy.model import CozeModel
+from cozepy.request import _is_transient, _is_unsent
+
+if TYPE_CHECKING:
+    from . import AsyncChatClient, ChatClient
+
+
+class ChatJob(CozeModel):
+    """
+    One chat of a batch.
+    """
+
+    bot_id: str
+    user_id: str
+    messages: List[Message]
+    # Identifies the job in the checkpoint, the position of the job in the batch by default.
+    id: Optional[str] = None
+    conversation_id: Optional[str] = None
+    parameters: Optional[Dict[str, Any]] = None
+
+
+# A job, or a (bot_id, user_id, messages) tuple where messages can be the text of a single user question.
+ChatJobLike = Union[ChatJob, Tuple[str, str, Union[str, List[Message]]]]
+
+
+class ChatJobResult(CozeModel):
+    """
+    The result of a job of a batch.
+    """
+
+    job_id: str
+    # The position of the job in the batch.
+    index: int
+    chat: Optional[Chat] = None
+    messages: List[Message] = []
+    # The error of the last attempt, when the job failed.
+    error: Optional[str] = None
+    attempts: int = 0
+    # Time of the job in seconds, including the retries and their waits.
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the chat completed. A chat that failed, or was canceled past poll_timeout, is not ok.
+        """
+        return self.error is None and self.chat is not None and self.chat.status == ChatStatus.COMPLETED
+
+    @property
+    def usage(self) -> Optional[ChatUsage]:
+        return self.chat.usage if self.chat else None
+
+
+class _RateLimiter(object):
+    """
+    Spaces out the starts of the attempts to at most rate per second, across threads.
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self._interval = 1 / rate if rate else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Reserve the next slot and return the wait until it in seconds.
+        """
+        if not self._interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next_at)
+            self._next_at = at + self._interval
+            return at - now
+
+
+class _Checkpoint(object):
+    """
+    The ids of the jobs done in earlier runs, and an append-only JSONL file of the results of the successful jobs.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.done: Set[str] = set()
+        self._file = None
+        if path is None:
+            return
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.done.add(json.loads(line)["job_id"])
+                    except (ValueError, KeyError):
+                        # a blank line, or a line cut short when the last run was killed
+                        continue
+        self._file = open(path, "a", encoding="utf-8")
+
+    def save(self, result: ChatJobResult) -> None:
+        if self._file is None or not result.ok:
+            return
+        self._file.write(result.model_dump_json() + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+class _BaseBatchChat(object):
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        rate_limit: Optional[float],
+        retries: int,
+        retry_interval: float,
+        ordered: bool,
+        use_stream: bool,
+        poll_timeout: Optional[int],
+        checkpoint: Optional[str],
+    ):
+        if concurrency < 1:
+            raise ValueError(f"invalid concurrency: {concurrency}")
+        if rate_limit is not None and rate_limit <= 0:
+            raise ValueError(f"invalid rate limit: {rate_limit}")
+        if retries < 0:
+            raise ValueError(f"invalid retries: {retries}")
+        self._concurrency = concurrency
+        self._limiter = _RateLimiter(rate_limit)
+        self._retries = retries
+        self._retry_interval = retry_interval
+        self._ordered = ordered
+        self._use_stream = use_stream
+        self._poll_timeout = poll_timeout
+        self._checkpoint = checkpoint
+
+    def _pending_jobs(self, jobs: Iterable[ChatJobLike], checkpoint: _Checkpoint) -> Iterator[Tuple[int, ChatJob]]:
+        for index, job in enumerate(jobs):
+            chat_job = _as_job(index, job)
+            if chat_job.id not in checkpoint.done:
+                yield index, chat_job
+
+    def _start_args(self, job: ChatJob) -> Dict[str, Any]:
+        return {
+            "bot_id": job.bot_id,
+            "user_id": job.user_id,
+            "additional_messages": job.messages,
+            "conversation_id": job.conversation_id,
+            "custom_variables": None,
+            "auto_save_history": True,
+            "meta_data": None,
+            "parameters": job.parameters,
+            "poll_timeout": self._poll_timeout,
+            "use_stream": self._use_stream,
+        }
+
+    def _retry_wait(self, job: ChatJob, attempts: int, error: Exception, chat: Optional[Chat]) -> Optional[float]:
+        """
+        The wait before retrying the job after the failed attempt, or None if it is not retried.
+
+        Once the chat is known, a retry resumes polling it. Before, a retry starts another chat, so a transport error
+        is only retried if the request was never sent: the server may create the chat and the connection drop before
+        the response, or the chat created event of a stream, arrives.
+        """
+        if attempts > self._retries or not _is_transient(error):
+            return None
+        if chat is None and isinstance(error, httpx.TransportError) and not _is_unsent(error):
+            return None
+        log_warning("chat job failed, retrying, job=%s, attempt=%s, error=%s", job.id, attempts, error)
+        return self._retry_interval * 2 ** (attempts - 1)
+
+
+class BatchChat(_BaseBatchChat):
+    """
+    Runs many chats with create_and_poll in a thread pool, with a concurrency limit, a rate limit and retries of
+    transient failures. Jobs are read from the input lazily, so the batch can be far larger than memory.
+    """
+
+    def __init__(
+        self,
+        client: "ChatClient",
+        *,
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        retries: int = 2,
+        retry_interval: float = 1.0,
+        ordered: bool = True,
+        use_stream: bool = True,
+        poll_timeout: Optional[int] = None,
+        checkpoint: Optional[str] = None,
+    ):
+        """
+        :param client: the chat client, e.g. coze.chat.
+        :param concurrency: the max number of chats in flight.
+        :param rate_limit: the max number of chats started per second, retries included.
+        :param retries: the number of times a chat is retried after a transient error, such as a dropped connection
+        or a rate limit error. A chat already created is polled again rather than started again, so that it is never
+        run twice.
+        :param retry_interval: the wait before the first retry in seconds, doubled for each further retry.
+        :param ordered: yield the results in the order of the jobs, otherwise as soon as each job is done.
+        :param use_stream: run each chat over a stream, see ChatClient.create_and_poll.
+        :param poll_timeout: the timeout of each chat in seconds, the chat is canceled after it.
+        :param checkpoint: a JSONL file of the results of the successful jobs. Jobs found in it are skipped, so a
+        batch run again with the same jobs resumes where it stopped.
+        """
+        super().__init__(
+            concurrency=concurrency,
+            rate_limit=rate_limit,
+            retries=retries,
+            retry_interval=retry_interval,
+            ordered=ordered,
+            use_stream=use_stream,
+            poll_timeout=poll_timeout,
+            checkpoint=checkpoint,
+        )
+        self._client = client
+
+    def run(self, jobs: Iterable[ChatJobLike]) -> Iterator[ChatJobResult]:
+        """
+        Run the jobs and iterate over their results. A job that still fails after the retries yields a result
+        with the error, it doesn't stop the batch.
+        """
+        checkpoint = _Checkpoint(self._checkpoint)
+        pending_jobs = self._pending_jobs(jobs, checkpoint)
+        executor = ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="cozepy-batch-chat")
+        futures: Deque[Future] = deque()
+        try:
+            for index, job in itertools.islice(pending_jobs, self._concurrency):
+                futures.append(executor.submit(self._run_job, index, job))
+            while futures:
+                if self._ordered:
+                    future = futures.popleft()
+                else:
+                    future = next(iter(wait(futures, return_when=FIRST_COMPLETED).done))
+                    futures.remove(future)
+                result = future.result()
+                for index, job in itertools.islice(pending_jobs, 1):
+                    futures.append(executor.submit(self._run_job, index, job))
+                checkpoint.save(result)
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+            checkpoint.close()
+
+    def _run_job(self, index: int, job: ChatJob) -> ChatJobResult:
+        started_at = time.monotonic()
+        attempts = 0
+        chat: Optional[Chat] = None
+        while True:
+            attempts += 1
+            try:
+                if chat is None:
+                    time.sleep(self._limiter.reserve())
+                    started = self._client._start_chat(**self._start_args(job))
+                    if isinstance(started, ChatPoll):
+                        return _job_result(index, job, started_at, attempts, chat_poll=started)
+                    chat = started
+                chat_poll = self._client._poll_chat(
+                    chat, start=started_at, poll_timeout=self._poll_timeout, poll_strategy=None
+                )
+                return _job_result(index, job, started_at, attempts, chat_poll=chat_poll)
+            except Exception as e:
+                retry_wait = self._retry_wait(job, attempts, e, chat)
+                if retry_wait is None:
+                    return _job_result(index, job, started_at, attempts, error=e)
+                time.sleep(retry_wait)
+
+
+class AsyncBatchChat(_BaseBatchChat):
+    """
+    Runs many chats with create_and_poll as concurrent tasks, see BatchChat.
+    """
+
+    def __init__(
+        self,
+        client: "AsyncChatClient",
+        *,
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        retries: int = 2,
+        retry_interval: float = 1.0,
+        ordered: bool = True,
+        use_stream: bool = True,
+        poll_timeout: Optional[int] = None,
+        checkpoint: Optional[str] = None,
+    ):
+        super().__init__(
+            concurrency=concurrency,
+            rate_limit=rate_limit,
+            retries=retries,
+            retry_interval=retry_interval,
+            ordered=ordered,
+            use_stream=use_stream,
+            poll_timeout=poll_timeout,
+            checkpoint=checkpoint,
+        )
+        self._client = client
+
+    async def run(self, jobs: Union[Iterable[ChatJobLike], AsyncIterable[ChatJobLike]]) -> AsyncIterator[ChatJobResult]:
+        """
+        Run the jobs and iterate over their results, see BatchChat.run.
+        """
+        checkpoint = _Checkpoint(self._checkpoint)
+        pending_jobs = self._apending_jobs(jobs, checkpoint)
+        tasks: Deque[asyncio.Future] = deque()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(tasks) < self._concurrency:
+                    try:
+                        index, job = await pending_jobs.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    tasks.append(asyncio.ensure_future(self._run_job(index, job)))
+                if not tasks:
+                    return
+                if self._ordered:
+                    task = tasks.popleft()
+                else:
+                    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    task = next(iter(done))
+                    tasks.remove(task)
+                result = await task
+                checkpoint.save(result)
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            checkpoint.close()
+
+    async def _apending_jobs(
+        self, jobs: Union[Iterable[ChatJobLike], AsyncIterable[ChatJobLike]], checkpoint: _Checkpoint
+    ) -> AsyncIterator[Tuple[int, ChatJob]]:
+        if not isinstance(jobs, AsyncIterable):
+            for index, job in self._pending_jobs(jobs, checkpoint):
+                yield index, job
+            return
+        index = 0
+        async for job_like in jobs:
+            chat_job = _as_job(index, job_like)
+            if chat_job.id not in checkpoint.done:
+                yield index, chat_job
+            index += 1
+
+    async def _run_job(self, index: int, job: ChatJob) -> ChatJobResult:
+        started_at = time.monotonic()
+        attempts = 0
+        chat: Optional[Chat] = None
+        while True:
+            attempts += 1
+            try:
+                if chat is None:
+                    await asyncio.sleep(self._limiter.reserve())
+                    started = await self._client._start_chat(**self._start_args(job))
+                    if isinstance(started, ChatPoll):
+                        return _job_result(index, job, started_at, attempts, chat_poll=started)
+                    chat = started
+                chat_poll = await self._client._poll_chat(
+                    chat, start=started_at, poll_timeout=self._poll_timeout, poll_strategy=None
+                )
+                return _job_result(index, job, started_at, attempts, chat_poll=chat_poll)
+            except Exception as e:
+                retry_wait = self._retry_wait(job, attempts, e, chat)
+                if retry_wait is None:
+                    return _job_result(index, job, started_at, attempts, error=e)
+                await asyncio.sleep(retry_wait)
+
+
+def _as_job(index: int, job: ChatJobLike) -> ChatJob:
+    if isinstance(job, ChatJob):
+        chat_job = job
+    else:
+        bot_id, user_id, messages = job
+        if isinstance(messages, str):
+            messages = [Message.build_user_question_text(messages)]
+        chat_job = ChatJob(bot_id=bot_id, user_id=user_id, messages=messages)
+    if chat_job.id is None:
+        chat_job = chat_job.model_copy(update={"id": str(index)})
+    return chat_job
+
+
+def _job_result(
+    index: int,
+    job: ChatJob,
+    started_at: float,
+    attempts: int,
+    *,
+    chat_poll: Optional[ChatPoll] = None,
+    error: Optional[Exception] = None,
+) -> ChatJobResult:
+    return ChatJobResult(
+        job_id=job.id or str(index),
+        index=index,
+        chat=chat_poll.chat if chat_poll else None,
+        messages=list(chat_poll.messages or []) if chat_poll else [],
+        error=f"{type(error).__name__}: {error}" if error is not None else None,
+        attempts=attempts,
+        duration=time.monotonic() - started_at,
+    )
@@ -0,0 +1,282 @@
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, List, Optional, Set
+
+from cozepy.chat import Chat, ChatEvent, ChatStatus
+from cozepy.log import log_warning
+from cozepy.model import CozeModel
+from cozepy.request import _is_transient
+
+if TYPE_CHECKING:
+    from . import AsyncChatClient
+
+# The statuses of a chat that can't be canceled any more.
+_FINAL_STATUSES = {ChatStatus.COMPLETED, ChatStatus.FAILED, ChatStatus.CANCELED, ChatStatus.REQUIRES_ACTION}
+
+
+class ChatCancellation(CozeModel):
+    """
+    The cancel of a chat whose stream was stopped early.
+    """
+
+    chat_id: str
+    conversation_id: str
+    # Why the stream was stopped: closed by the caller, token for a ChatCancelToken, task for an asyncio
+    # cancellation of the task consuming the stream, or error for a failed stream, such as a timeout.
+    reason: str
+    # The error of the last cancel attempt, when the chat could not be canceled.
+    error: Optional[str] = None
+    attempts: int = 0
+    # Time from the stop of the stream to the end of the cancel in seconds, including the retries.
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ChatCancelStats(CozeModel):
+    """
+    The cancellations of a ChatCanceller.
+    """
+
+    # Streams stopped before their chat ended.
+    stopped: int = 0
+    # Chats canceled on the server.
+    cancelled: int = 0
+    # Chats whose cancel failed, after the retries.
+    failed: int = 0
+    # Cancel attempts retried after a transient error.
+    retries: int = 0
+    # Streams stopped before the chat was created, which have no chat to cancel.
+    unknown: int = 0
+
+
+ChatCancelHook = Callable[[ChatCancellation], None]
+
+
+class ChatCancelToken(object):
+    """
+    Stops the chat streams it is passed to, such as when the client of a web request disconnects. cancel can be
+    called from any thread.
+    """
+
+    def __init__(self):
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._waiters: List["asyncio.Future[None]"] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+
+    def _waiter(self) -> "asyncio.Future[None]":
+        waiter = asyncio.get_event_loop().create_future()
+        with self._lock:
+            if self._cancelled:
+                waiter.set_result(None)
+            else:
+                self._waiters.append(waiter)
+        return waiter
+
+    def _discard(self, waiter: "asyncio.Future[None]") -> None:
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+
+def _resolve(waiter: "asyncio.Future[None]") -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ChatCanceller(object):
+    """
+    Streams chats that are canceled on the server when their stream is stopped before the chat ends, so that they stop
+    using tokens.
+
+    A stream is stopped when the caller closes it or stops iterating it, when its ChatCancelToken is cancelled, when
+    the task consuming it is cancelled, as web frameworks do on a client disconnect, or when it fails. The response is closed right
+    away, and chat.cancel is called in the background, with retries of transient errors. Each cancel is passed to
+    on_cancel, and counted in stats.
+
+    Breaking out of an async for loop doesn't close an async generator, so call aclose on a stream that is stopped
+    early.
+    """
+
+    def __init__(
+        self,
+        chat: "AsyncChatClient",
+        *,
+        retries: int = 3,
+        retry_interval: float = 0.5,
+        on_cancel: Optional[ChatCancelHook] = None,
+    ):
+        """
+        :param chat: the chat client.
+        :param retries: the number of times a cancel is retried after a transient error, such as a dropped connection
+        or a rate limit.
+        :param retry_interval: the wait before the first retry in seconds, doubled for each further retry.
+        :param on_cancel: called with each cancel once it succeeded or failed.
+        """
+        if retries < 0:
+            raise ValueError(f"invalid retries: {retries}")
+        if retry_interval < 0:
+            raise ValueError(f"invalid retry_interval: {retry_interval}")
+        self._chat = chat
+        self._retries = retries
+        self._retry_interval = retry_interval
+        self._on_cancel = on_cancel
+        self._cancels: Set["asyncio.Future[None]"] = set()
+        self.stats = ChatCancelStats()
+
+    async def stream(
+        self,
+        *,
+        bot_id: str,
+        user_id: str,
+        token: Optional[ChatCancelToken] = None,
+        **kwargs,
+    ) -> AsyncIterator[ChatEvent]:
+        """
+        Stream a chat, canceling it if the stream is stopped before the chat ends. A stream stopped by its token ends
+        without an error.
+
+        :param bot_id: the bot of the chat.
+        :param user_id: the user of the chat.
+        :param token: stops the stream when it is cancelled.
+        :param kwargs: the other arguments of chat.stream.
+        """
+        events = self._chat.stream(bot_id=bot_id, user_id=user_id, **kwargs).__aiter__()
+        waiter = token._waiter() if token is not None else None
+        chat: Optional[Chat] = None
+        ended = False
+        reason = "closed"
+        try:
+            while True:
+                if waiter is None:
+                    try:
+                        event = await events.__anext__()
+                    except StopAsyncIteration:
+                        ended = True
+                        break
+                else:
+                    event_or_none = await _next_or_cancel(events, waiter)
+                    if event_or_none is None:
+                        ended = not waiter.done()
+                        reason = "token"
+                        break
+                    event = event_or_none
+                if event.chat is not None:
+                    chat = event.chat
+                yield event
+        except asyncio.CancelledError:
+            reason = "task"
+            raise
+        except Exception:
+            reason = "error"
+            raise
+        finally:
+            if waiter is not None and token is not None:
+                token._discard(waiter)
+            stopped_at = time.monotonic()
+            await _aclose(events)
+            if not ended and (chat is None or chat.status not in _FINAL_STATUSES):
+                self._cancel(chat, reason, stopped_at)
+
+    async def aclose(self) -> None:
+        """
+        Wait for the cancels in progress.
+        """
+        if self._cancels:
+            await asyncio.gather(*self._cancels, return_exceptions=True)
+
+    def _cancel(self, chat: Optional[Chat], reason: str, stopped_at: float) -> None:
+        self.stats.stopped += 1
+        if chat is None:
+            self.stats.unknown += 1
+            return
+        task = asyncio.ensure_future(self._cancel_chat(chat, reason, stopped_at))
+        self._cancels.add(task)
+        task.add_done_callback(self._cancels.discard)
+
+    async def _cancel_chat(self, chat: Chat, reason: str, stopped_at: float) -> None:
+        attempts = 0
+        error: Optional[Exception] = None
+        while True:
+            attempts += 1
+            try:
+                await self._chat.cancel(conversation_id=chat.conversation_id, chat_id=chat.id)
+                error = None
+                break
+            except Exception as e:
+                error = e
+                if attempts > self._retries or not _is_transient(e):
+                    break
+                self.stats.retries += 1
+                log_warning("cancel chat failed, retrying, chat_id=%s, attempt=%s, error=%s", chat.id, attempts, e)
+                await asyncio.sleep(self._retry_interval * 2 ** (attempts - 1))
+
+        if error is None:
+            self.stats.cancelled += 1
+        else:
+            self.stats.failed += 1
+            log_warning("cancel chat failed, chat_id=%s, error=%s", chat.id, error)
+        if self._on_cancel is None:
+            return
+        cancellation = ChatCancellation(
+            chat_id=chat.id,
+            conversation_id=chat.conversation_id,
+            reason=reason,
+            error=str(error) if error is not None else None,
+            attempts=attempts,
+            duration=time.monotonic() - stopped_at,
+        )
+        try:
+            self._on_cancel(cancellation)
+        except Exception as e:
+            log_warning("chat cancel hook failed, chat_id=%s, error=%s", chat.id, e)
+
+
+async def _next_or_cancel(events: AsyncIterator[ChatEvent], waiter: "asyncio.Future[None]") -> Optional[ChatEvent]:
+    """
+    The next event, or None if the stream ended or the waiter was resolved first, in which case the pending read is
+    cancelled, which closes the response.
+    """
+    if waiter.done():
+        return None
+    read: "asyncio.Future[Any]" = asyncio.ensure_future(events.__anext__())
+    try:
+        await asyncio.wait({read, waiter}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        await _cancel_read(read)
+        raise
+    if not read.done():
+        await _cancel_read(read)
+        return None
+    try:
+        return read.result()
+    except StopAsyncIteration:
+        return None
+
+
+async def _cancel_read(read: "asyncio.Future[Any]") -> None:
+    # wait for the read to stop, the stream can't be closed while it is being read
+    read.cancel()
+    await asyncio.wait({read})
+    if not read.cancelled():
+        read.exception()
+
+
+async def _aclose(events: AsyncIterator[ChatEvent]) -> None:
+    aclose = getattr(events, "aclose", None)
+    if aclose is not None:
+        await aclose()
@@ -0,0 +1,179 @@
+import json
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from cozepy.chat import Message
+
+MessageLike = Union[Message, Dict[str, Any]]
+
+
+def estimate_tokens(content: str) -> int:
+    """
+    A rough token count of the content, one token per 4 bytes of UTF-8.
+    """
+    return len(content.encode("utf-8")) // 4 + 1
+
+
+class ChatContext(object):
+    """
+    The history of a conversation, kept as serialized messages, for bots that get their context through
+    additional_messages rather than a saved conversation.
+
+    Each message is serialized once when it is appended, and passing the context as additional_messages to
+    chat.create or chat.stream splices the serialized history into the request body as is, so the cost of a turn
+    grows with its new messages instead of the whole history. The oldest messages are dropped to keep the context
+    within max_messages and max_tokens.
+    """
+
+    def __init__(
+        self,
+        messages: Optional[Iterable[MessageLike]] = None,
+        *,
+        max_messages: int = 100,
+        max_tokens: Optional[int] = None,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        """
+        :param messages: the initial history, oldest first.
+        :param max_messages: the max number of messages kept, the chat API accepts up to 100 additional messages.
+        :param max_tokens: the max number of tokens kept, counted by count_tokens on the content of the messages.
+        The newest message is always kept.
+        :param count_tokens: the token count of the content of a message.
+        """
+        if max_messages < 1:
+            raise ValueError(f"invalid max_messages: {max_messages}")
+        if max_tokens is not None and max_tokens < 1:
+            raise ValueError(f"invalid max_tokens: {max_tokens}")
+        self._max_messages = max_messages
+        self._max_tokens = max_tokens
+        self._count_tokens = count_tokens
+        self._messages: Deque[Tuple[str, int]] = deque()
+        self._tokens = 0
+        self._lock = threading.Lock()
+        if messages is not None:
+            self.append(*messages)
+
+    def append(self, *messages: MessageLike) -> None:
+        """
+        Append messages to the history, newest last, and trim it to the budget.
+
+        :param messages: Message objects, or message dicts as returned by Message.model_dump, which are not validated.
+        """
+        serialized = [self._serialize(message) for message in messages]
+        with self._lock:
+            for item in serialized:
+                self._messages.append(item)
+                self._tokens += item[1]
+            self._trim()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._messages.clear()
+            self._tokens = 0
+
+    @property
+    def tokens(self) -> int:
+        """
+        The token count of the messages kept.
+        """
+        return self._tokens
+
+    @property
+    def messages(self) -> List[Message]:
+        """
+        The messages kept, parsed again from their serialized form.
+        """
+        with self._lock:
+            serialized = [message for message, _ in self._messages]
+        return [Message.model_validate_json(message) for message in serialized]
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def _serialize(self, message: MessageLike) -> Tuple[str, int]:
+        if isinstance(message, Message):
+            return message.model_dump_json(), self._count_tokens(message.content)
+        return json.dumps(message, ensure_ascii=False), self._count_tokens(message.get("content") or "")
+
+    def _trim(self) -> None:
+        while len(self._messages) > self._max_messages or (
+            self._max_tokens is not None and self._tokens > self._max_tokens and len(self._messages) > 1
+        ):
+            _, tokens = self._messages.popleft()
+            self._tokens -= tokens
+
+    def _json_body(self, body: Dict[str, Any]) -> bytes:
+        """
+        The JSON of the body with the history as its additional_messages.
+        """
+        with self._lock:
+            history = ",".join(message for message, _ in self._messages)
+        head = json.dumps(body, ensure_ascii=False)
+        return f'{head[:-1]}, "additional_messages": [{history}]}}'.encode("utf-8")
+
+
+class ChatContextCache(object):
+    """
+    ChatContext objects by key, such as a conversation or user id, evicting the least recently used ones.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 1024,
+        max_messages: int = 100,
+        max_tokens: Optional[int] = None,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        """
+        :param max_size: the max number of contexts kept.
+        :param max_messages: the max_messages of the contexts.
+        :param max_tokens: the max_tokens of the contexts.
+        :param count_tokens: the count_tokens of the contexts.
+        """
+        if max_size < 1:
+            raise ValueError(f"invalid max_size: {max_size}")
+        self._max_size = max_size
+        self._context_kwargs: Dict[str, Any] = {
+            "max_messages": max_messages,
+            "max_tokens": max_tokens,
+            "count_tokens": count_tokens,
+        }
+        self._contexts: "OrderedDict[str, ChatContext]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, load: Optional[Callable[[], Iterable[MessageLike]]] = None) -> ChatContext:
+        """
+        Get the context of the key, creating it on a miss.
+
+        :param key: the key of the context.
+        :param load: returns the history to create the context with on a miss, such as the messages in a database.
+        """
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is not None:
+                self._contexts.move_to_end(key)
+                return context
+        # load outside the lock, a concurrent miss of the same key keeps the first context stored
+        context = ChatContext(load() if load is not None else None, **self._context_kwargs)
+        with self._lock:
+            context = self._contexts.setdefault(key, context)
+            self._contexts.move_to_end(key)
+            while len(self._contexts) > self._max_size:
+                self._contexts.popitem(last=False)
+            return context
+
+    def pop(self, key: str) -> Optional[ChatContext]:
+        with self._lock:
+            return self._contexts.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._contexts.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._contexts
+
+    def __len__(self) -> int:
+        return len(self._contexts)
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
+
+from cozepy.chat import Message, MessageObjectString, MessageObjectStringType
+
+if TYPE_CHECKING:
+    from cozepy.files import AsyncFilesClient, FilesClient
+
+# A local path, the content, or the http(s) url of an attachment.
+AttachmentSource = Union[str, Path, bytes, IO[bytes]]
+
+
+class MessageAttachment(object):
+    """
+    An image, file or audio of a multimodal message. Local paths and contents are uploaded, urls are passed as is.
+    """
+
+    def __init__(self, type: MessageObjectStringType, source: AttachmentSource, file_name: Optional[str] = None):
+        """
+        :param type: image, file or audio.
+        :param source: a local path, the content, or the http(s) url of the attachment.
+        :param file_name: the name of the uploaded file, the name of the path by default.
+        """
+        if type == MessageObjectStringType.TEXT:
+            raise ValueError("text is not an attachment type")
+        self.type = type
+        self.source = source
+        self.file_name = file_name
+
+    @staticmethod
+    def image(source: AttachmentSource, file_name: Optional[str] = None) -> "MessageAttachment":
+        return MessageAttachment(MessageObjectStringType.IMAGE, source, file_name)
+
+    @staticmethod
+    def file(source: AttachmentSource, file_name: Optional[str] = None) -> "MessageAttachment":
+        return MessageAttachment(MessageObjectStringType.FILE, source, file_name)
+
+    @staticmethod
+    def audio(source: AttachmentSource, file_name: Optional[str] = None) -> "MessageAttachment":
+        return MessageAttachment(MessageObjectStringType.AUDIO, source, file_name)
+
+    @property
+    def url(self) -> Optional[str]:
+        if isinstance(self.source, str) and self.source.startswith(("http://", "https://")):
+            return self.source
+        return None
+
+    def _read(self) -> Tuple[str, bytes]:
+        source = self.source
+        if isinstance(source, (str, Path)):
+            if not os.path.isfile(source):
+                raise ValueError(f"File not found: {source}")
+            with open(source, "rb") as f:
+                return self.file_name or os.path.basename(source), f.read()
+        if isinstance(source, bytes):
+            return self.file_name or "file", source
+        return self.file_name or os.path.basename(getattr(source, "name", "") or "file"), source.read()
+
+
+# Text, an attachment, or a ready message object.
+MessagePart = Union[str, MessageAttachment, MessageObjectString]
+
+
+class FileIDCache(object):
+    """
+    The ids of uploaded files by the type of the attachment and the SHA-256 of their content, so that an attachment
+    is uploaded once.
+    """
+
+    def __init__(self, *, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        :param max_size: the max number of file ids kept, the least recently used ones are evicted.
+        :param ttl: seconds a file id is reused for, None to keep it until evicted.
+        """
+        if max_size < 1:
+            raise ValueError(f"invalid max_size: {max_size}")
+        self._max_size = max_size
+        self._ttl = ttl
+        self._file_ids: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            item = self._file_ids.get(digest)
+            if item is None:
+                return None
+            if self._ttl is not None and time.monotonic() - item[1] > self._ttl:
+                del self._file_ids[digest]
+                return None
+            self._file_ids.move_to_end(digest)
+            return item[0]
+
+    def set(self, digest: str, file_id: str) -> None:
+        with self._lock:
+            self._file_ids[digest] = (file_id, time.monotonic())
+            self._file_ids.move_to_end(digest)
+            while len(self._file_ids) > self._max_size:
+                self._file_ids.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._file_ids)
+
+
+class _Upload(object):
+    """
+    The content of an attachment to upload, shared by the attachments of the same type with the same content.
+    """
+
+    def __init__(self, key: str, file_name: str, content: bytes):
+        # the cache key of the upload
+        self.key = key
+        self.file_name = file_name
+        self.content = content
+        # the positions of the attachments in the message objects
+        self.indexes: List[int] = []
+
+
+class _BaseMultimodalMessageBuilder(object):
+    def __init__(self, cache: Optional[FileIDCache], concurrency: int):
+        if concurrency < 1:
+            raise ValueError(f"invalid concurrency: {concurrency}")
+        self._cache = cache if cache is not None else FileIDCache()
+        self._concurrency = concurrency
+
+    def _plan(self, parts: Sequence[MessagePart]) -> Tuple[List[MessageObjectString], List[_Upload]]:
+        """
+        Resolve the parts to message objects, and collect the contents that still have to be uploaded. The objects
+        of these contents get their file ids in _resolve. Local attachments are read, which blocks.
+        """
+        objects: List[MessageObjectString] = []
+        uploads: Dict[str, _Upload] = {}
+        for part in parts:
+            if isinstance(part, MessageObjectString):
+                objects.append(part)
+            elif isinstance(part, str):
+                objects.append(MessageObjectString.build_text(part))
+            elif part.url is not None:
+                objects.append(MessageObjectString(type=part.type, file_url=part.url))
+            else:
+                file_name, content = part._read()
+                key = f"{part.type.value}:{hashlib.sha256(content).hexdigest()}"
+                file_id = self._cache.get(key)
+                if file_id is None:
+                    uploads.setdefault(key, _Upload(key, file_name, content)).indexes.append(len(objects))
+                objects.append(MessageObjectString(type=part.type, file_id=file_id))
+        return objects, list(uploads.values())
+
+    def _resolve(
+        self, objects: List[MessageObjectString], uploads: List[_Upload], file_ids: List[str]
+    ) -> List[MessageObjectString]:
+        for upload, file_id in zip(uploads, file_ids):
+            self._cache.set(upload.key, file_id)
+            for index in upload.indexes:
+                objects[index].file_id = file_id
+        return objects
+
+
+class MultimodalMessageBuilder(_BaseMultimodalMessageBuilder):
+    """
+    Builds multimodal messages from text and attachments, uploading the local attachments concurrently and reusing
+    the file ids of contents uploaded before.
+    """
+
+    def __init__(self, files: "FilesClient", *, cache: Optional[FileIDCache] = None, concurrency: int = 4):
+        """
+        :param files: the files client to upload with.
+        :param cache: the file ids of the uploaded contents, can be shared by builders.
+        :param concurrency: the max number of uploads at the same time.
+        """
+        super().__init__(cache, concurrency)
+        self._files = files
+
+    def build_objects(self, parts: Sequence[MessagePart]) -> List[MessageObjectString]:
+        """
+        Build the message objects of the parts, uploading the local attachments.
+
+        :param parts: text, attachments and message objects, in the order of the message.
+        """
+        objects, uploads = self._plan(parts)
+        if not uploads:
+            return objects
+        with ThreadPoolExecutor(max_workers=min(self._concurrency, len(uploads))) as executor:
+            file_ids = list(executor.map(self._upload, uploads))
+        return self._resolve(objects, uploads, file_ids)
+
+    def build_user_question(self, parts: Sequence[MessagePart], meta_data: Optional[Dict[str, str]] = None) -> Message:
+        return Message.build_user_question_objects(self.build_objects(parts), meta_data)
+
+    def _upload(self, upload: _Upload) -> str:
+        return self._files.upload(file=(upload.file_name, upload.content)).id
+
+
+class AsyncMultimodalMessageBuilder(_BaseMultimodalMessageBuilder):
+    """
+    Builds multimodal messages from text and attachments, uploading the local attachments concurrently and reusing
+    the file ids of contents uploaded before.
+    """
+
+    def __init__(self, files: "AsyncFilesClient", *, cache: Optional[FileIDCache] = None, concurrency: int = 4):
+        """
+        :param files: the files client to upload with.
+        :param cache: the file ids of the uploaded contents, can be shared by builders.
+        :param concurrency: the max number of uploads at the same time.
+        """
+        super().__init__(cache, concurrency)
+        self._files = files
+
+    async def build_objects(self, parts: Sequence[MessagePart]) -> List[MessageObjectString]:
+        """
+        Build the message objects of the parts, uploading the local attachments.
+
+        :param parts: text, attachments and message objects, in the order of the message.
+        """
+        # reading and hashing the local attachments blocks, keep it off the event loop
+        objects, uploads = await asyncio.get_event_loop().run_in_executor(None, self._plan, parts)
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def upload_one(upload: _Upload) -> str:
+            async with semaphore:
+                return (await self._files.upload(file=(upload.file_name, upload.content))).id
+
+        file_ids = await asyncio.gather(*[upload_one(upload) for upload in uploads])
+        return self._resolve(objects, uploads, list(file_ids))
+
+    async def build_user_question(
+        self, parts: Sequence[MessagePart], meta_data: Optional[Dict[str, str]] = None
+    ) -> Message:
+        return Message.build_user_question_objects(await self.build_objects(parts), meta_data)
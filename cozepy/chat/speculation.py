@@ -0,0 +1,271 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from cozepy.chat import Chat, ChatEvent, ChatStatus, Message
+from cozepy.log import log_warning
+from cozepy.model import CozeModel
+
+if TYPE_CHECKING:
+    from . import AsyncChatClient
+
+
+class SpeculationStats(CozeModel):
+    """
+    The outcome of the speculations of a ChatSpeculator.
+    """
+
+    # Speculations started by prefetch.
+    started: int = 0
+    # Streams served by a speculation.
+    hits: int = 0
+    # Streams started after they were sent, for lack of a speculation.
+    misses: int = 0
+    # Speculations cancelled because another message was sent, or they were evicted or expired.
+    cancelled: int = 0
+    # The head start of the served speculations in seconds, the latency saved.
+    saved: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+
+class _Speculation(object):
+    """
+    A chat stream started ahead of its message, buffering its events until the message is sent.
+    """
+
+    def __init__(self, request: Dict[str, Any]):
+        self.request = request
+        self.started_at = time.monotonic()
+        self.events: List[ChatEvent] = []
+        self.chat: Optional[Chat] = None
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.task: Optional["asyncio.Future[None]"] = None
+        self._changed = asyncio.Event()
+
+    async def run(self, events: AsyncIterator[ChatEvent]) -> None:
+        try:
+            async for event in events:
+                if event.chat is not None:
+                    self.chat = event.chat
+                self.events.append(event)
+                self._changed.set()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._changed.set()
+
+    async def replay(self) -> AsyncIterator[ChatEvent]:
+        """
+        Yield the events buffered so far, then the events as they arrive.
+        """
+        i = 0
+        while True:
+            if i < len(self.events):
+                yield self.events[i]
+                i += 1
+            elif self.done:
+                break
+            else:
+                self._changed.clear()
+                await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+
+    @property
+    def running(self) -> bool:
+        return not self.done and not (self.chat is not None and self.chat.status in _FINAL_STATUSES)
+
+
+_FINAL_STATUSES = {ChatStatus.COMPLETED, ChatStatus.FAILED, ChatStatus.CANCELED, ChatStatus.REQUIRES_ACTION}
+
+
+class ChatSpeculator(object):
+    """
+    Starts chat streams for the likely next messages of a user, such as suggested replies, before they are sent.
+
+    When the user sends a predicted message, stream serves the speculation that is already running, with the events it
+    has buffered so far. The other speculations of the key are cancelled, and so are the ones evicted past max_size
+    or older than ttl. Each speculation is a real chat that uses tokens, stats measures what it saves.
+
+    A conversation runs one chat at a time, and the messages of a chat are saved to it unless auto_save_history is
+    False. So speculate on chats that pass their history in additional_messages, with auto_save_history=False, and
+    save the messages of the chat that is served.
+    """
+
+    def __init__(
+        self,
+        chat: "AsyncChatClient",
+        *,
+        max_size: int = 8,
+        ttl: Optional[float] = 30.0,
+        cancel_remote: bool = True,
+    ):
+        """
+        :param chat: the chat client.
+        :param max_size: the max number of speculations kept, the oldest ones are cancelled.
+        :param ttl: seconds a speculation is kept for, None to keep it until it is evicted or sent.
+        :param cancel_remote: cancel the chats of the cancelled speculations on the server, so that they stop
+        using tokens.
+        """
+        if max_size < 1:
+            raise ValueError(f"invalid max_size: {max_size}")
+        self._chat = chat
+        self._max_size = max_size
+        self._ttl = ttl
+        self._cancel_remote = cancel_remote
+        self._speculations: "OrderedDict[Tuple[str, str], _Speculation]" = OrderedDict()
+        self._remote_cancels: Set["asyncio.Future[None]"] = set()
+        self.stats = SpeculationStats()
+
+    def prefetch(
+        self,
+        key: str,
+        text: str,
+        *,
+        bot_id: str,
+        user_id: str,
+        history: Optional[List[Message]] = None,
+        **kwargs,
+    ) -> bool:
+        """
+        Start the chat of a predicted user message in the background. Must be called in the event loop.
+
+        :param key: the conversation of the message, such as the conversation or user id.
+        :param text: the predicted text of the user message.
+        :param bot_id: the bot of the chat.
+        :param user_id: the user of the chat.
+        :param history: the messages before the predicted message.
+        :param kwargs: the other arguments of chat.stream, such as auto_save_history.
+        :return: False if the message is already speculated on.
+        """
+        self._expire()
+        if (key, text) in self._speculations:
+            return False
+        speculation = _Speculation(_request(bot_id, user_id, history, kwargs))
+        events = self._chat.stream(
+            bot_id=bot_id,
+            user_id=user_id,
+            additional_messages=_messages(history, text),
+            **kwargs,
+        )
+        speculation.task = asyncio.ensure_future(speculation.run(events))
+        self._speculations[(key, text)] = speculation
+        self.stats.started += 1
+        while len(self._speculations) > self._max_size:
+            _, evicted = self._speculations.popitem(last=False)
+            self._cancel(evicted)
+        return True
+
+    async def stream(
+        self,
+        key: str,
+        text: str,
+        *,
+        bot_id: str,
+        user_id: str,
+        history: Optional[List[Message]] = None,
+        **kwargs,
+    ) -> AsyncIterator[ChatEvent]:
+        """
+        Send a user message, serving its speculation if there is one, and cancel the other speculations of the key.
+        The arguments are the ones of prefetch, a speculation is served only if they are the same.
+        """
+        self._expire()
+        speculation = self._speculations.pop((key, text), None)
+        self.discard(key)
+        if speculation is not None and speculation.request != _request(bot_id, user_id, history, kwargs):
+            self._cancel(speculation)
+            speculation = None
+
+        if speculation is None:
+            self.stats.misses += 1
+            async for event in self._chat.stream(
+                bot_id=bot_id, user_id=user_id, additional_messages=_messages(history, text), **kwargs
+            ):
+                yield event
+            return
+
+        self.stats.hits += 1
+        self.stats.saved += time.monotonic() - speculation.started_at
+        try:
+            async for event in speculation.replay():
+                yield event
+        finally:
+            # the consumer may stop early, the served chat is then stopped like a cancelled speculation
+            self._stop(speculation)
+
+    def discard(self, key: Optional[str] = None) -> None:
+        """
+        Cancel the speculations of the key, or all speculations.
+        """
+        for speculation_key in [k for k in self._speculations if key is None or k[0] == key]:
+            self._cancel(self._speculations.pop(speculation_key))
+
+    async def aclose(self) -> None:
+        """
+        Cancel all speculations, and wait for their chats to be cancelled on the server.
+        """
+        self.discard()
+        if self._remote_cancels:
+            await asyncio.gather(*self._remote_cancels, return_exceptions=True)
+
+    def __len__(self) -> int:
+        return len(self._speculations)
+
+    def _expire(self) -> None:
+        if self._ttl is None:
+            return
+        now = time.monotonic()
+        for key in [k for k, s in self._speculations.items() if now - s.started_at > self._ttl]:
+            self._cancel(self._speculations.pop(key))
+
+    def _cancel(self, speculation: _Speculation) -> None:
+        self.stats.cancelled += 1
+        self._stop(speculation)
+
+    def _stop(self, speculation: _Speculation) -> None:
+        """
+        Stop the stream of the speculation, and cancel its chat on the server if it is still running.
+        """
+        running = speculation.running
+        if speculation.task is not None:
+            speculation.task.cancel()
+        if self._cancel_remote and running and speculation.chat is not None:
+            task = asyncio.ensure_future(self._cancel_chat(speculation.chat))
+            self._remote_cancels.add(task)
+            task.add_done_callback(self._remote_cancels.discard)
+
+    async def _cancel_chat(self, chat: Chat) -> None:
+        try:
+            await self._chat.cancel(conversation_id=chat.conversation_id, chat_id=chat.id)
+        except Exception as e:
+            log_warning("cancel speculative chat failed, chat_id=%s, error=%s", chat.id, e)
+
+
+def _messages(history: Optional[List[Message]], text: str) -> List[Message]:
+    return (history or []) + [Message.build_user_question_text(text)]
+
+
+def _request(bot_id: str, user_id: str, history: Optional[List[Message]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The arguments a speculation must have been started with to be served.
+    """
+    return {"bot_id": bot_id, "user_id": user_id, "history": _history_digest(history), **kwargs}
+
+
+def _history_digest(history: Optional[List[Message]]) -> str:
+    """
+    A digest of the content of the history, so that a speculation is only served on the same history.
+    """
+    digest = hashlib.sha256()
+    for message in history or []:
+        digest.update(message.model_dump_json().encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
@@ -0,0 +1,196 @@
+import asyncio
+import inspect
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, Union, overload
+
+from pydantic import BaseModel
+
+from cozepy.chat import ChatRequiredAction, ChatToolCall, ToolOutput
+from cozepy.log import log_warning
+
+ToolFunction = Callable[..., Union[Any, Awaitable[Any]]]
+_F = TypeVar("_F", bound=ToolFunction)
+
+
+class _Tool(object):
+    def __init__(self, fn: ToolFunction, timeout: Optional[float]):
+        self.fn = fn
+        self.timeout = timeout
+
+
+class _Started(object):
+    """
+    Set by a tool call submitted to the thread pool once it leaves the queue and starts running.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.at = 0.0
+
+    def set(self) -> None:
+        self.at = time.monotonic()
+        self.event.set()
+
+
+class ChatTools(object):
+    """
+    Local plugin functions of a bot, run when a chat requires action.
+
+    All tool calls of an action run concurrently, so a turn takes as long as its slowest tool. Each function is called
+    with the arguments of the call as keyword arguments, and may be sync or async. A result that is not a string is
+    submitted as JSON. A function that fails, times out or isn't registered produces an output with an error field,
+    so that the bot can go on.
+    """
+
+    def __init__(self, *, timeout: Optional[float] = 60, concurrency: int = 8):
+        """
+        :param timeout: the default timeout of each tool call in seconds, None for no timeout.
+        :param concurrency: the max number of sync functions run at the same time by run. The timeout of a call queued
+        behind the limit counts from when it starts running.
+        """
+        if concurrency < 1:
+            raise ValueError(f"invalid concurrency: {concurrency}")
+        self._tools: Dict[str, _Tool] = {}
+        self._timeout = timeout
+        self._concurrency = concurrency
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @overload
+    def register(self, fn: _F, *, name: Optional[str] = None, timeout: Optional[float] = None) -> _F: ...
+
+    @overload
+    def register(
+        self, fn: None = None, *, name: Optional[str] = None, timeout: Optional[float] = None
+    ) -> Callable[[_F], _F]: ...
+
+    def register(self, fn=None, *, name=None, timeout=None):
+        """
+        Register a function, directly or as a decorator.
+
+        :param fn: the function.
+        :param name: the name of the plugin function, the name of fn by default.
+        :param timeout: the timeout of the calls of this function, the default timeout by default.
+        """
+
+        def decorator(f: _F) -> _F:
+            self._tools[name or f.__name__] = _Tool(f, timeout if timeout is not None else self._timeout)
+            return f
+
+        return decorator(fn) if fn is not None else decorator
+
+    def run(self, required_action: ChatRequiredAction) -> List[ToolOutput]:
+        """
+        Run all tool calls of the action in a thread pool, and return their outputs in the order of the calls.
+        """
+        tool_calls = _tool_calls(required_action)
+        started = [_Started() for _ in tool_calls]
+        futures = [self._get_executor().submit(self._call, *args) for args in zip(tool_calls, started)]
+        return [self._wait(*args) for args in zip(tool_calls, futures, started)]
+
+    async def arun(self, required_action: ChatRequiredAction) -> List[ToolOutput]:
+        """
+        Run all tool calls of the action as concurrent tasks, and return their outputs in the order of the calls.
+        Sync functions run in the default executor of the event loop.
+        """
+        return list(await asyncio.gather(*[self._acall(tool_call) for tool_call in _tool_calls(required_action)]))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="cozepy-tools")
+            return self._executor
+
+    def _call(self, tool_call: ChatToolCall, started: _Started) -> Any:
+        started.set()
+        tool, arguments = self._resolve(tool_call)
+        res = tool.fn(**arguments)
+        if inspect.isawaitable(res):
+            return asyncio.run(_await(res))
+        return res
+
+    def _wait(self, tool_call: ChatToolCall, future: "Future[Any]", started: _Started) -> ToolOutput:
+        tool = self._tools.get(_tool_name(tool_call))
+        timeout = tool.timeout if tool is not None else None
+        try:
+            if timeout is None:
+                return _tool_output(tool_call, future.result())
+            # the earlier calls are done or timed out by now, a call still queued waits for threads that outlived
+            # their timeouts, up to its own timeout
+            if not started.event.wait(timeout):
+                raise FutureTimeoutError()
+            remaining = max(0.0, started.at + timeout - time.monotonic())
+            return _tool_output(tool_call, future.result(timeout=remaining))
+        except FutureTimeoutError:
+            # the thread can't be stopped, its result is dropped
+            future.cancel()
+            return _tool_error(tool_call, f"timed out after {timeout}s")
+        except Exception as e:
+            return _tool_error(tool_call, e)
+
+    async def _acall(self, tool_call: ChatToolCall) -> ToolOutput:
+        try:
+            tool, arguments = self._resolve(tool_call)
+        except Exception as e:
+            return _tool_error(tool_call, e)
+        try:
+            if inspect.iscoroutinefunction(tool.fn):
+                res = await asyncio.wait_for(tool.fn(**arguments), tool.timeout)
+            else:
+                call = asyncio.get_event_loop().run_in_executor(None, partial(tool.fn, **arguments))
+                res = await asyncio.wait_for(call, tool.timeout)
+            return _tool_output(tool_call, res)
+        except asyncio.TimeoutError:
+            return _tool_error(tool_call, f"timed out after {tool.timeout}s")
+        except Exception as e:
+            return _tool_error(tool_call, e)
+
+    def _resolve(self, tool_call: ChatToolCall) -> Tuple[_Tool, Dict[str, Any]]:
+        name = _tool_name(tool_call)
+        tool = self._tools.get(name)
+        if tool is None:
+            raise ValueError(f"unknown tool: {name}")
+        arguments = (
+            json.loads(tool_call.function.arguments) if tool_call.function and tool_call.function.arguments else {}
+        )
+        return tool, arguments
+
+
+def _tool_calls(required_action: ChatRequiredAction) -> List[ChatToolCall]:
+    if required_action.submit_tool_outputs is None:
+        return []
+    return required_action.submit_tool_outputs.tool_calls
+
+
+def _tool_name(tool_call: ChatToolCall) -> str:
+    return tool_call.function.name if tool_call.function else ""
+
+
+async def _await(awaitable: Awaitable[Any]) -> Any:
+    return await awaitable
+
+
+def _tool_output(tool_call: ChatToolCall, res: Any) -> ToolOutput:
+    if isinstance(res, str):
+        output = res
+    elif isinstance(res, BaseModel):
+        output = res.model_dump_json()
+    else:
+        output = json.dumps(res, ensure_ascii=False)
+    return ToolOutput(tool_call_id=tool_call.id, output=output)
+
+
+def _tool_error(tool_call: ChatToolCall, error: Union[str, Exception]) -> ToolOutput:
+    log_warning("tool call failed, name=%s, id=%s, error=%s", _tool_name(tool_call), tool_call.id, error)
+    return ToolOutput(tool_call_id=tool_call.id, output=json.dumps({"error": str(error)}, ensure_ascii=False))
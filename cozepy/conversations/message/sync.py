@@ -0,0 +1,228 @@
+import abc
+import asyncio
+import sqlite3
+import threading
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Set, TypeVar
+
+from cozepy.chat import Message
+
+if TYPE_CHECKING:
+    from . import AsyncMessagesClient, MessagesClient
+
+T = TypeVar("T")
+
+
+class MessageStore(abc.ABC):
+    """
+    Local copy of the messages of conversations, used by MessageSync and AsyncMessageSync.
+    """
+
+    @abc.abstractmethod
+    def latest(self, conversation_id: str) -> Optional[Message]:
+        """
+        The newest stored message of the conversation, or None if nothing is stored yet.
+        """
+
+    def newest(self, conversation_id: str) -> List[Message]:
+        """
+        The stored messages created in the same second as the newest one, in chronological order. created_at has a
+        resolution of one second, so there can be several.
+        """
+        limit = 8
+        while True:
+            messages = self.load(conversation_id, limit)
+            if not messages or messages[-1].created_at is None:
+                return messages[-1:]
+            created_at = messages[-1].created_at
+            i = len(messages)
+            while i > 0 and messages[i - 1].created_at == created_at:
+                i -= 1
+            if i > 0 or len(messages) < limit:
+                return messages[i:]
+            limit *= 2
+
+    @abc.abstractmethod
+    def save(self, conversation_id: str, messages: List[Message]) -> None:
+        """
+        Store messages of the conversation, in chronological order. Stored messages with the same id are replaced and
+        keep their position.
+        """
+
+    @abc.abstractmethod
+    def load(self, conversation_id: str, limit: Optional[int] = None) -> List[Message]:
+        """
+        The stored messages of the conversation in chronological order, or only the newest limit of them.
+        """
+
+
+class SQLiteMessageStore(MessageStore):
+    """
+    Message store backed by a SQLite database, in memory by default.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "conversation_id TEXT NOT NULL, "
+                "seq INTEGER NOT NULL, "
+                "id TEXT NOT NULL, "
+                "data TEXT NOT NULL, "
+                "PRIMARY KEY (conversation_id, id))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS messages_seq ON messages (conversation_id, seq)")
+
+    def latest(self, conversation_id: str) -> Optional[Message]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM messages WHERE conversation_id = ? ORDER BY seq DESC LIMIT 1", (conversation_id,)
+            ).fetchone()
+        return Message.model_validate_json(row[0]) if row else None
+
+    def save(self, conversation_id: str, messages: List[Message]) -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT MAX(seq) FROM messages WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+            seq = row[0] if row and row[0] is not None else 0
+            self._conn.executemany(
+                # a stored message keeps its position, only its data is replaced
+                "INSERT INTO messages (conversation_id, seq, id, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (conversation_id, id) DO UPDATE SET data = excluded.data",
+                [
+                    (conversation_id, seq + i + 1, message.id or "", message.model_dump_json())
+                    for i, message in enumerate(messages)
+                ],
+            )
+
+    def load(self, conversation_id: str, limit: Optional[int] = None) -> List[Message]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM messages WHERE conversation_id = ? ORDER BY seq DESC LIMIT ?",
+                (conversation_id, -1 if limit is None else limit),
+            ).fetchall()
+        return [Message.model_validate_json(row[0]) for row in reversed(rows)]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _MessageDelta(object):
+    """
+    Collects the messages of a listing in newest-first order that aren't stored yet, until the stored messages of the
+    newest second have all been seen, or an older message is reached.
+    """
+
+    def __init__(self, newest: List[Message]):
+        # a message created in the same second as the newest stored one may still be new, so it is told apart by id
+        self._created_at = newest[-1].created_at if newest else None
+        self._ids = {message.id for message in newest if message.id is not None}
+        self._seen: Set[str] = set()
+        self._messages: List[Message] = []
+        self.done = False
+
+    def add(self, messages: List[Message]) -> None:
+        for message in messages:
+            if self._is_older(message):
+                self.done = True
+                return
+            if message.id is not None and message.id in self._ids:
+                # newer messages are listed first, the ones after the stored messages of the newest second are stored
+                self._seen.add(message.id)
+                if self._seen == self._ids:
+                    self.done = True
+                    return
+                continue
+            self._messages.append(message)
+
+    def messages(self) -> List[Message]:
+        return list(reversed(self._messages))
+
+    def _is_older(self, message: Message) -> bool:
+        # the stored messages of the newest second may have been deleted on the server
+        return message.created_at is not None and self._created_at is not None and message.created_at < self._created_at
+
+
+class MessageSync(object):
+    """
+    Incremental sync of conversation messages into a local store.
+
+    Each sync lists the conversation newest first and stops once it reaches the stored messages, so a conversation
+    without new messages costs a single page request. Reads are served from the store.
+    """
+
+    def __init__(self, client: "MessagesClient", store: Optional[MessageStore] = None, *, limit: int = 50):
+        """
+        :param client: the messages client, e.g. coze.conversations.messages.
+        :param store: the local store, an in-memory SQLiteMessageStore by default.
+        :param limit: the page size of the message listing, in [1, 50].
+        """
+        self._client = client
+        self.store = store or SQLiteMessageStore()
+        self._limit = limit
+
+    def sync(self, conversation_id: str) -> List[Message]:
+        """
+        Fetch the messages newer than the stored ones and store them.
+
+        :param conversation_id: The ID of the conversation.
+        :return: the new messages in chronological order.
+        """
+        delta = _MessageDelta(self.store.newest(conversation_id))
+        for page in self._client.list(conversation_id=conversation_id, limit=self._limit).iter_pages():
+            delta.add(page.items)
+            if delta.done:
+                break
+        messages = delta.messages()
+        if messages:
+            self.store.save(conversation_id, messages)
+        return messages
+
+    def messages(self, conversation_id: str, limit: Optional[int] = None, *, sync: bool = True) -> List[Message]:
+        """
+        The messages of the conversation in chronological order, read from the store.
+
+        :param conversation_id: The ID of the conversation.
+        :param limit: only return the newest limit messages.
+        :param sync: fetch the new messages before reading.
+        """
+        if sync:
+            self.sync(conversation_id)
+        return self.store.load(conversation_id, limit)
+
+
+class AsyncMessageSync(object):
+    """
+    Incremental sync of conversation messages into a local store, see MessageSync. The store is blocking, its calls
+    run in the default executor of the event loop.
+    """
+
+    def __init__(self, client: "AsyncMessagesClient", store: Optional[MessageStore] = None, *, limit: int = 50):
+        self._client = client
+        self.store = store or SQLiteMessageStore()
+        self._limit = limit
+
+    async def sync(self, conversation_id: str) -> List[Message]:
+        delta = _MessageDelta(await _run(self.store.newest, conversation_id))
+        paged = await self._client.list(conversation_id=conversation_id, limit=self._limit)
+        async for page in paged.iter_pages():
+            delta.add(page.items)
+            if delta.done:
+                break
+        messages = delta.messages()
+        if messages:
+            await _run(self.store.save, conversation_id, messages)
+        return messages
+
+    async def messages(self, conversation_id: str, limit: Optional[int] = None, *, sync: bool = True) -> List[Message]:
+        if sync:
+            await self.sync(conversation_id)
+        return await _run(self.store.load, conversation_id, limit)
+
+
+async def _run(fn: Callable[..., T], *args: Any) -> T:
+    return await asyncio.get_event_loop().run_in_executor(None, partial(fn, *args))
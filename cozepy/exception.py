@@ -56,3 +56,54 @@ class CozeInvalidEventError(CozeError):
             super().__init__(f"invalid event, field: {field}, data: {data}, logid: {logid}")
         else:
             super().__init__(f"invalid event, data: {data}, logid: {logid}")
+
+
+class CozeStreamTimeoutError(CozeError):
+    """
+    base class for stream deadline errors, the underlying response is closed when it is raised
+    """
+
+    def __init__(self, kind: str, timeout: float, logid: Optional[str] = None):
+        self.timeout = timeout
+        self.logid = logid
+        super().__init__(f"stream {kind} timeout, timeout: {timeout}s, logid: {logid}")
+
+
+class CozeStreamFirstEventTimeoutError(CozeStreamTimeoutError):
+    """
+    no event was received within `StreamTimeout.first_event` seconds after the request was sent
+    """
+
+    def __init__(self, timeout: float, logid: Optional[str] = None):
+        super().__init__("first event", timeout, logid)
+
+
+class CozeStreamIdleTimeoutError(CozeStreamTimeoutError):
+    """
+    the gap between two events exceeded `StreamTimeout.idle` seconds
+    """
+
+    def __init__(self, timeout: float, logid: Optional[str] = None):
+        super().__init__("idle", timeout, logid)
+
+
+class CozeStreamTotalTimeoutError(CozeStreamTimeoutError):
+    """
+    the stream did not finish within `StreamTimeout.total` seconds after the request was sent
+    """
+
+    def __init__(self, timeout: float, logid: Optional[str] = None):
+        super().__init__("total", timeout, logid)
+
+
+class CozeUsageBudgetError(CozeError):
+    """
+    a request was rejected before it was sent, because its bot, workflow, user or tag used up its token budget
+    """
+
+    def __init__(self, dimension: str, key: str, budget: int, used: int):
+        self.dimension = dimension
+        self.key = key
+        self.budget = budget
+        self.used = used
+        super().__init__(f"usage budget exceeded, {dimension}: {key}, budget: {budget}, used: {used}")
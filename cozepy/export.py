@@ -0,0 +1,218 @@
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+from collections import deque
+from typing import IO, Any, Callable, Deque, Dict, Iterable, List, Optional, Union, cast
+
+from pydantic import BaseModel
+
+from cozepy.model import AsyncPagedBase, PagedBase
+
+ExportTarget = Union[str, "os.PathLike[str]", IO[bytes]]
+
+_OPENERS: Dict[str, Callable[..., IO[bytes]]] = {
+    "gzip": cast(Callable[..., IO[bytes]], gzip.open),
+    "bz2": cast(Callable[..., IO[bytes]], bz2.open),
+    "xz": cast(Callable[..., IO[bytes]], lzma.open),
+}
+_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+
+def export_jsonl(
+    paged: PagedBase[Any], target: ExportTarget, *, raw: bool = False, compression: Optional[str] = None
+) -> int:
+    """
+    Write all items of a paged listing to a JSONL file, one page at a time, so memory stays constant.
+
+    :param paged: the listing, e.g. the return value of coze.bots.list.
+    :param target: a file path, or a binary file object.
+    :param raw: write the items as the server returned them in the response body, with the fields the models don't
+    declare, rather than the parsed models.
+    :param compression: gzip, bz2 or xz. By default, it is inferred from the suffix of the file path.
+    :return: the number of items written.
+    """
+    with _JSONLWriter(target, raw, compression) as writer:
+        for page in paged.iter_pages():
+            writer.write_page(page)
+        return writer.count
+
+
+async def aexport_jsonl(
+    paged: AsyncPagedBase[Any], target: ExportTarget, *, raw: bool = False, compression: Optional[str] = None
+) -> int:
+    """
+    Write all items of an async paged listing to a JSONL file, see export_jsonl.
+    """
+    with _JSONLWriter(target, raw, compression) as writer:
+        async for page in paged.iter_pages():
+            writer.write_page(page)
+        return writer.count
+
+
+def export_csv(
+    paged: PagedBase[Any],
+    target: ExportTarget,
+    *,
+    fields: Optional[List[str]] = None,
+    compression: Optional[str] = None,
+) -> int:
+    """
+    Write all items of a paged listing to a CSV file, one page at a time, so memory stays constant.
+
+    :param paged: the listing, e.g. the return value of coze.bots.list.
+    :param target: a file path, or a binary file object.
+    :param fields: the columns to write. By default, the fields of the first item. Nested values are written as JSON.
+    :param compression: gzip, bz2 or xz. By default, it is inferred from the suffix of the file path.
+    :return: the number of items written.
+    """
+    with _CSVWriter(target, fields, compression) as writer:
+        for page in paged.iter_pages():
+            writer.write_items(page.items)
+        return writer.count
+
+
+async def aexport_csv(
+    paged: AsyncPagedBase[Any],
+    target: ExportTarget,
+    *,
+    fields: Optional[List[str]] = None,
+    compression: Optional[str] = None,
+) -> int:
+    """
+    Write all items of an async paged listing to a CSV file, see export_csv.
+    """
+    with _CSVWriter(target, fields, compression) as writer:
+        async for page in paged.iter_pages():
+            writer.write_items(page.items)
+        return writer.count
+
+
+def _open_target(target: ExportTarget, compression: Optional[str]) -> IO[bytes]:
+    if compression is None and isinstance(target, (str, os.PathLike)):
+        compression = _SUFFIXES.get(os.path.splitext(os.fspath(target))[1])
+    if compression is not None and compression not in _OPENERS:
+        raise ValueError(f"invalid compression: {compression}")
+
+    if isinstance(target, (str, os.PathLike)):
+        if compression is None:
+            return open(target, "wb")
+        return _OPENERS[compression](target, "wb")
+    if compression is None:
+        return cast(IO[bytes], _Unclosed(target))
+    # compress into the caller's file object, and leave it open
+    return _OPENERS[compression](_Unclosed(target), "wb")
+
+
+class _Unclosed(io.RawIOBase):
+    """
+    A writable view of a caller's file object, which is flushed but not closed on close.
+    """
+
+    def __init__(self, file: IO[bytes]):
+        self._file = file
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:  # type: ignore
+        self._file.write(b)
+        return len(b)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.flush()
+        super().close()
+
+
+class _JSONLWriter(object):
+    def __init__(self, target: ExportTarget, raw: bool, compression: Optional[str]):
+        self._file = _open_target(target, compression)
+        self._raw = raw
+        self.count = 0
+
+    def write_page(self, page: Any) -> None:
+        items = _raw_items(page) if self._raw else page.items
+        if items:
+            self._file.write(b"".join(_dump_json(item) + b"\n" for item in items))
+        self.count += len(items)
+
+    def __enter__(self) -> "_JSONLWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._file.close()
+
+
+class _CSVWriter(object):
+    def __init__(self, target: ExportTarget, fields: Optional[List[str]], compression: Optional[str]):
+        self._file = _open_target(target, compression)
+        self._text = io.TextIOWrapper(self._file, encoding="utf-8", newline="")
+        self._fields = fields
+        self._writer: Optional[Any] = None
+        self.count = 0
+
+    def write_items(self, items: Iterable[Any]) -> None:
+        rows = [_csv_row(item) for item in items]
+        if not rows:
+            return
+        if self._writer is None:
+            self._fields = self._fields or list(rows[0].keys())
+            self._writer = csv.DictWriter(self._text, fieldnames=self._fields, extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+        self.count += len(rows)
+
+    def __enter__(self) -> "_CSVWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._text.close()
+
+
+def _dump_json(item: Any) -> bytes:
+    if isinstance(item, BaseModel):
+        return item.model_dump_json().encode("utf-8")
+    return json.dumps(item, ensure_ascii=False).encode("utf-8")
+
+
+def _raw_items(page: Any) -> List[Any]:
+    """
+    The items of the page as they are in its response body, found as the first list of objects, breadth-first, that
+    lines up with the parsed items.
+    """
+    items = page._items or []
+    if not page.items:
+        return []
+    values: Deque[Any] = deque([json.loads(page.response._raw_response.content)])
+    while values:
+        value = values.popleft()
+        if isinstance(value, list) and _lines_up(value, items):
+            # skip the items an earlier page already listed
+            return value[page._skip :]
+        if isinstance(value, dict):
+            values.extend(v for v in value.values() if isinstance(v, (dict, list)))
+    raise ValueError("the items of the page are not found in its response body")
+
+
+def _lines_up(values: List[Any], items: List[Any]) -> bool:
+    if len(values) != len(items):
+        return False
+    for value, item in zip(values, items):
+        if not isinstance(value, dict):
+            return False
+        item_id = getattr(item, "id", None)
+        if item_id is not None and str(value.get("id")) != str(item_id):
+            return False
+    return True
+
+
+def _csv_row(item: Any) -> Dict[str, Any]:
+    row = item.model_dump(mode="json") if isinstance(item, BaseModel) else dict(item)
+    for key, value in row.items():
+        if isinstance(value, (dict, list)):
+            row[key] = json.dumps(value, ensure_ascii=False)
+    return row
@@ -1,4 +1,7 @@
-from typing import List, Optional
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from cozepy.model import AsyncNumberPaged, CozeModel, DynamicStrEnum, HTTPRequest, NumberPaged, NumberPagedResponse
 from cozepy.request import Requester
@@ -21,6 +24,16 @@ class SimpleFolder(CozeModel):
     children_count: Optional[int] = None
 
 
+# the names of the folders from the walked root down to a folder, including it
+FolderPath = Tuple[str, ...]
+
+
+class FolderNode(CozeModel):
+    folder: SimpleFolder
+    path: List[str]
+    children: List["FolderNode"] = []
+
+
 class _PrivateListFoldersData(CozeModel, NumberPagedResponse[SimpleFolder]):
     total_count: int
     items: List[SimpleFolder]
@@ -90,6 +103,83 @@ class FoldersClient(object):
             request_maker=request_maker,
         )
 
+    def walk(
+        self,
+        *,
+        workspace_id: str,
+        folder_type: FolderType,
+        parent_folder_id: Optional[str] = None,
+        concurrency: int = 4,
+        max_depth: Optional[int] = None,
+        page_size: int = 50,
+    ) -> Iterator[Tuple[FolderPath, SimpleFolder]]:
+        """
+        Walk the folder tree breadth-first, listing the children of up to concurrency folders at the same time.
+        Folders whose children_count is 0 are not listed.
+
+        :param workspace_id: the workspace of the folders.
+        :param folder_type: the type of the folders.
+        :param parent_folder_id: walk the subtree under this folder, the whole tree by default.
+        :param concurrency: the number of folders whose children are listed at the same time.
+        :param max_depth: the number of levels to walk, all by default.
+        :param page_size: the page size of each listing.
+        :return: the (path, folder) of each folder, parents before their children.
+        """
+        _check_walk_args(concurrency, max_depth)
+
+        def list_children(folder_id: Optional[str]) -> List[SimpleFolder]:
+            folders = self.list(
+                workspace_id=workspace_id,
+                folder_type=folder_type,
+                parent_folder_id=folder_id,
+                page_size=page_size,
+            )
+            return _with_parent(list(folders), folder_id)
+
+        pending: Deque[Tuple[FolderPath, "Future[List[SimpleFolder]]"]] = deque()
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            pending.append(((), executor.submit(list_children, parent_folder_id)))
+            while pending:
+                path, future = pending.popleft()
+                for folder in future.result():
+                    folder_path = path + (folder.name,)
+                    yield folder_path, folder
+                    if _should_expand(folder, folder_path, max_depth):
+                        pending.append((folder_path, executor.submit(list_children, folder.id)))
+        finally:
+            # the caller may stop early, skip the listings not started yet
+            for _, future in pending:
+                future.cancel()
+            # and don't wait for the ones in flight
+            executor.shutdown(wait=False)
+
+    def tree(
+        self,
+        *,
+        workspace_id: str,
+        folder_type: FolderType,
+        parent_folder_id: Optional[str] = None,
+        concurrency: int = 4,
+        max_depth: Optional[int] = None,
+        page_size: int = 50,
+    ) -> List[FolderNode]:
+        """
+        The folder tree as nested nodes, see walk.
+
+        :return: the top-level folders, or the children of parent_folder_id.
+        """
+        return _build_tree(
+            self.walk(
+                workspace_id=workspace_id,
+                folder_type=folder_type,
+                parent_folder_id=parent_folder_id,
+                concurrency=concurrency,
+                max_depth=max_depth,
+                page_size=page_size,
+            )
+        )
+
 
 class AsyncFoldersClient(object):
     def __init__(self, base_url: str, requester: Requester):
@@ -145,3 +235,107 @@ class AsyncFoldersClient(object):
             requestor=self._requester,
             request_maker=request_maker,
         )
+
+    async def walk(
+        self,
+        *,
+        workspace_id: str,
+        folder_type: FolderType,
+        parent_folder_id: Optional[str] = None,
+        concurrency: int = 4,
+        max_depth: Optional[int] = None,
+        page_size: int = 50,
+    ) -> AsyncIterator[Tuple[FolderPath, SimpleFolder]]:
+        """
+        Walk the folder tree breadth-first, see FoldersClient.walk.
+        """
+        _check_walk_args(concurrency, max_depth)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def list_children(folder_id: Optional[str]) -> List[SimpleFolder]:
+            async with semaphore:
+                paged = await self.list(
+                    workspace_id=workspace_id,
+                    folder_type=folder_type,
+                    parent_folder_id=folder_id,
+                    page_size=page_size,
+                )
+                return _with_parent([folder async for folder in paged], folder_id)
+
+        pending: Deque[Tuple[FolderPath, "asyncio.Future[List[SimpleFolder]]"]] = deque()
+        try:
+            pending.append(((), asyncio.ensure_future(list_children(parent_folder_id))))
+            while pending:
+                path, task = pending.popleft()
+                for folder in await task:
+                    folder_path = path + (folder.name,)
+                    yield folder_path, folder
+                    if _should_expand(folder, folder_path, max_depth):
+                        pending.append((folder_path, asyncio.ensure_future(list_children(folder.id))))
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def tree(
+        self,
+        *,
+        workspace_id: str,
+        folder_type: FolderType,
+        parent_folder_id: Optional[str] = None,
+        concurrency: int = 4,
+        max_depth: Optional[int] = None,
+        page_size: int = 50,
+    ) -> List[FolderNode]:
+        """
+        The folder tree as nested nodes, see FoldersClient.tree.
+        """
+        return _build_tree(
+            [
+                item
+                async for item in self.walk(
+                    workspace_id=workspace_id,
+                    folder_type=folder_type,
+                    parent_folder_id=parent_folder_id,
+                    concurrency=concurrency,
+                    max_depth=max_depth,
+                    page_size=page_size,
+                )
+            ]
+        )
+
+
+def _check_walk_args(concurrency: int, max_depth: Optional[int]) -> None:
+    if concurrency < 1:
+        raise ValueError(f"invalid concurrency: {concurrency}")
+    if max_depth is not None and max_depth < 1:
+        raise ValueError(f"invalid max depth: {max_depth}")
+
+
+def _should_expand(folder: SimpleFolder, path: FolderPath, max_depth: Optional[int]) -> bool:
+    if max_depth is not None and len(path) >= max_depth:
+        return False
+    # children_count is not returned by every listing, only skip folders known to be leaves
+    return folder.children_count != 0
+
+
+def _with_parent(folders: List[SimpleFolder], parent_folder_id: Optional[str]) -> List[SimpleFolder]:
+    return [
+        folder
+        if folder.parent_folder_id is not None
+        else folder.model_copy(update={"parent_folder_id": parent_folder_id})
+        for folder in folders
+    ]
+
+
+def _build_tree(items: Iterable[Tuple[FolderPath, SimpleFolder]]) -> List[FolderNode]:
+    roots: List[FolderNode] = []
+    nodes: Dict[str, FolderNode] = {}
+    for path, folder in items:
+        node = FolderNode(folder=folder, path=list(path))
+        nodes[folder.id] = node
+        parent = nodes.get(folder.parent_folder_id or "") if len(path) > 1 else None
+        if parent is not None:
+            parent.children.append(node)
+        else:
+            roots.append(node)
+    return roots
@@ -1,4 +1,6 @@
 import logging
+import random
+from typing import Any, Optional
 
 logger = logging.getLogger("cozepy")
 
@@ -9,8 +11,22 @@ handler.setFormatter(formatter)
 logger.propagate = False
 logger.addHandler(handler)
 
+# Max length of a payload in debug logs, longer payloads are elided. None means no limit.
+_payload_limit: Optional[int] = None
+# Fraction of the per-event debug records of streams and websockets that are logged.
+_event_sample_rate: float = 1.0
+
+
+def setup_logging(
+    level: int = logging.WARNING, payload_limit: Optional[int] = None, event_sample_rate: float = 1.0
+) -> None:
+    """
+    :param level: the log level of cozepy.
+    :param payload_limit: max length of a payload in debug logs, longer payloads are elided.
+    :param event_sample_rate: fraction of the per-event debug records of streams and websockets to log, in (0, 1].
+    """
+    global _payload_limit, _event_sample_rate
 
-def setup_logging(level: int = logging.WARNING) -> None:
     if level not in [
         logging.FATAL,
         logging.ERROR,
@@ -20,8 +36,14 @@ def setup_logging(level: int = logging.WARNING) -> None:
         logging.NOTSET,
     ]:
         raise ValueError(f"invalid log level: {level}")
+    if payload_limit is not None and payload_limit <= 0:
+        raise ValueError(f"invalid payload limit: {payload_limit}")
+    if not 0 < event_sample_rate <= 1:
+        raise ValueError(f"invalid event sample rate: {event_sample_rate}")
 
     logger.setLevel(level)
+    _payload_limit = payload_limit
+    _event_sample_rate = event_sample_rate
 
 
 log_fatal = logger.fatal
@@ -30,4 +52,49 @@ log_warning = logger.warning
 log_info = logger.info
 log_debug = logger.debug
 
+
+def debug_enabled() -> bool:
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+def log_payload(payload: Any) -> str:
+    """
+    The payload as it is written to debug logs, elided to the configured payload limit.
+    """
+    text = payload if isinstance(payload, str) else str(payload)
+    if _payload_limit is None or len(text) <= _payload_limit:
+        return text
+    return f"{text[:_payload_limit]}...<length: {len(text)}>"
+
+
+class EventLogger(object):
+    """
+    Debug logger of the events of one stream or websocket connection.
+
+    The level is checked once on creation, so callers guard each record with the enabled attribute and pay nothing
+    else when debug logging is off. Records are sampled by the configured event sample rate, and carry the logid,
+    sequence and size of the event as structured fields in the record's extra.
+    """
+
+    __slots__ = ("enabled", "_message", "_logid", "_seq", "_sample_rate")
+
+    def __init__(self, message: str, logid: Optional[str] = None):
+        self.enabled = debug_enabled()
+        self._message = f"{message}, logid={logid}" if logid else message
+        self._logid = logid
+        self._seq = 0
+        self._sample_rate = _event_sample_rate
+
+    def event(self, event: Any, event_type: Optional[str] = None) -> None:
+        self._seq += 1
+        if self._sample_rate < 1 and random.random() >= self._sample_rate:
+            return
+        text = event if isinstance(event, str) else str(event)
+        extra = {"logid": self._logid, "event_seq": self._seq, "event_type": event_type, "event_size": len(text)}
+        if event_type is None:
+            log_debug("%s, event=%s", self._message, log_payload(text), extra=extra)
+        else:
+            log_debug("%s, type=%s, event=%s", self._message, event_type, log_payload(text), extra=extra)
+
+
 setup_logging(logging.WARNING)
@@ -0,0 +1,39 @@
+from typing import TYPE_CHECKING, Callable, Optional
+
+from cozepy.log import log_warning
+
+if TYPE_CHECKING:
+    from cozepy.model import StreamStats
+
+StreamMetricsHook = Callable[["StreamStats"], None]
+
+_stream_stats_enabled = False
+_stream_metrics_hook: Optional[StreamMetricsHook] = None
+
+
+def setup_stream_metrics(enabled: bool = True, hook: Optional[StreamMetricsHook] = None) -> None:
+    """
+    Record the timing stats of streaming responses, such as the time to the first event and the gaps between events.
+    The stats are available on Stream.stats and AsyncStream.stats while streaming.
+
+    :param enabled: whether to record the stats of streams created from now on.
+    :param hook: called once with the final stats when a recorded stream ends or is closed.
+    """
+    global _stream_stats_enabled, _stream_metrics_hook
+
+    _stream_stats_enabled = enabled
+    _stream_metrics_hook = hook if enabled else None
+
+
+def stream_stats_enabled() -> bool:
+    return _stream_stats_enabled
+
+
+def emit_stream_stats(stats: "StreamStats") -> None:
+    hook = _stream_metrics_hook
+    if hook is None:
+        return
+    try:
+        hook(stats)
+    except Exception as e:
+        log_warning("stream metrics hook failed, logid=%s, error=%s", stats.logid, e)
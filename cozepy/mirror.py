@@ -0,0 +1,422 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from cozepy.bots import PublishStatus, SimpleBot
+from cozepy.datasets import Dataset
+from cozepy.folders import FolderType, SimpleFolder
+from cozepy.log import log_warning
+from cozepy.model import CozeModel, DynamicStrEnum
+from cozepy.workflows import WorkflowBasic
+
+if TYPE_CHECKING:
+    from cozepy.coze import AsyncCoze, Coze
+
+
+class MirrorResourceType(DynamicStrEnum):
+    BOT = "bot"
+    WORKFLOW = "workflow"
+    DATASET = "dataset"
+    FOLDER = "folder"
+
+
+class MirrorResource(CozeModel):
+    """
+    A workspace resource in the mirror, with the common fields of the different listings.
+    """
+
+    type: MirrorResourceType
+    id: str
+    name: str
+    workspace_id: str
+    # the parent folder for folders
+    folder_id: Optional[str] = None
+    # only known for bots
+    is_published: Optional[bool] = None
+    updated_at: Optional[int] = None
+    # the item as returned by the listing
+    data: Dict[str, Any] = {}
+
+
+class MirrorChanges(CozeModel):
+    """
+    The ids of the resources changed by a refresh of the mirror.
+    """
+
+    added: List[str] = []
+    updated: List[str] = []
+    removed: List[str] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+# a partition is the result of one listing: all resources of one type in one workspace
+_Partition = Tuple[str, MirrorResourceType]
+
+
+class WorkspaceIndex(object):
+    """
+    In-memory indexes of mirrored resources by id, name, folder, type and workspace.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id: Dict[str, MirrorResource] = {}
+        self._partitions: Dict[_Partition, Dict[str, None]] = {}
+        self._by_name: Dict[str, Dict[str, None]] = {}
+        self._by_folder: Dict[str, Dict[str, None]] = {}
+        self._by_type: Dict[MirrorResourceType, Dict[str, None]] = {}
+        self._by_workspace: Dict[str, Dict[str, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, id: str) -> Optional[MirrorResource]:
+        return self._by_id.get(id)
+
+    def find(
+        self,
+        *,
+        name: Optional[str] = None,
+        folder_id: Optional[str] = None,
+        type: Optional[MirrorResourceType] = None,
+        workspace_id: Optional[str] = None,
+        is_published: Optional[bool] = None,
+    ) -> List[MirrorResource]:
+        """
+        The resources matching all the given filters.
+        """
+        with self._lock:
+            candidates: List[Dict[str, None]] = []
+            if name is not None:
+                candidates.append(self._by_name.get(name, {}))
+            if folder_id is not None:
+                candidates.append(self._by_folder.get(folder_id, {}))
+            if type is not None:
+                candidates.append(self._by_type.get(type, {}))
+            if workspace_id is not None:
+                candidates.append(self._by_workspace.get(workspace_id, {}))
+            # scan the smallest index that applies
+            candidates.sort(key=len)
+            ids: Iterable[str] = candidates[0] if candidates else self._by_id
+            resources = [self._by_id[id] for id in ids]
+        return [
+            r
+            for r in resources
+            if (name is None or r.name == name)
+            and (folder_id is None or r.folder_id == folder_id)
+            and (type is None or r.type == type)
+            and (workspace_id is None or r.workspace_id == workspace_id)
+            and (is_published is None or r.is_published == is_published)
+        ]
+
+    def update(self, workspace_id: str, type: MirrorResourceType, resources: List[MirrorResource]) -> MirrorChanges:
+        """
+        Replace the resources of one type in one workspace, only touching the resources that changed.
+        """
+        changes = MirrorChanges()
+        with self._lock:
+            old = self._partitions.get((workspace_id, type), {})
+            new: Dict[str, None] = {}
+            for resource in resources:
+                new[resource.id] = None
+                current = self._by_id.get(resource.id)
+                if current is None:
+                    changes.added.append(resource.id)
+                elif current != resource:
+                    self._remove(current)
+                    if (current.workspace_id, current.type) != (workspace_id, type):
+                        # moved here from another partition, which no longer owns it
+                        self._partitions.get((current.workspace_id, current.type), {}).pop(resource.id, None)
+                    changes.updated.append(resource.id)
+                else:
+                    continue
+                self._add(resource)
+            for id in old:
+                if id in new:
+                    continue
+                current = self._by_id.get(id)
+                # only remove the resources this partition still owns
+                if current is not None and (current.workspace_id, current.type) == (workspace_id, type):
+                    self._remove(current)
+                    changes.removed.append(id)
+            self._partitions[(workspace_id, type)] = new
+        return changes
+
+    def resources(self) -> List[MirrorResource]:
+        with self._lock:
+            return list(self._by_id.values())
+
+    def save(self, path: str) -> None:
+        """
+        Write the resources to a JSON file, which is replaced atomically.
+        """
+        data = json.dumps([r.model_dump(mode="json") for r in self.resources()], ensure_ascii=False)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> None:
+        """
+        Read the resources written by save.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            resources = [MirrorResource.model_validate(r) for r in json.load(f)]
+        partitions: Dict[_Partition, List[MirrorResource]] = {}
+        for resource in resources:
+            partitions.setdefault((resource.workspace_id, resource.type), []).append(resource)
+        for (workspace_id, type), items in partitions.items():
+            self.update(workspace_id, type, items)
+
+    def _add(self, resource: MirrorResource) -> None:
+        self._by_id[resource.id] = resource
+        self._by_name.setdefault(resource.name, {})[resource.id] = None
+        self._by_type.setdefault(resource.type, {})[resource.id] = None
+        self._by_workspace.setdefault(resource.workspace_id, {})[resource.id] = None
+        if resource.folder_id:
+            self._by_folder.setdefault(resource.folder_id, {})[resource.id] = None
+
+    def _remove(self, resource: MirrorResource) -> None:
+        self._by_id.pop(resource.id, None)
+        self._by_name.get(resource.name, {}).pop(resource.id, None)
+        self._by_type.get(resource.type, {}).pop(resource.id, None)
+        self._by_workspace.get(resource.workspace_id, {}).pop(resource.id, None)
+        if resource.folder_id:
+            self._by_folder.get(resource.folder_id, {}).pop(resource.id, None)
+
+
+class _BaseWorkspaceMirror(object):
+    def __init__(
+        self,
+        workspace_ids: List[str],
+        types: Optional[List[MirrorResourceType]],
+        concurrency: int,
+        path: Optional[str],
+    ):
+        if concurrency < 1:
+            raise ValueError(f"invalid concurrency: {concurrency}")
+        self._workspace_ids = workspace_ids
+        self._types = types or list(MirrorResourceType)
+        self._concurrency = concurrency
+        self._path = path
+        self.index = WorkspaceIndex()
+        if path and os.path.exists(path):
+            self.index.load(path)
+
+    def _partitions(self) -> List[_Partition]:
+        return [(workspace_id, type) for workspace_id in self._workspace_ids for type in self._types]
+
+    def _apply(self, results: List[Tuple[_Partition, List[MirrorResource]]]) -> MirrorChanges:
+        changes = MirrorChanges()
+        for (workspace_id, type), resources in results:
+            partition_changes = self.index.update(workspace_id, type, resources)
+            changes.added.extend(partition_changes.added)
+            changes.updated.extend(partition_changes.updated)
+            changes.removed.extend(partition_changes.removed)
+        if changes and self._path:
+            self.index.save(self._path)
+        return changes
+
+
+class WorkspaceMirror(_BaseWorkspaceMirror):
+    """
+    A local mirror of the bots, workflows, datasets and folders of workspaces, with in-memory indexes for lookups.
+
+    The listings are crawled concurrently. The APIs have no filter for recently changed resources, so each refresh
+    lists everything and only the resources that differ from the mirror are updated in the index. With a path, the
+    mirror is loaded from it on creation and saved to it after each refresh that changed something.
+    """
+
+    def __init__(
+        self,
+        coze: "Coze",
+        workspace_ids: List[str],
+        *,
+        types: Optional[List[MirrorResourceType]] = None,
+        concurrency: int = 4,
+        path: Optional[str] = None,
+    ):
+        """
+        :param coze: the client.
+        :param workspace_ids: the workspaces to mirror.
+        :param types: the resource types to mirror, all by default.
+        :param concurrency: the number of listings crawled at the same time.
+        :param path: a JSON file to persist the mirror to, for warm starts.
+        """
+        super().__init__(workspace_ids, types, concurrency, path)
+        self._coze = coze
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> MirrorChanges:
+        """
+        Crawl all the listings and update the index.
+        """
+        partitions = self._partitions()
+        with ThreadPoolExecutor(max_workers=self._concurrency) as executor:
+            results = list(executor.map(self._list, partitions))
+        return self._apply(list(zip(partitions, results)))
+
+    def start(self, interval: float) -> None:
+        """
+        Refresh the mirror every interval seconds in a background thread, until stop is called.
+        """
+        if self._thread is not None:
+            raise ValueError("mirror is already started")
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="cozepy-workspace-mirror", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                log_warning("refresh workspace mirror failed, error=%s", e)
+            if self._stopped.wait(interval):
+                return
+
+    def _list(self, partition: _Partition) -> List[MirrorResource]:
+        workspace_id, type = partition
+        if type == MirrorResourceType.BOT:
+            bots = self._coze.bots.list(space_id=workspace_id, publish_status=PublishStatus.ALL, use_api_version=2)
+            return [_bot_resource(workspace_id, bot) for bot in bots]
+        if type == MirrorResourceType.WORKFLOW:
+            workflows = self._coze.workflows.list(workspace_id=workspace_id)
+            return [_workflow_resource(workspace_id, workflow) for workflow in workflows]
+        if type == MirrorResourceType.DATASET:
+            datasets = self._coze.datasets.list(space_id=workspace_id, page_size=100)
+            return [_dataset_resource(workspace_id, dataset) for dataset in datasets]
+        return [
+            _folder_resource(folder)
+            for folder_type in FolderType
+            for _, folder in self._coze.folders.walk(workspace_id=workspace_id, folder_type=folder_type)
+        ]
+
+
+class AsyncWorkspaceMirror(_BaseWorkspaceMirror):
+    """
+    A local mirror of the resources of workspaces, see WorkspaceMirror.
+    """
+
+    def __init__(
+        self,
+        coze: "AsyncCoze",
+        workspace_ids: List[str],
+        *,
+        types: Optional[List[MirrorResourceType]] = None,
+        concurrency: int = 4,
+        path: Optional[str] = None,
+    ):
+        super().__init__(workspace_ids, types, concurrency, path)
+        self._coze = coze
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def refresh(self) -> MirrorChanges:
+        partitions = self._partitions()
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def list_partition(partition: _Partition) -> List[MirrorResource]:
+            async with semaphore:
+                return await self._list(partition)
+
+        results = await asyncio.gather(*[list_partition(partition) for partition in partitions])
+        return self._apply(list(zip(partitions, results)))
+
+    def start(self, interval: float) -> None:
+        if self._task is not None:
+            raise ValueError("mirror is already started")
+        self._task = asyncio.ensure_future(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                log_warning("refresh workspace mirror failed, error=%s", e)
+            await asyncio.sleep(interval)
+
+    async def _list(self, partition: _Partition) -> List[MirrorResource]:
+        workspace_id, type = partition
+        if type == MirrorResourceType.BOT:
+            bots = await self._coze.bots.list(
+                space_id=workspace_id, publish_status=PublishStatus.ALL, use_api_version=2
+            )
+            return [_bot_resource(workspace_id, bot) async for bot in bots]
+        if type == MirrorResourceType.WORKFLOW:
+            workflows = await self._coze.workflows.list(workspace_id=workspace_id)
+            return [_workflow_resource(workspace_id, workflow) async for workflow in workflows]
+        if type == MirrorResourceType.DATASET:
+            datasets = await self._coze.datasets.list(space_id=workspace_id, page_size=100)
+            return [_dataset_resource(workspace_id, dataset) async for dataset in datasets]
+        resources = []
+        for folder_type in FolderType:
+            folders = self._coze.folders.walk(workspace_id=workspace_id, folder_type=folder_type)
+            resources.extend([_folder_resource(folder) async for _, folder in folders])
+        return resources
+
+
+def _bot_resource(workspace_id: str, bot: SimpleBot) -> MirrorResource:
+    return MirrorResource(
+        type=MirrorResourceType.BOT,
+        id=bot.id,
+        name=bot.name,
+        workspace_id=workspace_id,
+        folder_id=bot.folder_id,
+        is_published=bot.is_published,
+        updated_at=bot.updated_at,
+        data=bot.model_dump(mode="json"),
+    )
+
+
+def _workflow_resource(workspace_id: str, workflow: WorkflowBasic) -> MirrorResource:
+    return MirrorResource(
+        type=MirrorResourceType.WORKFLOW,
+        id=workflow.workflow_id,
+        name=workflow.workflow_name,
+        workspace_id=workspace_id,
+        updated_at=workflow.updated_at,
+        data=workflow.model_dump(mode="json"),
+    )
+
+
+def _dataset_resource(workspace_id: str, dataset: Dataset) -> MirrorResource:
+    return MirrorResource(
+        type=MirrorResourceType.DATASET,
+        id=dataset.dataset_id,
+        name=dataset.name,
+        workspace_id=workspace_id,
+        updated_at=dataset.update_time,
+        data=dataset.model_dump(mode="json"),
+    )
+
+
+def _folder_resource(folder: SimpleFolder) -> MirrorResource:
+    return MirrorResource(
+        type=MirrorResourceType.FOLDER,
+        id=folder.id,
+        name=folder.name,
+        workspace_id=folder.workspace_id,
+        folder_id=folder.parent_folder_id,
+        data=folder.model_dump(mode="json"),
+    )
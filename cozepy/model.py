@@ -1,12 +1,29 @@
 import abc
+import asyncio
+import bisect
+import heapq
+import inspect
+import itertools
+import queue
+import random
+import socket
+import threading
+import time
 import warnings
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
+from functools import partial
 from typing import (
     TYPE_CHECKING,
     Any,
+    AsyncGenerator,
     AsyncIterator,
+    Awaitable,
     Callable,
     Coroutine,
+    Deque,
     Dict,
     Generic,
     Iterable,
@@ -24,13 +41,22 @@ import httpx
 from pydantic import BaseModel, ConfigDict
 from typing_extensions import SupportsIndex
 
-from cozepy.exception import CozeInvalidEventError
-from cozepy.log import log_debug
+from cozepy.exception import (
+    CozeInvalidEventError,
+    CozeStreamFirstEventTimeoutError,
+    CozeStreamIdleTimeoutError,
+    CozeStreamTimeoutError,
+    CozeStreamTotalTimeoutError,
+)
+from cozepy.log import EventLogger, log_warning
+from cozepy.metrics import emit_stream_stats, stream_stats_enabled
+from cozepy.pagination import _PageSizeTuner, emit_page_stats, page_retry_policy, page_stats_enabled
 
 if TYPE_CHECKING:
     from cozepy.request import Requester
 
 T = TypeVar("T")
+R = TypeVar("R")
 SyncPage = TypeVar("SyncPage", bound="PagedBase")
 AsyncPage = TypeVar("AsyncPage", bound="AsyncPagedBase")
 
@@ -59,15 +85,45 @@ class CozeModel(BaseModel):
 
 
 class IteratorHTTPResponse(HTTPResponse, Generic[T]):
-    def __init__(self, raw_response: httpx.Response, data: Iterator[T]):
+    def __init__(self, raw_response: httpx.Response, data: Iterator[T], sent_at: Optional[float] = None):
         super().__init__(raw_response)
         self.data = data
+        # monotonic time when the request was sent, and when the response headers were received
+        self.sent_at = sent_at
+        self.headers_at = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Close the streamed response and return its connection to the pool.
+        """
+        self._raw_response.close()
+
+    def __enter__(self) -> "IteratorHTTPResponse[T]":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
 
 
 class AsyncIteratorHTTPResponse(HTTPResponse, Generic[T]):
-    def __init__(self, raw_response: httpx.Response, data: AsyncIterator[T]):
+    def __init__(self, raw_response: httpx.Response, data: AsyncIterator[T], sent_at: Optional[float] = None):
         super().__init__(raw_response)
         self.data = data
+        # monotonic time when the request was sent, and when the response headers were received
+        self.sent_at = sent_at
+        self.headers_at = time.monotonic()
+
+    async def aclose(self) -> None:
+        """
+        Close the streamed response and return its connection to the pool.
+        """
+        await self._raw_response.aclose()
+
+    async def __aenter__(self) -> "AsyncIteratorHTTPResponse[T]":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
 
 
 class FileHTTPResponse(object):
@@ -134,17 +190,154 @@ class ListResponse(Generic[T]):
         return reversed(self.data)
 
 
+class StreamTimeout(CozeModel):
+    """
+    Per-call deadlines of a streaming response, in seconds. A deadline of None is disabled.
+    """
+
+    # Max time from sending the request to receiving the first event.
+    first_event: Optional[float] = None
+    # Max gap between two consecutive events. Before the first event it is measured from sending the request,
+    # unless first_event is set.
+    idle: Optional[float] = None
+    # Max time from sending the request to the end of the stream.
+    total: Optional[float] = None
+
+    def _expiry(
+        self, started_at: float, last_event_at: Optional[float] = None
+    ) -> Optional[Tuple[float, Callable[[Optional[str]], CozeStreamTimeoutError]]]:
+        """
+        The earliest pending deadline, and the factory of the error to raise when it expires.
+        """
+        expiries: List[Tuple[float, Callable[[Optional[str]], CozeStreamTimeoutError]]] = []
+        if self.total is not None:
+            expiries.append((started_at + self.total, partial(CozeStreamTotalTimeoutError, self.total)))
+        if last_event_at is None and self.first_event is not None:
+            expiries.append(
+                (started_at + self.first_event, partial(CozeStreamFirstEventTimeoutError, self.first_event))
+            )
+        elif self.idle is not None:
+            expiries.append(((last_event_at or started_at) + self.idle, partial(CozeStreamIdleTimeoutError, self.idle)))
+        if not expiries:
+            return None
+        return min(expiries, key=lambda x: x[0])
+
+
+class PollStrategy(CozeModel):
+    """
+    The waits between the status checks of a polled call, in seconds: a few fast polls, then waits growing
+    exponentially up to a cap. Override intervals for another schedule.
+    """
+
+    # The wait before each of the first fast_polls checks.
+    initial_interval: float = 0.1
+    fast_polls: int = 3
+    # The growth factor of the wait after the fast polls.
+    multiplier: float = 2.0
+    max_interval: float = 2.0
+    # Each wait is randomized by up to this ratio either way, so that concurrent pollers spread out.
+    jitter: float = 0.1
+
+    def intervals(self) -> Iterator[float]:
+        interval = min(self.initial_interval, self.max_interval)
+        for i in itertools.count():
+            if i >= self.fast_polls:
+                interval = min(interval * self.multiplier, self.max_interval)
+            yield max(0.0, interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+
+# Upper bounds in seconds of the buckets of StreamStats.event_gap_histogram, the last bucket is unbounded.
+STREAM_EVENT_GAP_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+
+class StreamStats(CozeModel):
+    """
+    Timing stats of a streaming response, in seconds from sending the request.
+    """
+
+    logid: Optional[str] = None
+    # Time to receive the response headers.
+    headers: Optional[float] = None
+    # Time to receive the first event.
+    first_event: Optional[float] = None
+    # Time to receive the first event carrying message content, e.g. the first delta of the answer.
+    first_content: Optional[float] = None
+    # Time to the end of the stream, None while still streaming.
+    total: Optional[float] = None
+    event_count: int = 0
+    # Count of the gaps between consecutive events, per bucket of STREAM_EVENT_GAP_BUCKETS.
+    event_gap_histogram: List[int] = []
+    max_event_gap: float = 0.0
+
+    @property
+    def events_per_second(self) -> Optional[float]:
+        if self.first_event is None or self.total is None or self.total <= self.first_event:
+            return None
+        return (self.event_count - 1) / (self.total - self.first_event)
+
+
+class _StreamStatsRecorder(object):
+    def __init__(self, sent_at: float, headers_at: Optional[float]):
+        self.sent_at = sent_at
+        self.headers_at = headers_at
+        self.first_event_at: Optional[float] = None
+        self.first_content_at: Optional[float] = None
+        self.last_event_at: Optional[float] = None
+        self.ended_at: Optional[float] = None
+        self.event_count = 0
+        self.gap_histogram = [0] * (len(STREAM_EVENT_GAP_BUCKETS) + 1)
+        self.max_gap = 0.0
+
+    def on_event(self, item: Any) -> None:
+        now = time.monotonic()
+        if self.last_event_at is None:
+            self.first_event_at = now
+        else:
+            gap = now - self.last_event_at
+            self.gap_histogram[bisect.bisect_left(STREAM_EVENT_GAP_BUCKETS, gap)] += 1
+            if gap > self.max_gap:
+                self.max_gap = gap
+        self.last_event_at = now
+        self.event_count += 1
+        if self.first_content_at is None and getattr(getattr(item, "message", None), "content", None):
+            self.first_content_at = now
+
+    def on_end(self, logid: Optional[str]) -> None:
+        if self.ended_at is not None:
+            return
+        self.ended_at = time.monotonic()
+        emit_stream_stats(self.build(logid))
+
+    def build(self, logid: Optional[str]) -> StreamStats:
+        return StreamStats(
+            logid=logid,
+            headers=self._since_sent(self.headers_at),
+            first_event=self._since_sent(self.first_event_at),
+            first_content=self._since_sent(self.first_content_at),
+            total=self._since_sent(self.ended_at),
+            event_count=self.event_count,
+            event_gap_histogram=list(self.gap_histogram),
+            max_event_gap=self.max_gap,
+        )
+
+    def _since_sent(self, at: Optional[float]) -> Optional[float]:
+        return at - self.sent_at if at is not None else None
+
+
 class HTTPRequest(CozeModel, Generic[T]):
     method: str
     url: str
     params: Optional[dict] = None
     headers: Optional[dict] = None
     json_body: Optional[dict] = None
+    # a serialized JSON body, sent in place of json_body
+    content: Optional[bytes] = None
     files: Optional[dict] = None
     is_async: Optional[bool] = None
     stream: bool = False
     data_field: str = "data"
     cast: Optional[Any] = None
+    stream_timeout: Optional[StreamTimeout] = None
 
     @property
     def as_httpx(self) -> httpx.Request:
@@ -162,6 +355,14 @@ class HTTPRequest(CozeModel, Generic[T]):
                 data={},
                 files=files,
             )
+        if self.content is not None:
+            return httpx.Request(
+                method=self.method,
+                url=self.url,
+                params=self.params,
+                headers={**(self.headers or {}), "Content-Type": "application/json"},
+                content=self.content,
+            )
         return httpx.Request(
             method=self.method,
             url=self.url,
@@ -172,6 +373,35 @@ class HTTPRequest(CozeModel, Generic[T]):
         )
 
 
+class PageCheckpointType(str, Enum):
+    NUMBER = "number"
+    TOKEN = "token"
+    LAST_ID = "last_id"
+
+
+class PageCheckpoint(CozeModel):
+    """
+    Serializable position of a paged listing, pointing at the page after the one it was taken from.
+    """
+
+    type: PageCheckpointType
+    # The cursor of the next page, depending on the type.
+    page_num: Optional[int] = None
+    page_token: Optional[str] = None
+    after_id: Optional[str] = None
+    page_size: Optional[int] = None
+    # False when the listing was complete at the time of the checkpoint.
+    has_more: bool = True
+    # The query params and json body of the last page request, i.e. the filters of the listing.
+    params: Optional[Dict[str, Any]] = None
+    body: Optional[Dict[str, Any]] = None
+
+
+def _check_checkpoint(checkpoint: PageCheckpoint, expected: PageCheckpointType) -> None:
+    if checkpoint.type != expected:
+        raise ValueError(f"invalid checkpoint type: {checkpoint.type.value}, expected: {expected.value}")
+
+
 class PagedBase(Generic[T], abc.ABC):
     @abc.abstractmethod
     def iter_pages(self: SyncPage) -> Iterator[SyncPage]:
@@ -233,358 +463,817 @@ class NumberPagedResponse(Generic[T], abc.ABC):
         raise NotImplementedError
 
 
-class NumberPaged(PagedBase[T]):
-    def __init__(
-        self,
-        page_num: int,
-        page_size: int,
-        requestor: "Requester",
-        request_maker: Callable[[int, int], HTTPRequest],
-    ):
-        self.page_num = page_num
-        self.page_size = page_size
+def _last_page_num(total: int, page_size: int) -> int:
+    return (total + page_size - 1) // page_size
 
-        self._total = None
-        self._has_more = None
-        self._items = None
-        self._http_response: Optional[HTTPResponse] = None
 
-        self._requestor = requestor
-        self._request_maker = request_maker
+class PageStats(CozeModel):
+    """
+    Stats of fetching one page of a paged listing.
+    """
 
-        self._fetch_page()
+    type: PageCheckpointType
+    logid: Optional[str] = None
+    item_count: int = 0
+    # Time to fetch the page in seconds, including the retries.
+    duration: float = 0.0
+    # The number of requests sent, more than 1 when the page was retried.
+    attempts: int = 1
 
-    def __iter__(self) -> Iterator[T]:  # type: ignore
-        for page in self.iter_pages():
-            for item in page.items:
-                yield item
 
-    def iter_pages(self) -> Iterator["NumberPaged[T]"]:
-        yield self
+class _PageCursor(abc.ABC):
+    """
+    The cursor strategy of a paged listing: how a page is requested, what its response says about the next page,
+    and how the position is checkpointed. Strategies hold no state and do no I/O, so the sync and async engines
+    share them.
+    """
 
-        page_num = self.page_num
-        current_page = self
-        while NumberPaged._is_page_has_more(current_page):
-            page_num += 1
-            current_page = NumberPaged(
-                page_num=page_num,
-                page_size=self.page_size,
-                requestor=self._requestor,
-                request_maker=self._request_maker,
-            )
-            yield current_page
+    type: PageCheckpointType
+    # whether the page size can change between the pages of a listing
+    resizable = False
 
-    @property
-    def response(self) -> HTTPResponse:
-        return self._http_response  # type: ignore
+    @abc.abstractmethod
+    def request_args(self, page: Any) -> Tuple[Any, Any]:
+        """
+        The arguments of the request_maker of the page.
+        """
 
-    @property
-    def items(self) -> List[T]:
-        return self._items or cast(List[T], [])
+    @abc.abstractmethod
+    def read(self, page: Any, res: Any) -> None:
+        """
+        Copy the cursor fields of the response to the page.
+        """
 
-    @property
-    def has_more(self) -> bool:
-        return NumberPaged._is_page_has_more(self)
+    @abc.abstractmethod
+    def has_more(self, page: Any) -> bool: ...
 
-    @property
-    def total(self) -> int:
-        return self._total or 0
+    @abc.abstractmethod
+    def next_args(self, page: Any) -> Dict[str, Any]:
+        """
+        The cursor arguments of the page after the page.
+        """
 
-    def _fetch_page(self):
-        if self._total is not None or self._has_more is not None:
-            return
-        request: HTTPRequest = self._request_maker(self.page_num, self.page_size)
-        res: NumberPagedResponse[T] = self._requestor.send(request)
-        self._total = res.get_total()
-        self._has_more = res.get_has_more()
-        self._items = res.get_items()
-        self._http_response = res.response
+    @abc.abstractmethod
+    def checkpoint(self, page: Any) -> Dict[str, Any]:
+        """
+        The cursor fields of the checkpoint after the page.
+        """
 
-    @staticmethod
-    def _is_page_has_more(page: "NumberPaged[T]") -> bool:
-        if page._has_more is not None:
-            return page._has_more
-        if page._total is not None:
-            return page._total > page.page_num * page.page_size
-        if page._items is not None and page._items and len(page._items) >= page.page_size:
-            return True
+    @abc.abstractmethod
+    def resume_args(self, page: Any, checkpoint: PageCheckpoint) -> Dict[str, Any]:
+        """
+        The cursor arguments of the first page resumed from the checkpoint.
+        """
 
-        return False
+    def resized_args(self, page: Any, page_size: int) -> Tuple[Dict[str, Any], int]:
+        """
+        The cursor arguments of the page after the page with another page size, and the number of items at the start
+        of that page which the page already listed.
+        """
+        raise NotImplementedError
 
 
-class AsyncNumberPaged(AsyncPagedBase[T]):
-    def __init__(
-        self,
-        page_num: int,
-        page_size: int,
-        requestor: "Requester",
-        request_maker: Callable[[int, int], Coroutine[None, None, HTTPRequest]],
-    ):
-        self.page_num = page_num
-        self.page_size = page_size
+class _NumberCursor(_PageCursor):
+    type = PageCheckpointType.NUMBER
+    resizable = True
 
-        self._total = None
-        self._has_more = None
-        self._items = None
-        self._raw_response: Optional[httpx.Response] = None
+    def request_args(self, page: Any) -> Tuple[Any, Any]:
+        return page.page_num, page.page_size
 
-        self._requestor = requestor
-        self._request_maker = request_maker
+    def read(self, page: Any, res: Any) -> None:
+        page._total = res.get_total()
 
-    async def __aiter__(self) -> AsyncIterator[T]:
-        async for page in self.iter_pages():
-            for item in page.items:
-                yield item
+    def has_more(self, page: Any) -> bool:
+        if page._has_more is not None:
+            return page._has_more
+        if page._total is not None:
+            return page._total > page.page_num * page.page_size
+        return bool(page._items) and len(page._items) >= page.page_size
 
-    async def iter_pages(self) -> AsyncIterator["AsyncNumberPaged[T]"]:
-        yield self
+    def next_args(self, page: Any) -> Dict[str, Any]:
+        return {"page_num": page.page_num + 1, "page_size": page.page_size}
 
-        page_num = self.page_num
-        current_page = self
-        while AsyncNumberPaged._is_page_has_more(current_page):
-            page_num += 1
-            page: AsyncNumberPaged[T] = await AsyncNumberPaged.build(
-                page_num=page_num,
-                page_size=self.page_size,
-                requestor=self._requestor,
-                request_maker=self._request_maker,
-            )
-            current_page = page
-            yield page
+    def checkpoint(self, page: Any) -> Dict[str, Any]:
+        return {"page_num": page.page_num + 1, "page_size": page.page_size}
 
-    @property
-    def response(self) -> HTTPResponse:
-        return HTTPResponse(self._raw_response)  # type: ignore
+    def resume_args(self, page: Any, checkpoint: PageCheckpoint) -> Dict[str, Any]:
+        return {"page_num": checkpoint.page_num or 1, "page_size": checkpoint.page_size or page.page_size}
 
-    @property
-    def items(self) -> List[T]:
-        return self._items or cast(List[T], [])
+    def resized_args(self, page: Any, page_size: int) -> Tuple[Dict[str, Any], int]:
+        # the page numbers of the new size rarely line up with the items listed so far
+        offset = (page.page_num - 1) * page.page_size + len(page._items or [])
+        return {"page_num": offset // page_size + 1, "page_size": page_size}, offset % page_size
 
-    @property
-    def has_more(self) -> bool:
-        return AsyncNumberPaged._is_page_has_more(self)
 
-    @property
-    def total(self) -> int:
-        return self._total or 0
+class _TokenCursor(_PageCursor):
+    type = PageCheckpointType.TOKEN
+    resizable = True
 
-    async def _fetch_page(self):
-        """
+    def request_args(self, page: Any) -> Tuple[Any, Any]:
+        return page.page_token, page.page_size
 
-        :rtype: object
-        """
-        if self._total is not None:
-            return
-        request = await self._request_maker(self.page_num, self.page_size)
-        res: NumberPagedResponse[T] = await self._requestor.asend(request)
-        self._total = res.get_total()
-        self._has_more = res.get_has_more()
-        self._items = res.get_items()
-        self._raw_response = res._raw_response
+    def read(self, page: Any, res: Any) -> None:
+        page._next_page_token = res.get_next_page_token()
 
-    @staticmethod
-    def _is_page_has_more(page: "AsyncNumberPaged[T]") -> bool:
+    def has_more(self, page: Any) -> bool:
         if page._has_more is not None:
             return page._has_more
-        if page._total is not None:
-            return page._total > page.page_num * page.page_size
-        if page._total is not None and page._items and len(page._items) >= page.page_size:
-            return True
-        return False
+        # without a token the next page can't be addressed, an empty token would list the first page again
+        return bool(page._next_page_token)
 
-    @staticmethod
-    async def build(
-        page_num: int,
-        page_size: int,
-        requestor: "Requester",
-        request_maker: Callable[[int, int], Coroutine[None, None, HTTPRequest]],
-    ) -> "AsyncNumberPaged[T]":
-        page: AsyncNumberPaged[T] = AsyncNumberPaged(
-            page_num=page_num,
-            page_size=page_size,
-            requestor=requestor,
-            request_maker=request_maker,
-        )
-        await page._fetch_page()
-        return page
+    def next_args(self, page: Any) -> Dict[str, Any]:
+        return {"page_token": page._next_page_token or "", "page_size": page.page_size}
 
+    def checkpoint(self, page: Any) -> Dict[str, Any]:
+        return {"page_token": page._next_page_token or "", "page_size": page.page_size}
 
-class TokenPagedResponse(Generic[T], abc.ABC):
-    @abc.abstractmethod
-    def get_next_page_token(self) -> Optional[str]:
-        raise NotImplementedError
+    def resume_args(self, page: Any, checkpoint: PageCheckpoint) -> Dict[str, Any]:
+        return {"page_token": checkpoint.page_token or "", "page_size": checkpoint.page_size or page.page_size}
 
-    @abc.abstractmethod
-    def get_has_more(self) -> Optional[bool]:
-        raise NotImplementedError
+    def resized_args(self, page: Any, page_size: int) -> Tuple[Dict[str, Any], int]:
+        return {"page_token": page._next_page_token or "", "page_size": page_size}, 0
 
-    @abc.abstractmethod
-    def get_items(self) -> List[T]:
-        raise NotImplementedError
 
-    @property
-    @abc.abstractmethod
-    def response(self) -> HTTPResponse:
-        raise NotImplementedError
+class _LastIDCursor(_PageCursor):
+    type = PageCheckpointType.LAST_ID
 
+    def request_args(self, page: Any) -> Tuple[Any, Any]:
+        return page.before_id, page.after_id
 
-class TokenPaged(PagedBase[T]):
-    def __init__(
-        self,
-        page_token: str,
-        page_size: int,
-        requestor: "Requester",
-        request_maker: Callable[[str, int], HTTPRequest],
-    ):
-        self.page_token = page_token
-        self.page_size = page_size
+    def read(self, page: Any, res: Any) -> None:
+        page.first_id = res.get_first_id()
+        page.last_id = res.get_last_id()
 
-        self._next_page_token = None
-        self._has_more = None
-        self._items = None
-        self._http_response: Optional[HTTPResponse] = None
-        self._total = None
+    def has_more(self, page: Any) -> bool:
+        if page._has_more is not None:
+            return page._has_more
+        # the has_more property of LastIDPaged used to fall back on the after_id of the request, which said False for
+        # the first page, while the listing itself went on while the server returned a last id, as it does here
+        return bool(page.last_id)
 
-        self._requestor = requestor
-        self._request_maker = request_maker
+    def next_args(self, page: Any) -> Dict[str, Any]:
+        return {"before_id": "", "after_id": page.last_id or ""}
 
-        self._fetch_page()
+    def checkpoint(self, page: Any) -> Dict[str, Any]:
+        return {"after_id": page.last_id or ""}
 
-    def __iter__(self) -> Iterator[T]:  # type: ignore
-        for page in self.iter_pages():
-            for item in page.items:
-                yield item
+    def resume_args(self, page: Any, checkpoint: PageCheckpoint) -> Dict[str, Any]:
+        return {"before_id": "", "after_id": checkpoint.after_id or ""}
 
-    def iter_pages(self) -> Iterator["TokenPaged[T]"]:
-        yield self
 
-        current_page = self
-        while TokenPaged._is_page_has_more(current_page):
-            current_page = TokenPaged(
-                page_token=current_page._next_page_token or "",
-                page_size=self.page_size,
-                requestor=self._requestor,
-                request_maker=self._request_maker,
-            )
-            yield current_page
+class _PagedState(Generic[T]):
+    """
+    The state of one fetched page, and the parts of the pagination engine that do no I/O.
+    """
+
+    _cursor: _PageCursor
+
+    def _init_state(self, requestor: "Requester", request_maker: Callable[..., Any]) -> None:
+        self._has_more: Optional[bool] = None
+        self._items: Optional[List[T]] = None
+        self._raw_response: Optional[httpx.Response] = None
+        self._requestor = requestor
+        self._request_maker = request_maker
+        self._request: Optional[HTTPRequest] = None
+        self._fetched = False
+        # the number of items at the start of the response which an earlier page already listed
+        self._skip = 0
 
     @property
     def response(self) -> HTTPResponse:
-        return self._http_response  # type: ignore
+        return HTTPResponse(self._raw_response)  # type: ignore
 
     @property
     def items(self) -> List[T]:
+        if self._skip:
+            return (self._items or [])[self._skip :]
         return self._items or cast(List[T], [])
 
     @property
     def has_more(self) -> bool:
-        return TokenPaged._is_page_has_more(self)
+        return self._cursor.has_more(self)
 
-    @property
-    def total(self) -> int:
-        return self._total or 0
+    def checkpoint(self) -> PageCheckpoint:
+        """
+        The position after this page, to resume the listing from later.
+        """
+        return PageCheckpoint(
+            type=self._cursor.type,
+            has_more=self.has_more,
+            params=self._request.params if self._request else None,
+            body=self._request.json_body if self._request else None,
+            **self._cursor.checkpoint(self),
+        )
 
-    def _fetch_page(self):
-        if self._total is not None or self._has_more is not None:
-            return
-        request: HTTPRequest = self._request_maker(self.page_token, self.page_size)
-        res: TokenPagedResponse[T] = self._requestor.send(request)
-        self._next_page_token = res.get_next_page_token()
+    def _read(self, res: Any) -> None:
+        self._cursor.read(self, res)
         self._has_more = res.get_has_more()
         self._items = res.get_items()
-        self._http_response = res.response
-
-    @staticmethod
-    def _is_page_has_more(page: "TokenPaged[T]") -> bool:
-        if page._has_more is not None:
-            return page._has_more
-        if page._next_page_token is not None and page._next_page_token != "":
-            return True
-        if page._items is not None and page._items and len(page._items) >= page.page_size:
-            return True
-
-        return False
+        self._raw_response = getattr(res, "_raw_response", None)
+        self._fetched = True
 
 
-class AsyncTokenPaged(AsyncPagedBase[T]):
-    def __init__(
-        self,
-        page_token: str,
-        page_size: int,
-        requestor: "Requester",
-        request_maker: Callable[[str, int], Coroutine[None, None, HTTPRequest]],
-    ):
-        self.page_token = page_token
-        self.page_size = page_size
+_SyncPagedT = TypeVar("_SyncPagedT", bound="_SyncPaged")
+_AsyncPagedT = TypeVar("_AsyncPagedT", bound="_AsyncPaged")
 
-        self._next_page_token = None
-        self._has_more = None
-        self._items = None
-        self._raw_response: Optional[httpx.Response] = None
-        self._total = None
 
-        self._requestor = requestor
-        self._request_maker = request_maker
+class _SyncPaged(_PagedState[T], PagedBase[T]):
+    """
+    The sync pagination engine, driving any cursor strategy.
+    """
 
-    async def __aiter__(self) -> AsyncIterator[T]:
-        async for page in self.iter_pages():
+    def __iter__(self) -> Iterator[T]:  # type: ignore
+        for page in self.iter_pages():
             for item in page.items:
                 yield item
 
-    async def iter_pages(self) -> AsyncIterator["AsyncTokenPaged[T]"]:
-        yield self
-
-        current_page = self
-        while AsyncTokenPaged._is_page_has_more(current_page):
-            page: AsyncTokenPaged[T] = await AsyncTokenPaged.build(
-                page_token=current_page._next_page_token or "",
-                page_size=self.page_size,
-                requestor=self._requestor,
-                request_maker=self._request_maker,
-            )
-            current_page = page
-            yield page
+    def iter_pages(self: _SyncPagedT, prefetch: int = 0, *, auto_page_size: bool = False) -> Iterator[_SyncPagedT]:
+        """
+        Iterate over the pages, starting with this one.
 
-    @property
-    def response(self) -> HTTPResponse:
-        return HTTPResponse(self._raw_response)  # type: ignore
+        :param prefetch: the number of pages fetched ahead in a background thread while the caller processes the
+        current one. Each cursor comes from the previous page, so the pages are still fetched one after another.
+        :param auto_page_size: tune the page size of the pages after this one: start from the max page size of the
+        endpoint, lower it after a timeout or a payload too large error, and raise it while the latency per item
+        improves. Prefetch doesn't apply then. Last-id listings have a fixed page size and ignore it.
+        """
+        if auto_page_size and self._cursor.resizable:
+            yield from self._iter_pages_auto_sized()
+            return
+        if prefetch > 0:
+            yield from _iter_prefetched(self, lambda page: page._next_page(), prefetch)
+            return
 
-    @property
-    def items(self) -> List[T]:
-        return self._items or cast(List[T], [])
+        current_page: Optional[_SyncPagedT] = self
+        while current_page is not None:
+            yield current_page
+            current_page = current_page._next_page()
+
+    def resume(self: _SyncPagedT, checkpoint: PageCheckpoint) -> Iterator[_SyncPagedT]:
+        """
+        Iterate over the pages from a checkpoint, with the filters of this listing.
+        """
+        _check_checkpoint(checkpoint, self._cursor.type)
+        if checkpoint.has_more:
+            yield from self._new(**self._cursor.resume_args(self, checkpoint)).iter_pages()
+
+    def _iter_pages_auto_sized(self: _SyncPagedT) -> Iterator[_SyncPagedT]:
+        tuner = _PageSizeTuner(cast(Any, self).page_size, self._request.url if self._request else "")
+        page = self
+        yield page
+        while page.has_more:
+            page_size = tuner.size
+            cursor_args, skip = self._cursor.resized_args(page, page_size)
+            started_at = time.monotonic()
+            try:
+                next_page = self._new(**cursor_args)
+            except Exception as e:
+                if tuner.shrink(page_size, e):
+                    continue
+                raise
+            tuner.observe(page_size, len(next_page._items or []), time.monotonic() - started_at)
+            next_page._skip = skip
+            page = next_page
+            yield page
+
+    def _next_page(self: _SyncPagedT) -> Optional[_SyncPagedT]:
+        if not self.has_more:
+            return None
+        return self._new(**self._cursor.next_args(self))
+
+    def _new(self: _SyncPagedT, **cursor_args: Any) -> _SyncPagedT:
+        return cast(Any, type(self))(requestor=self._requestor, request_maker=self._request_maker, **cursor_args)
+
+    def _fetch_page(self) -> None:
+        if self._fetched:
+            return
+        request: HTTPRequest = self._request_maker(*self._cursor.request_args(self))
+        self._request = request
+        self._read(_send_page(self._requestor, request, self._cursor.type))
+
+
+class _AsyncPaged(_PagedState[T], AsyncPagedBase[T]):
+    """
+    The async pagination engine, driving any cursor strategy.
+    """
+
+    async def __aiter__(self) -> AsyncIterator[T]:
+        async for page in self.iter_pages():
+            for item in page.items:
+                yield item
+
+    async def iter_pages(
+        self: _AsyncPagedT, prefetch: int = 0, *, auto_page_size: bool = False
+    ) -> AsyncIterator[_AsyncPagedT]:
+        """
+        Iterate over the pages, starting with this one.
+
+        :param prefetch: the number of pages fetched ahead in a background task while the caller processes the
+        current one. Each cursor comes from the previous page, so the pages are still fetched one after another.
+        :param auto_page_size: tune the page size of the pages after this one, see TokenPaged.iter_pages.
+        """
+        if auto_page_size and self._cursor.resizable:
+            async for page in self._iter_pages_auto_sized():
+                yield page
+            return
+        if prefetch > 0:
+            async for page in _aiter_prefetched(self, lambda page: page._next_page(), prefetch):
+                yield page
+            return
+
+        current_page: Optional[_AsyncPagedT] = self
+        while current_page is not None:
+            yield current_page
+            current_page = await current_page._next_page()
+
+    async def resume(self: _AsyncPagedT, checkpoint: PageCheckpoint) -> AsyncIterator[_AsyncPagedT]:
+        """
+        Iterate over the pages from a checkpoint, with the filters of this listing.
+        """
+        _check_checkpoint(checkpoint, self._cursor.type)
+        if not checkpoint.has_more:
+            return
+        page = await self._new(**self._cursor.resume_args(self, checkpoint))
+        async for current_page in page.iter_pages():
+            yield current_page
+
+    async def _iter_pages_auto_sized(self: _AsyncPagedT) -> AsyncIterator[_AsyncPagedT]:
+        tuner = _PageSizeTuner(cast(Any, self).page_size, self._request.url if self._request else "")
+        page = self
+        yield page
+        while page.has_more:
+            page_size = tuner.size
+            cursor_args, skip = self._cursor.resized_args(page, page_size)
+            started_at = time.monotonic()
+            try:
+                next_page = await self._new(**cursor_args)
+            except Exception as e:
+                if tuner.shrink(page_size, e):
+                    continue
+                raise
+            tuner.observe(page_size, len(next_page._items or []), time.monotonic() - started_at)
+            next_page._skip = skip
+            page = next_page
+            yield page
+
+    async def amap(
+        self, fn: Callable[[T], Union[R, Awaitable[R]]], *, concurrency: int = 4, ordered: bool = True
+    ) -> AsyncIterator[R]:
+        """
+        Call fn on every item, e.g. to fetch the details of each one, and iterate over the results.
+
+        The calls run concurrently with each other and with fetching the next page.
+
+        :param fn: a sync or async function of an item.
+        :param concurrency: the max number of calls in flight.
+        :param ordered: yield the results in the order of the items, otherwise as soon as each call is done.
+        """
+        _check_concurrency(concurrency)
+        async for res in _amap(self._aiter_items(), partial(_acall, fn), concurrency, ordered):
+            yield res
+
+    async def afilter(
+        self, fn: Callable[[T], Union[bool, Awaitable[bool]]], *, concurrency: int = 4, ordered: bool = True
+    ) -> AsyncIterator[T]:
+        """
+        Iterate over the items for which fn returns true. The calls run like those of amap.
+
+        :param fn: a sync or async predicate of an item.
+        :param concurrency: the max number of calls in flight.
+        :param ordered: yield the items in the listing order, otherwise as soon as each call is done.
+        """
+        _check_concurrency(concurrency)
+
+        async def keep(item: T) -> Tuple[T, bool]:
+            return item, bool(await _acall(fn, item))
+
+        async for item, kept in _amap(self._aiter_items(), keep, concurrency, ordered):
+            if kept:
+                yield item
+
+    async def abatch(self, size: int) -> AsyncIterator[List[T]]:
+        """
+        Iterate over the items in lists of size, regardless of the page size. The last list may be shorter.
+        """
+        if size < 1:
+            raise ValueError(f"invalid batch size: {size}")
+        batch: List[T] = []
+        async for item in self._aiter_items():
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _aiter_items(self) -> AsyncGenerator[T, None]:
+        # fetch the next page while the items of the current one are processed
+        async for page in self.iter_pages(prefetch=1):
+            for item in page.items:
+                yield item
+
+    async def _next_page(self: _AsyncPagedT) -> Optional[_AsyncPagedT]:
+        if not self.has_more:
+            return None
+        return await self._new(**self._cursor.next_args(self))
+
+    async def _new(self: _AsyncPagedT, **cursor_args: Any) -> _AsyncPagedT:
+        page = cast(Any, type(self))(requestor=self._requestor, request_maker=self._request_maker, **cursor_args)
+        await page._fetch_page()
+        return page
+
+    async def _fetch_page(self) -> None:
+        if self._fetched:
+            return
+        request: HTTPRequest = await self._request_maker(*self._cursor.request_args(self))
+        self._request = request
+        self._read(await _asend_page(self._requestor, request, self._cursor.type))
+
+
+def _check_concurrency(concurrency: int) -> None:
+    if concurrency < 1:
+        raise ValueError(f"invalid concurrency: {concurrency}")
+
+
+async def _acall(fn: Callable[[T], Union[R, Awaitable[R]]], item: T) -> R:
+    res = fn(item)
+    if inspect.isawaitable(res):
+        return await res
+    return cast(R, res)
+
+
+async def _amap(
+    items: AsyncGenerator[T, None], fn: Callable[[T], Awaitable[R]], concurrency: int, ordered: bool
+) -> AsyncIterator[R]:
+    """
+    Yield fn of each item, with at most concurrency calls in flight.
+    """
+    pending: Deque["asyncio.Future[R]"] = deque()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.append(asyncio.ensure_future(fn(item)))
+            if not pending:
+                return
+            if ordered:
+                yield await pending.popleft()
+                continue
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.remove(task)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await items.aclose()
+
+
+def _send_page(requestor: "Requester", request: HTTPRequest, type: PageCheckpointType) -> Any:
+    retries, interval = page_retry_policy()
+    started_at = time.monotonic()
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            res: Any = requestor.send(request)
+            break
+        except httpx.TransportError as e:
+            if attempts > retries:
+                raise
+            log_warning("fetch page failed, retrying, url=%s, attempt=%s, error=%s", request.url, attempts, e)
+            time.sleep(interval * 2 ** (attempts - 1))
+    if page_stats_enabled():
+        emit_page_stats(_page_stats(type, res, started_at, attempts))
+    return res
+
+
+async def _asend_page(requestor: "Requester", request: HTTPRequest, type: PageCheckpointType) -> Any:
+    retries, interval = page_retry_policy()
+    started_at = time.monotonic()
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            res: Any = await requestor.asend(request)
+            break
+        except httpx.TransportError as e:
+            if attempts > retries:
+                raise
+            log_warning("fetch page failed, retrying, url=%s, attempt=%s, error=%s", request.url, attempts, e)
+            await asyncio.sleep(interval * 2 ** (attempts - 1))
+    if page_stats_enabled():
+        emit_page_stats(_page_stats(type, res, started_at, attempts))
+    return res
+
+
+def _page_stats(type: PageCheckpointType, res: Any, started_at: float, attempts: int) -> PageStats:
+    raw_response = getattr(res, "_raw_response", None)
+    return PageStats(
+        type=type,
+        logid=raw_response.headers.get("x-tt-logid") if raw_response is not None else None,
+        item_count=len(res.get_items() or []),
+        duration=time.monotonic() - started_at,
+        attempts=attempts,
+    )
 
-    @property
-    def has_more(self) -> bool:
-        return AsyncTokenPaged._is_page_has_more(self)
+
+class NumberPaged(_SyncPaged[T]):
+    _cursor = _NumberCursor()
+
+    def __init__(
+        self,
+        page_num: int,
+        page_size: int,
+        requestor: "Requester",
+        request_maker: Callable[[int, int], HTTPRequest],
+    ):
+        self.page_num = page_num
+        self.page_size = page_size
+        self._total: Optional[int] = None
+        self._init_state(requestor, request_maker)
+
+        self._fetch_page()
+
+    def iter_pages(
+        self, prefetch: int = 0, concurrency: int = 1, *, auto_page_size: bool = False
+    ) -> Iterator["NumberPaged[T]"]:
+        """
+        Iterate over the pages, starting with this one.
+
+        :param prefetch: the number of pages fetched ahead in a background thread, see TokenPaged.iter_pages.
+        :param concurrency: the max number of pages fetched in parallel by a thread pool. It only applies when the
+        response carries the total, so that the remaining page numbers are known up front. Pages are yielded in order.
+        :param auto_page_size: tune the page size of the pages after this one, see TokenPaged.iter_pages. The pages
+        are fetched one after another then.
+        """
+        if auto_page_size or concurrency <= 1 or self._total is None or not self.has_more:
+            yield from super().iter_pages(prefetch, auto_page_size=auto_page_size)
+            return
+
+        yield self
+        current_page = self
+        for current_page in self._iter_pages_parallel(concurrency):
+            yield current_page
+        # the total may have grown while iterating
+        next_page = current_page._next_page()
+        if next_page is not None:
+            yield from next_page.iter_pages()
 
     @property
     def total(self) -> int:
         return self._total or 0
 
-    async def _fetch_page(self):
+    def _iter_pages_parallel(self, concurrency: int) -> Iterator["NumberPaged[T]"]:
+        page_nums = iter(range(self.page_num + 1, _last_page_num(self.total, self.page_size) + 1))
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cozepy-paged")
+        futures: Deque[Future] = deque()
+        try:
+            # keep at most concurrency pages in flight, and yield them in order
+            for page_num in itertools.islice(page_nums, concurrency):
+                futures.append(executor.submit(self._new, page_num=page_num, page_size=self.page_size))
+            while futures:
+                page = futures.popleft().result()
+                for page_num in itertools.islice(page_nums, 1):
+                    futures.append(executor.submit(self._new, page_num=page_num, page_size=self.page_size))
+                yield page
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+class AsyncNumberPaged(_AsyncPaged[T]):
+    _cursor = _NumberCursor()
+
+    def __init__(
+        self,
+        page_num: int,
+        page_size: int,
+        requestor: "Requester",
+        request_maker: Callable[[int, int], Coroutine[None, None, HTTPRequest]],
+    ):
+        self.page_num = page_num
+        self.page_size = page_size
+        self._total: Optional[int] = None
+        self._init_state(requestor, request_maker)
+
+    async def iter_pages(
+        self, prefetch: int = 0, concurrency: int = 1, *, auto_page_size: bool = False
+    ) -> AsyncIterator["AsyncNumberPaged[T]"]:
         """
+        Iterate over the pages, starting with this one.
 
-        :rtype: object
+        :param prefetch: the number of pages fetched ahead in a background task, see AsyncTokenPaged.iter_pages.
+        :param concurrency: the max number of pages fetched concurrently. It only applies when the response carries
+        the total, so that the remaining page numbers are known up front. Pages are yielded in order.
+        :param auto_page_size: tune the page size of the pages after this one, see AsyncTokenPaged.iter_pages. The pages
+        are fetched one after another then.
         """
-        if self._next_page_token is not None:
+        if auto_page_size or concurrency <= 1 or self._total is None or not self.has_more:
+            async for page in super().iter_pages(prefetch, auto_page_size=auto_page_size):
+                yield page
             return
-        request = await self._request_maker(self.page_token, self.page_size)
-        res: TokenPagedResponse[T] = await self._requestor.asend(request)
-        self._next_page_token = res.get_next_page_token()
-        self._has_more = res.get_has_more()
-        self._items = res.get_items()
-        self._raw_response = res._raw_response
+
+        yield self
+        current_page = self
+        async for current_page in self._iter_pages_parallel(concurrency):
+            yield current_page
+        # the total may have grown while iterating
+        next_page = await current_page._next_page()
+        if next_page is not None:
+            async for page in next_page.iter_pages():
+                yield page
+
+    @property
+    def total(self) -> int:
+        return self._total or 0
+
+    async def _iter_pages_parallel(self, concurrency: int) -> AsyncIterator["AsyncNumberPaged[T]"]:
+        page_nums = iter(range(self.page_num + 1, _last_page_num(self.total, self.page_size) + 1))
+        tasks: Deque[asyncio.Future] = deque()
+        try:
+            # keep at most concurrency pages in flight, and yield them in order
+            for page_num in itertools.islice(page_nums, concurrency):
+                tasks.append(asyncio.ensure_future(self._new(page_num=page_num, page_size=self.page_size)))
+            while tasks:
+                page = await tasks.popleft()
+                for page_num in itertools.islice(page_nums, 1):
+                    tasks.append(asyncio.ensure_future(self._new(page_num=page_num, page_size=self.page_size)))
+                yield page
+        finally:
+            for task in tasks:
+                task.cancel()
 
     @staticmethod
-    def _is_page_has_more(page: "AsyncTokenPaged[T]") -> bool:
-        if page._has_more is not None:
-            return page._has_more
-        if page._next_page_token is not None and page._next_page_token != "":
-            return True
-        if page._items is not None and page._items and len(page._items) >= page.page_size:
-            return True
+    async def build(
+        page_num: int,
+        page_size: int,
+        requestor: "Requester",
+        request_maker: Callable[[int, int], Coroutine[None, None, HTTPRequest]],
+    ) -> "AsyncNumberPaged[T]":
+        page: AsyncNumberPaged[T] = AsyncNumberPaged(
+            page_num=page_num,
+            page_size=page_size,
+            requestor=requestor,
+            request_maker=request_maker,
+        )
+        await page._fetch_page()
+        return page
+
+
+def _iter_prefetched(
+    first: SyncPage, fetch_next: Callable[[SyncPage], Optional[SyncPage]], depth: int
+) -> Iterator[SyncPage]:
+    """
+    Yield first and the pages after it, fetching up to depth pages ahead in a background thread.
+    """
+    # each item is (page, None), (None, error), or (None, None) at the end
+    pages: "queue.Queue[Tuple[Optional[SyncPage], Optional[Exception]]]" = queue.Queue()
+    # a page takes a slot from before it is fetched until it is yielded, so at most depth pages are ahead
+    slots = threading.Semaphore(depth)
+    stopped = threading.Event()
+
+    def acquire() -> bool:
+        while not stopped.is_set():
+            if slots.acquire(timeout=0.1):
+                return True
         return False
 
+    def produce() -> None:
+        page: Optional[SyncPage] = first
+        try:
+            while page is not None:
+                if not acquire():
+                    return
+                page = fetch_next(page)
+                if page is not None:
+                    pages.put((page, None))
+        except Exception as e:
+            pages.put((None, e))
+            return
+        pages.put((None, None))
+
+    threading.Thread(target=produce, name="cozepy-paged-prefetch", daemon=True).start()
+    try:
+        yield first
+        while True:
+            page, error = pages.get()
+            if error is not None:
+                raise error
+            if page is None:
+                return
+            slots.release()
+            yield page
+    finally:
+        stopped.set()
+
+
+async def _aiter_prefetched(
+    first: AsyncPage, fetch_next: Callable[[AsyncPage], Awaitable[Optional[AsyncPage]]], depth: int
+) -> AsyncIterator[AsyncPage]:
+    """
+    Yield first and the pages after it, fetching up to depth pages ahead in a background task.
+    """
+    # each item is (page, None), (None, error), or (None, None) at the end
+    pages: "asyncio.Queue[Tuple[Optional[AsyncPage], Optional[Exception]]]" = asyncio.Queue()
+    # a page takes a slot from before it is fetched until it is yielded, so at most depth pages are ahead
+    slots = asyncio.Semaphore(depth)
+
+    async def produce() -> None:
+        page: Optional[AsyncPage] = first
+        try:
+            while page is not None:
+                await slots.acquire()
+                page = await fetch_next(page)
+                if page is not None:
+                    pages.put_nowait((page, None))
+        except Exception as e:
+            pages.put_nowait((None, e))
+            return
+        pages.put_nowait((None, None))
+
+    task = asyncio.ensure_future(produce())
+    try:
+        yield first
+        while True:
+            page, error = await pages.get()
+            if error is not None:
+                raise error
+            if page is None:
+                return
+            slots.release()
+            yield page
+    finally:
+        task.cancel()
+
+
+class TokenPagedResponse(Generic[T], abc.ABC):
+    @abc.abstractmethod
+    def get_next_page_token(self) -> Optional[str]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_has_more(self) -> Optional[bool]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_items(self) -> List[T]:
+        raise NotImplementedError
+
+    @property
+    @abc.abstractmethod
+    def response(self) -> HTTPResponse:
+        raise NotImplementedError
+
+
+class TokenPaged(_SyncPaged[T]):
+    _cursor = _TokenCursor()
+
+    def __init__(
+        self,
+        page_token: str,
+        page_size: int,
+        requestor: "Requester",
+        request_maker: Callable[[str, int], HTTPRequest],
+    ):
+        self.page_token = page_token
+        self.page_size = page_size
+        self._next_page_token: Optional[str] = None
+        self._init_state(requestor, request_maker)
+
+        self._fetch_page()
+
+    @property
+    def total(self) -> int:
+        return 0
+
+
+class AsyncTokenPaged(_AsyncPaged[T]):
+    _cursor = _TokenCursor()
+
+    def __init__(
+        self,
+        page_token: str,
+        page_size: int,
+        requestor: "Requester",
+        request_maker: Callable[[str, int], Coroutine[None, None, HTTPRequest]],
+    ):
+        self.page_token = page_token
+        self.page_size = page_size
+        self._next_page_token: Optional[str] = None
+        self._init_state(requestor, request_maker)
+
+    @property
+    def total(self) -> int:
+        return 0
+
     @staticmethod
     async def build(
         page_token: str,
@@ -616,7 +1305,9 @@ class LastIDPagedResponse(Generic[T], abc.ABC):
     def get_items(self) -> List[T]: ...
 
 
-class LastIDPaged(PagedBase[T]):
+class LastIDPaged(_SyncPaged[T]):
+    _cursor = _LastIDCursor()
+
     def __init__(
         self,
         before_id: str,
@@ -628,72 +1319,14 @@ class LastIDPaged(PagedBase[T]):
         self.after_id = after_id
         self.first_id: Optional[str] = None
         self.last_id: Optional[str] = None
-        self._has_more: Optional[bool] = None
-        self._items: Optional[List[T]] = None
-        self._raw_response: Optional[httpx.Response] = None
-
-        self._requestor = requestor
-        self._request_maker = request_maker
+        self._init_state(requestor, request_maker)
 
         self._fetch_page()
 
-    def __iter__(self) -> Iterator[T]:  # type: ignore
-        for page in self.iter_pages():
-            for item in page.items:
-                yield item
-
-    def iter_pages(self) -> Iterator["LastIDPaged[T]"]:
-        yield self
 
-        has_more = self._has_more
-        last_id = self.last_id
-        while self._check_has_more(has_more, last_id):
-            page: LastIDPaged[T] = LastIDPaged(
-                before_id="",
-                after_id=last_id or "",
-                requestor=self._requestor,
-                request_maker=self._request_maker,
-            )
-            has_more = page.has_more
-            last_id = page.last_id
-            yield page
+class AsyncLastIDPaged(_AsyncPaged[T]):
+    _cursor = _LastIDCursor()
 
-    @property
-    def response(self) -> HTTPResponse:
-        return HTTPResponse(self._raw_response)  # type: ignore
-
-    @property
-    def items(self) -> List[T]:
-        return self._items or []
-
-    @property
-    def has_more(self) -> bool:
-        if self._has_more is not None:
-            return self._has_more
-        return self.after_id != ""
-
-    def _fetch_page(self):
-        if self.last_id is not None or self._has_more is not None:
-            return
-
-        request = self._request_maker(self.before_id, self.after_id)
-        res: LastIDPagedResponse[T] = self._requestor.send(request)
-
-        self.first_id = res.get_first_id()
-        self.last_id = res.get_last_id()
-        self._has_more = res.get_has_more()
-        self._items = res.get_items()
-        self._raw_response = res._raw_response
-
-    def _check_has_more(self, has_more: Optional[bool] = None, last_id: Optional[str] = None) -> bool:
-        if has_more is not None:
-            return has_more
-        if last_id and last_id != "":
-            return True
-        return False
-
-
-class AsyncLastIDPaged(AsyncPagedBase[T]):
     def __init__(
         self,
         before_id: str,
@@ -703,49 +1336,9 @@ class AsyncLastIDPaged(AsyncPagedBase[T]):
     ):
         self.before_id = before_id
         self.after_id = after_id
-        self.first_id = None
-        self.last_id = None
-        self._has_more = None
-        self._items: List[T] = []
-        self._raw_response: Optional[httpx.Response] = None
-
-        self._requestor = requestor
-        self._request_maker = request_maker
-
-    async def __aiter__(self) -> AsyncIterator[T]:
-        async for page in self.iter_pages():
-            for item in page.items:
-                yield item
-
-    async def iter_pages(self) -> AsyncIterator["AsyncLastIDPaged[T]"]:
-        yield self
-
-        has_more = self._has_more
-        last_id = self.last_id
-        while self._check_has_more(has_more, last_id):
-            page: AsyncLastIDPaged[T] = await AsyncLastIDPaged.build(
-                before_id="",
-                after_id=last_id or "",
-                requestor=self._requestor,
-                request_maker=self._request_maker,
-            )
-            has_more = page.has_more
-            last_id = page.last_id
-            yield page
-
-    @property
-    def response(self) -> HTTPResponse:
-        return HTTPResponse(self._raw_response)  # type: ignore
-
-    @property
-    def items(self) -> List[T]:
-        return self._items
-
-    @property
-    def has_more(self) -> bool:
-        if self._has_more is not None:
-            return self._has_more
-        return self.after_id != ""
+        self.first_id: Optional[str] = None
+        self.last_id: Optional[str] = None
+        self._init_state(requestor, request_maker)
 
     @staticmethod
     async def build(
@@ -754,7 +1347,7 @@ class AsyncLastIDPaged(AsyncPagedBase[T]):
         requestor: "Requester",
         request_maker: Callable[[str, str], Coroutine[None, None, HTTPRequest]],
     ) -> "AsyncLastIDPaged[T]":
-        page: AsyncLastIDPaged = AsyncLastIDPaged(
+        page: AsyncLastIDPaged[T] = AsyncLastIDPaged(
             before_id=before_id,
             after_id=after_id,
             requestor=requestor,
@@ -763,25 +1356,57 @@ class AsyncLastIDPaged(AsyncPagedBase[T]):
         await page._fetch_page()
         return page
 
-    async def _fetch_page(self):
-        if self.last_id is not None or self._has_more is not None:
-            return
 
-        request = await self._request_maker(self.before_id, self.after_id)
-        res: LastIDPagedResponse[T] = await self._requestor.asend(request)
+def _shutdown_response(raw_response: httpx.Response) -> None:
+    """
+    Shut down the socket under a streamed response, which wakes up a read blocked on it in another thread.
+    """
+    network_stream = raw_response.extensions.get("network_stream")
+    sock = network_stream.get_extra_info("socket") if network_stream is not None else None
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
 
-        self.first_id = res.get_first_id()
-        self.last_id = res.get_last_id()
-        self._has_more = res.get_has_more()
-        self._items = res.get_items()
-        self._raw_response = res._raw_response
 
-    def _check_has_more(self, has_more: Optional[bool] = None, last_id: Optional[str] = None) -> bool:
-        if has_more is not None:
-            return has_more
-        if last_id and last_id != "":
-            return True
-        return False
+class _StreamWatchdog(object):
+    """
+    A single daemon thread firing the deadlines of all sync streams, instead of one timer thread per stream.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, "weakref.ref[Stream]"]] = []
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, stream: "Stream", deadline: float) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, next(self._seq), weakref.ref(stream)))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cozepy-stream-watchdog", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                deadline, _, ref = self._heap[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+            stream = ref()
+            if stream is not None:
+                stream._on_deadline()
+
+
+_stream_watchdog = _StreamWatchdog()
 
 
 class Stream(Generic[T]):
@@ -791,33 +1416,90 @@ class Stream(Generic[T]):
         iters: Iterator[str],
         fields: List[str],
         handler: Callable[[Dict[str, str], httpx.Response], Optional[T]],
+        timeout: Optional[StreamTimeout] = None,
+        sent_at: Optional[float] = None,
+        headers_at: Optional[float] = None,
     ):
         self._iters = iters
         self._fields = fields
         self._handler = handler
         self._raw_response = raw_response
 
+        self._timeout = timeout
+        self._started_at = sent_at if sent_at is not None else time.monotonic()
+        self._last_event_at: Optional[float] = None
+        self._closed = False
+        self._stats = _StreamStatsRecorder(self._started_at, headers_at) if stream_stats_enabled() else None
+        self._log = EventLogger("receive event", self.response.logid)
+        if timeout is not None:
+            expiry = timeout._expiry(self._started_at)
+            if expiry is not None:
+                _stream_watchdog.watch(self, expiry[0])
+
     @property
     def response(self) -> HTTPResponse:
         return HTTPResponse(self._raw_response)
 
+    @property
+    def stats(self) -> Optional[StreamStats]:
+        """
+        The timing stats of the stream so far, or None if stream stats are not enabled by setup_stream_metrics.
+        """
+        return self._stats.build(self.response.logid) if self._stats is not None else None
+
+    def close(self) -> None:
+        """
+        Close the underlying response and return its connection to the pool. It is called automatically when the
+        stream is exhausted or fails, and is needed when the caller stops iterating early.
+        """
+        self._closed = True
+        self._raw_response.close()
+        if self._stats is not None:
+            self._stats.on_end(self.response.logid)
+
+    def __enter__(self) -> "Stream[T]":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __del__(self):
+        if getattr(self, "_closed", True) or self._raw_response.is_closed:
+            return
+        warnings.warn(
+            f"unclosed stream, logid={self.response.logid}, call close() or use it as a context manager",
+            ResourceWarning,
+            source=self,
+        )
+        self.close()
+
     def __iter__(self):
         while True:
-            event_dict = self._extra_event()
-            if not event_dict:
+            item = self._next_item()
+            if item is None:
                 break
-            item = self._handler(event_dict, self._raw_response)
-            if item:
-                yield item
+            yield item
 
     def __next__(self):
-        while True:
-            event_dict = self._extra_event()
-            if not event_dict:
-                raise StopIteration
-            item = self._handler(event_dict, self._raw_response)
-            if item:
-                return item
+        item = self._next_item()
+        if item is None:
+            raise StopIteration
+        return item
+
+    def _next_item(self) -> Optional[T]:
+        try:
+            while True:
+                event_dict = self._extra_event()
+                if not event_dict:
+                    return None
+                item = self._handler(event_dict, self._raw_response)
+                if item:
+                    if self._stats is not None:
+                        self._stats.on_event(item)
+                    return item
+        except Exception:
+            self.close()
+            raise
 
     def _extra_event(self) -> Optional[Dict[str, str]]:
         data = dict(map(lambda x: (x, ""), self._fields))
@@ -825,19 +1507,53 @@ class Stream(Generic[T]):
 
         while times < len(data):
             try:
-                line = next(self._iters).strip()
+                line = self._next_line().strip()
             except StopIteration:
+                self.close()
                 return None
             if line == "":
                 continue
 
-            log_debug("receive event, logid=%s, event=%s", self.response.logid, line)
+            if self._log.enabled:
+                self._log.event(line)
 
             field, value = self._extra_field_data(line, data)
             data[field] = value
             times += 1
+        if self._timeout is not None:
+            self._last_event_at = time.monotonic()
         return data
 
+    def _next_line(self) -> str:
+        if self._timeout is None:
+            return next(self._iters)
+        try:
+            line = next(self._iters)
+        except (StopIteration, httpx.HTTPError):
+            # the watchdog interrupts an expired read by shutting down the socket
+            self._raise_if_expired()
+            raise
+        self._raise_if_expired()
+        return line
+
+    def _raise_if_expired(self) -> None:
+        expiry = self._timeout._expiry(self._started_at, self._last_event_at) if self._timeout else None
+        if expiry is None or time.monotonic() < expiry[0]:
+            return
+        self.close()
+        raise expiry[1](self.response.logid)
+
+    def _on_deadline(self) -> None:
+        if self._closed or self._timeout is None:
+            return
+        expiry = self._timeout._expiry(self._started_at, self._last_event_at)
+        if expiry is None:
+            return
+        if expiry[0] > time.monotonic():
+            _stream_watchdog.watch(self, expiry[0])
+            return
+        _shutdown_response(self._raw_response)
+
     def _extra_field_data(self, line: str, data: Dict[str, str]) -> Tuple[str, str]:
         for field in self._fields:
             if line.startswith(field + ":"):
@@ -855,6 +1571,9 @@ class AsyncStream(Generic[T]):
         fields: List[str],
         handler: Callable[[Dict[str, str], httpx.Response], Optional[T]],
         raw_response: httpx.Response,
+        timeout: Optional[StreamTimeout] = None,
+        sent_at: Optional[float] = None,
+        headers_at: Optional[float] = None,
     ):
         self._iters = iters
         self._fields = fields
@@ -862,10 +1581,52 @@ class AsyncStream(Generic[T]):
         self._iterator = self.__stream__()
         self._raw_response = raw_response
 
+        self._timeout = timeout
+        self._started_at = sent_at if sent_at is not None else time.monotonic()
+        self._last_event_at: Optional[float] = None
+        self._closed = False
+        self._stats = _StreamStatsRecorder(self._started_at, headers_at) if stream_stats_enabled() else None
+        self._log = EventLogger("async receive event", self.response.logid)
+
     @property
     def response(self) -> HTTPResponse:
         return HTTPResponse(self._raw_response)
 
+    @property
+    def stats(self) -> Optional[StreamStats]:
+        """
+        The timing stats of the stream so far, or None if stream stats are not enabled by setup_stream_metrics.
+        """
+        return self._stats.build(self.response.logid) if self._stats is not None else None
+
+    async def aclose(self) -> None:
+        """
+        Close the underlying response and return its connection to the pool. It is called automatically when the
+        stream is exhausted or fails, and is needed when the caller stops iterating early.
+        """
+        await self._iterator.aclose()
+        await self._aclose_response()
+
+    async def __aenter__(self) -> "AsyncStream[T]":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    def __del__(self):
+        if getattr(self, "_closed", True) or self._raw_response.is_closed:
+            return
+        warnings.warn(
+            f"unclosed stream, logid={self.response.logid}, call aclose() or use it as an async context manager",
+            ResourceWarning,
+            source=self,
+        )
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(self._aclose_response())
+
     async def __aiter__(self) -> AsyncIterator[T]:
         async for item in self._iterator:
             yield item
@@ -873,30 +1634,60 @@ class AsyncStream(Generic[T]):
     async def __anext__(self) -> T:
         return await self._iterator.__anext__()
 
-    async def __stream__(self) -> AsyncIterator[T]:
+    async def __stream__(self) -> AsyncGenerator[T, None]:
         data = self._make_data()
         times = 0
 
-        async for line in self._iters:
-            line = line.strip()
-            if line == "":
-                continue
-
-            log_debug("async receive event, logid=%s, event=%s", self.response.logid, line)
-
-            field, value = self._extra_field_data(line, data)
-            data[field] = value
-            times += 1
-
-            if times >= len(self._fields):
+        try:
+            while True:
                 try:
-                    event = self._handler(data, self._raw_response)
-                    if event:
-                        yield event
+                    line = await self._next_line()
                 except StopAsyncIteration:
-                    return
-                data = self._make_data()
-                times = 0
+                    break
+                line = line.strip()
+                if line == "":
+                    continue
+
+                if self._log.enabled:
+                    self._log.event(line)
+
+                field, value = self._extra_field_data(line, data)
+                data[field] = value
+                times += 1
+
+                if times >= len(self._fields):
+                    if self._timeout is not None:
+                        self._last_event_at = time.monotonic()
+                    try:
+                        event = self._handler(data, self._raw_response)
+                        if event:
+                            if self._stats is not None:
+                                self._stats.on_event(event)
+                            yield event
+                    except StopAsyncIteration:
+                        break
+                    data = self._make_data()
+                    times = 0
+        except Exception:
+            await self._aclose_response()
+            raise
+        await self._aclose_response()
+
+    async def _next_line(self) -> str:
+        expiry = self._timeout._expiry(self._started_at, self._last_event_at) if self._timeout else None
+        if expiry is None:
+            return await self._iters.__anext__()
+        try:
+            return await asyncio.wait_for(self._iters.__anext__(), expiry[0] - time.monotonic())
+        except asyncio.TimeoutError:
+            await self._aclose_response()
+            raise expiry[1](self.response.logid) from None
+
+    async def _aclose_response(self) -> None:
+        self._closed = True
+        await self._raw_response.aclose()
+        if self._stats is not None:
+            self._stats.on_end(self.response.logid)
 
     def _extra_field_data(self, line: str, data: Dict[str, str]) -> Tuple[str, str]:
         for field in self._fields:
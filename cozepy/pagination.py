@@ -0,0 +1,147 @@
+import re
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from cozepy.exception import CozeAPIError
+from cozepy.log import log_warning
+
+if TYPE_CHECKING:
+    from cozepy.model import PageStats
+
+PageMetricsHook = Callable[["PageStats"], None]
+
+_page_retries = 0
+_page_retry_interval = 0.5
+_page_metrics_hook: Optional[PageMetricsHook] = None
+
+
+def setup_pagination(retries: int = 0, retry_interval: float = 0.5, hook: Optional[PageMetricsHook] = None) -> None:
+    """
+    Configure how the pages of every paged listing are fetched.
+
+    :param retries: the number of times a page request is retried after a transport error, such as a timeout or a
+    dropped connection. The listings only read data, so retrying them is safe.
+    :param retry_interval: the wait before the first retry in seconds, doubled for each further retry.
+    :param hook: called with the stats of each fetched page.
+    """
+    global _page_retries, _page_retry_interval, _page_metrics_hook
+
+    if retries < 0:
+        raise ValueError(f"invalid retries: {retries}")
+    if retry_interval < 0:
+        raise ValueError(f"invalid retry interval: {retry_interval}")
+
+    _page_retries = retries
+    _page_retry_interval = retry_interval
+    _page_metrics_hook = hook
+
+
+def page_retry_policy() -> Tuple[int, float]:
+    return _page_retries, _page_retry_interval
+
+
+def page_stats_enabled() -> bool:
+    return _page_metrics_hook is not None
+
+
+def emit_page_stats(stats: "PageStats") -> None:
+    hook = _page_metrics_hook
+    if hook is None:
+        return
+    try:
+        hook(stats)
+    except Exception as e:
+        log_warning("page metrics hook failed, logid=%s, error=%s", stats.logid, e)
+
+
+# The documented max page size of the list endpoints, by path, as stated by the page_size parameter of their
+# clients: 299 for dataset images is the documented range. {} stands for a path parameter.
+MAX_PAGE_SIZES: Dict[str, int] = {
+    "/v1/audio/voices": 100,
+    "/v1/conversations": 50,
+    "/v1/datasets": 300,
+    "/v1/datasets/{}/images": 299,
+    "/v1/workflows/{}/versions": 30,
+    "/v1/workspaces/{}/members": 50,
+}
+
+# HTTP statuses of a page too large or too slow to build: payload too large, and request and gateway timeouts.
+_PAGE_SIZE_ERROR_CODES = {408, 413, 504}
+# The code of an invalid request parameter, and the names of the page size parameter it is blamed on.
+_INVALID_PARAMETER_CODE = 4000
+_PAGE_SIZE_PARAMETERS = ("page_size", "page size", "limit")
+
+# The ceiling of auto page sizes for the endpoints missing from MAX_PAGE_SIZES.
+_DEFAULT_MAX_PAGE_SIZE = 100
+# A larger page is only kept when it lowers the latency per item by at least this ratio.
+_PAGE_SIZE_GAIN = 0.9
+
+
+def max_page_size(url: str) -> Optional[int]:
+    """
+    The documented max page size of the list endpoint of the url, or None if it is unknown.
+    """
+    path = urlparse(url).path.rstrip("/")
+    for template, size in MAX_PAGE_SIZES.items():
+        pattern = "/".join("[^/]+" if part == "{}" else re.escape(part) for part in template.split("/"))
+        if re.fullmatch(pattern, path):
+            return size
+    return None
+
+
+class _PageSizeTuner(object):
+    """
+    Picks the page size of each request of an auto-sized listing.
+
+    It starts from the max page size of the endpoint, halves the size when a page fails with a timeout or a payload
+    too large error, and doubles it while larger pages lower the latency per item. The size that worked for the
+    first page is the floor of the sizes blamed for invalid page size errors, below it the errors are raised as they
+    are. Other API errors, such as auth or permission errors, are never blamed on the size.
+    """
+
+    def __init__(self, page_size: int, url: str):
+        known_max = max_page_size(url)
+        self._floor = page_size
+        self._ceiling = known_max or max(page_size, _DEFAULT_MAX_PAGE_SIZE)
+        self.size = self._ceiling if known_max else page_size
+        self._best_latency: Optional[float] = None
+
+    def observe(self, size: int, item_count: int, duration: float) -> None:
+        # a short page is the end of the listing, its latency says nothing about the size
+        if item_count < size or item_count == 0:
+            return
+        latency = duration / item_count
+        if self._best_latency is None or latency <= self._best_latency * _PAGE_SIZE_GAIN:
+            self._best_latency = latency
+            self.size = min(size * 2, self._ceiling)
+
+    def shrink(self, size: int, error: Exception) -> bool:
+        """
+        Lower the page size after the page of the size failed with the error.
+
+        :return: whether the page should be requested again with the new size.
+        """
+        if size <= 1 or not _is_page_size_error(error, size > self._floor):
+            return False
+        self._ceiling = size - 1
+        self.size = max(size // 2, 1)
+        log_warning("page size %s failed, retrying with %s, error=%s", size, self.size, error)
+        return True
+
+
+def _is_page_size_error(error: Exception, above_floor: bool) -> bool:
+    if isinstance(error, httpx.TimeoutException):
+        return True
+    if not isinstance(error, CozeAPIError):
+        return False
+    if error.code in _PAGE_SIZE_ERROR_CODES:
+        return True
+    # a size beyond the limit of an endpoint missing from MAX_PAGE_SIZES is rejected as an invalid page size, other
+    # invalid parameters, auth and permission errors are raised as they are
+    return (
+        above_floor
+        and error.code == _INVALID_PARAMETER_CODE
+        and any(name in (error.msg or "").lower() for name in _PAGE_SIZE_PARAMETERS)
+    )
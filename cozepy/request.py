@@ -1,6 +1,8 @@
+import time
 from typing import (
     TYPE_CHECKING,
     Any,
+    Callable,
     Dict,
     List,
     Optional,
@@ -17,14 +19,21 @@ from pydantic import BaseModel
 from typing_extensions import Literal, get_args
 
 from cozepy.config import DEFAULT_CONNECTION_LIMITS, DEFAULT_TIMEOUT
-from cozepy.exception import COZE_PKCE_AUTH_ERROR_TYPE_ENUMS, CozeAPIError, CozePKCEAuthError, CozePKCEAuthErrorType
-from cozepy.log import log_debug, log_warning
+from cozepy.exception import (
+    COZE_PKCE_AUTH_ERROR_TYPE_ENUMS,
+    CozeAPIError,
+    CozePKCEAuthError,
+    CozePKCEAuthErrorType,
+    CozeStreamTimeoutError,
+)
+from cozepy.log import debug_enabled, log_debug, log_payload, log_warning
 from cozepy.model import (
     AsyncIteratorHTTPResponse,
     FileHTTPResponse,
     HTTPRequest,
     IteratorHTTPResponse,
     ListResponse,
+    StreamTimeout,
 )
 from cozepy.version import coze_client_user_agent, user_agent
 
@@ -50,6 +59,56 @@ class AsyncHTTPClient(httpx.AsyncClient):
         super().__init__(**kwargs)
 
 
+def _bind_stream_timeout(
+    request: httpx.Request, stream_timeout: Optional[StreamTimeout], client_timeout: httpx.Timeout, sent_at: float
+) -> Optional[Callable[[Optional[str]], CozeStreamTimeoutError]]:
+    """
+    Bound the wait for the response headers of a stream request by its first pending deadline,
+    and return the factory of the error to raise when the read times out.
+    """
+    expiry = stream_timeout._expiry(sent_at) if stream_timeout is not None else None
+    if expiry is None:
+        return None
+    timeouts = client_timeout.as_dict()
+    remaining = max(expiry[0] - sent_at, 0.0)
+    if client_timeout.read is not None:
+        remaining = min(client_timeout.read, remaining)
+    timeouts["read"] = remaining
+    request.extensions["timeout"] = timeouts
+    return expiry[1]
+
+
+def _release_stream_timeout(request: httpx.Request, client_timeout: httpx.Timeout) -> None:
+    """
+    Restore the client read timeout before the body is read, the stream deadlines are enforced by `Stream` from here.
+    """
+    timeouts = request.extensions.get("timeout")
+    if timeouts is not None:
+        # httpcore looks the read timeout up lazily when the body is read, which TestStreamTimeoutTransport pins
+        timeouts["read"] = client_timeout.read
+
+
+# The error codes worth retrying: HTTP statuses of an overloaded or restarting gateway, and the rate limit and
+# internal error codes of the API.
+_TRANSIENT_CODES = {429, 500, 502, 503, 504, 4013, 5000}
+
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Whether a failed request is worth retrying: a transport error, or an overload or rate limit of the API.
+    """
+    if isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, CozeAPIError) and error.code in _TRANSIENT_CODES
+
+
+def _is_unsent(error: Exception) -> bool:
+    """
+    Whether the request failed before it was sent, so that it can't have had an effect on the server.
+    """
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
 class Requester(object):
     """
     http request helper class.
@@ -84,6 +143,8 @@ class Requester(object):
         cast: Union[Type[T], List[Type[T]], Type[ListResponse[T]], Type[FileHTTPResponse], None] = None,
         data_field: str = "data",
         stream: bool = False,
+        stream_timeout: Optional[StreamTimeout] = None,
+        content: Optional[bytes] = None,
     ) -> HTTPRequest:
         if headers is None:
             headers = {}
@@ -97,7 +158,7 @@ class Requester(object):
             method,
             url,
             params,
-            json,
+            json if content is None else content,
             stream,
             False,
         )
@@ -108,11 +169,13 @@ class Requester(object):
             params=params,
             headers=headers,
             json_body=json,
+            content=content,
             files=files,
             is_async=False,
             stream=stream,
             data_field=data_field,
             cast=cast,
+            stream_timeout=stream_timeout,
         )
 
     async def amake_request(
@@ -126,6 +189,8 @@ class Requester(object):
         cast: Union[Type[T], List[Type[T]], Type[ListResponse[T]], Type[FileHTTPResponse], None] = None,
         data_field: str = "data",
         stream: bool = False,
+        stream_timeout: Optional[StreamTimeout] = None,
+        content: Optional[bytes] = None,
     ) -> HTTPRequest:
         if headers is None:
             headers = {}
@@ -140,7 +205,7 @@ class Requester(object):
             method,
             url,
             params,
-            json,
+            json if content is None else content,
             stream,
             True,
         )
@@ -151,11 +216,13 @@ class Requester(object):
             params=params,
             headers=headers,
             json_body=json,
+            content=content,
             files=files,
             is_async=True,
             stream=stream,
             data_field=data_field,
             cast=cast,
+            stream_timeout=stream_timeout,
         )
 
     @overload
@@ -385,26 +452,50 @@ class Requester(object):
         self,
         request: HTTPRequest,
     ) -> Union[T, List[T], ListResponse[T], IteratorHTTPResponse[str], FileHTTPResponse, None]:
+        sent_at = time.monotonic()
+        httpx_request = request.as_httpx
+        on_timeout = _bind_stream_timeout(httpx_request, request.stream_timeout, self.sync_client.timeout, sent_at)
+        try:
+            response = self.sync_client.send(httpx_request, stream=request.stream)
+        except httpx.ReadTimeout as e:
+            if on_timeout is None:
+                raise
+            raise on_timeout(None) from e
+        if on_timeout is not None:
+            _release_stream_timeout(httpx_request, self.sync_client.timeout)
         return self._parse_response(
             method=request.method,
             url=request.url,
-            response=self.sync_client.send(request.as_httpx, stream=request.stream),
+            response=response,
             cast=request.cast,
             stream=request.stream,
             data_field=request.data_field,
+            sent_at=sent_at,
         )
 
     async def asend(
         self,
         request: HTTPRequest,
     ) -> Union[T, List[T], ListResponse[T], AsyncIteratorHTTPResponse[str], FileHTTPResponse, None]:
+        sent_at = time.monotonic()
+        httpx_request = request.as_httpx
+        on_timeout = _bind_stream_timeout(httpx_request, request.stream_timeout, self.async_client.timeout, sent_at)
+        try:
+            response = await self.async_client.send(httpx_request, stream=request.stream)
+        except httpx.ReadTimeout as e:
+            if on_timeout is None:
+                raise
+            raise on_timeout(None) from e
+        if on_timeout is not None:
+            _release_stream_timeout(httpx_request, self.async_client.timeout)
         return await self._aparse_response(
             method=request.method,
             url=request.url,
-            response=await self.async_client.send(request.as_httpx, stream=request.stream),
+            response=response,
             cast=request.cast,
             stream=request.stream,
             data_field=request.data_field,
+            sent_at=sent_at,
         )
 
     @property
@@ -427,6 +518,7 @@ class Requester(object):
         cast: Union[Type[T], List[Type[T]], Type[ListResponse[T]], Type[FileHTTPResponse], None],
         stream: bool = False,
         data_field: str = "data",
+        sent_at: Optional[float] = None,
     ) -> Union[T, List[T], ListResponse[T], IteratorHTTPResponse[str], FileHTTPResponse, None]:
         # application/json
         # text/event-stream
@@ -436,7 +528,7 @@ class Requester(object):
             resp_content_type = resp_content_type.lower()
         logid = response.headers.get("x-tt-logid")
         if stream and "event-stream" in resp_content_type:
-            return IteratorHTTPResponse(response, response.iter_lines())
+            return IteratorHTTPResponse(response, response.iter_lines(), sent_at=sent_at)
 
         if resp_content_type and "audio" in resp_content_type:
             return FileHTTPResponse(response)  # type: ignore
@@ -474,6 +566,7 @@ class Requester(object):
         cast: Union[Type[T], List[Type[T]], Type[ListResponse[T]], Type[FileHTTPResponse], None],
         stream: bool = False,
         data_field: str = "data",
+        sent_at: Optional[float] = None,
     ) -> Union[T, List[T], ListResponse[T], AsyncIteratorHTTPResponse[str], FileHTTPResponse, None]:
         # application/json
         # text/event-stream
@@ -483,7 +576,7 @@ class Requester(object):
             resp_content_type = resp_content_type.lower()
         logid = response.headers.get("x-tt-logid")
         if stream and "event-stream" in resp_content_type:
-            return AsyncIteratorHTTPResponse(response, response.aiter_lines())
+            return AsyncIteratorHTTPResponse(response, response.aiter_lines(), sent_at=sent_at)
 
         if resp_content_type and "audio" in resp_content_type:
             return FileHTTPResponse(response)  # type: ignore
@@ -520,7 +613,8 @@ class Requester(object):
             response.read()
             body = response.json()
             logid = response.headers.get("x-tt-logid")
-            log_debug("request %s#%s responding, logid=%s, data=%s", method, url, logid, body)
+            if debug_enabled():
+                log_debug("request %s#%s responding, logid=%s, data=%s", method, url, logid, log_payload(body))
         except Exception as e:  # noqa: E722
             raise CozeAPIError(
                 response.status_code,
@@ -536,7 +630,8 @@ class Requester(object):
             await response.aread()
             body = response.json()
             logid = response.headers.get("x-tt-logid")
-            log_debug("request %s#%s responding, logid=%s, data=%s", method, url, logid, body)
+            if debug_enabled():
+                log_debug("request %s#%s responding, logid=%s, data=%s", method, url, logid, log_payload(body))
         except Exception as e:  # noqa: E722
             raise CozeAPIError(
                 response.status_code,
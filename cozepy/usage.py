@@ -0,0 +1,346 @@
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from cozepy.exception import CozeUsageBudgetError
+from cozepy.log import log_warning
+from cozepy.model import CozeModel
+
+if TYPE_CHECKING:
+    from cozepy.chat import Chat, ChatUsage
+
+# The dimensions usage is counted by.
+USAGE_DIMENSIONS = ("bot", "workflow", "user", "tag")
+
+# How many chat ids are remembered, so that a chat seen both in a stream and a retrieve is counted once.
+_SEEN_CHATS = 4096
+
+_usage_tags: "ContextVar[Tuple[str, ...]]" = ContextVar("cozepy_usage_tags", default=())
+
+
+class UsageScope(CozeModel):
+    """
+    What the usage of a request is counted to.
+    """
+
+    # chat or workflow
+    kind: str
+    bot_id: Optional[str] = None
+    workflow_id: Optional[str] = None
+    user_id: Optional[str] = None
+    # The tags set by usage_tags when the request was made.
+    tags: List[str] = []
+
+    def keys(self) -> List[Tuple[str, str]]:
+        keys = [
+            (dimension, key)
+            for dimension, key in (("bot", self.bot_id), ("workflow", self.workflow_id), ("user", self.user_id))
+            if key
+        ]
+        return keys + [("tag", tag) for tag in self.tags]
+
+
+class UsageTotals(CozeModel):
+    # The number of chats and workflow runs counted: a chat when it completes, a workflow run when it is sent.
+    requests: int = 0
+    token_count: int = 0
+    input_count: int = 0
+    output_count: int = 0
+
+
+class UsageSnapshot(CozeModel):
+    """
+    The usage counted in an accounting period, in total and by dimension.
+    """
+
+    total: UsageTotals
+    bots: Dict[str, UsageTotals] = {}
+    workflows: Dict[str, UsageTotals] = {}
+    users: Dict[str, UsageTotals] = {}
+    tags: Dict[str, UsageTotals] = {}
+    # The unix time of the start and the end of the period.
+    started_at: float
+    ended_at: float
+
+
+UsageFlushHook = Callable[[UsageSnapshot], None]
+UsageRequestHook = Callable[[UsageScope, "UsageAccountant"], None]
+
+
+class UsageAccountant(object):
+    """
+    Counts the tokens used by chats and workflow runs, by bot, workflow, user and tag, and enforces token budgets.
+
+    Once installed by setup_usage_accounting, the chat and workflow clients count the usage of completed chats and
+    workflow runs, streams included, and check the budgets of each chat or workflow request before it is sent. Counts
+    and budgets are per accounting period, which flush ends.
+    """
+
+    def __init__(
+        self,
+        *,
+        on_flush: Optional[UsageFlushHook] = None,
+        flush_interval: Optional[float] = None,
+        before_request: Optional[UsageRequestHook] = None,
+    ):
+        """
+        :param on_flush: called with the snapshot of the period that ended, on each flush.
+        :param flush_interval: flush every flush_interval seconds in a background thread, until close.
+        :param before_request: called with the scope of each chat or workflow request before it is sent, after the
+        budgets are checked. Raise to reject the request.
+        """
+        if flush_interval is not None and flush_interval <= 0:
+            raise ValueError(f"invalid flush_interval: {flush_interval}")
+        self._on_flush = on_flush
+        self._before_request = before_request
+        self._lock = threading.Lock()
+        self._total = [0, 0, 0, 0]
+        self._counters: Dict[Tuple[str, str], List[int]] = {}
+        self._budgets: Dict[Tuple[str, str], int] = {}
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._started_at = time.time()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval is not None:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, args=(flush_interval,), name="cozepy-usage", daemon=True
+            )
+            self._flusher.start()
+
+    def set_budget(self, dimension: str, key: str, token_count: Optional[int]) -> None:
+        """
+        Limit the tokens of a bot, workflow, user or tag in each period. Requests of a scope that reached one of its
+        budgets raise CozeUsageBudgetError before they are sent.
+
+        :param dimension: bot, workflow, user or tag.
+        :param key: the id of the bot, workflow or user, or the tag.
+        :param token_count: the max tokens of the period, None to remove the budget.
+        """
+        if dimension not in USAGE_DIMENSIONS:
+            raise ValueError(f"invalid dimension: {dimension}")
+        with self._lock:
+            if token_count is None:
+                self._budgets.pop((dimension, key), None)
+            else:
+                self._budgets[(dimension, key)] = token_count
+
+    def check(self, scope: UsageScope) -> None:
+        """
+        Raise CozeUsageBudgetError if a budget of the scope is used up, and call the before_request hook.
+        """
+        if self._budgets:
+            for dimension_key in scope.keys():
+                budget = self._budgets.get(dimension_key)
+                if budget is None:
+                    continue
+                counter = self._counters.get(dimension_key)
+                used = counter[1] if counter else 0
+                if used >= budget:
+                    raise CozeUsageBudgetError(dimension_key[0], dimension_key[1], budget, used)
+        if self._before_request is not None:
+            self._before_request(scope, self)
+
+    def record(
+        self, scope: UsageScope, usage: Optional["ChatUsage"], chat_id: Optional[str] = None, *, requests: int = 1
+    ) -> None:
+        """
+        Count a usage to the scope.
+
+        :param usage: the tokens used, None for none.
+        :param chat_id: the chat of the usage, a chat is counted once.
+        :param requests: the number of requests the usage is counted as.
+        """
+        if usage is None:
+            values = (requests, 0, 0, 0)
+        else:
+            values = (requests, usage.token_count, usage.input_count, usage.output_count)
+        with self._lock:
+            if chat_id is not None:
+                if chat_id in self._seen:
+                    return
+                self._seen[chat_id] = None
+                if len(self._seen) > _SEEN_CHATS:
+                    self._seen.popitem(last=False)
+            _add(self._total, values)
+            for dimension_key in scope.keys():
+                counter = self._counters.get(dimension_key)
+                if counter is None:
+                    counter = self._counters[dimension_key] = [0, 0, 0, 0]
+                _add(counter, values)
+
+    def used(self, dimension: str, key: str) -> UsageTotals:
+        """
+        The usage of a bot, workflow, user or tag in the current period.
+        """
+        with self._lock:
+            return _totals(self._counters.get((dimension, key), [0, 0, 0, 0]))
+
+    def snapshot(self, reset: bool = False) -> UsageSnapshot:
+        """
+        The usage of the current period.
+
+        :param reset: start a new period.
+        """
+        with self._lock:
+            total, counters, started_at = self._total, self._counters, self._started_at
+            ended_at = time.time()
+            if reset:
+                self._total, self._counters, self._started_at = [0, 0, 0, 0], {}, ended_at
+            else:
+                total, counters = list(total), {k: list(v) for k, v in counters.items()}
+        by_dimension: Dict[str, Dict[str, UsageTotals]] = {dimension: {} for dimension in USAGE_DIMENSIONS}
+        for (dimension, key), counter in counters.items():
+            by_dimension[dimension][key] = _totals(counter)
+        return UsageSnapshot(
+            total=_totals(total),
+            bots=by_dimension["bot"],
+            workflows=by_dimension["workflow"],
+            users=by_dimension["user"],
+            tags=by_dimension["tag"],
+            started_at=started_at,
+            ended_at=ended_at,
+        )
+
+    def flush(self) -> UsageSnapshot:
+        """
+        End the current period, and pass its snapshot to on_flush.
+        """
+        snapshot = self.snapshot(reset=True)
+        if self._on_flush is not None:
+            try:
+                self._on_flush(snapshot)
+            except Exception as e:
+                log_warning("usage flush hook failed, error=%s", e)
+        return snapshot
+
+    def close(self) -> None:
+        """
+        Stop the periodic flush, and flush the last period.
+        """
+        if self._flusher is not None:
+            self._stopped.set()
+            self._flusher.join()
+            self._flusher = None
+            self.flush()
+
+    def _flush_periodically(self, interval: float) -> None:
+        while not self._stopped.wait(interval):
+            self.flush()
+
+
+def _add(counter: List[int], values: Tuple[int, int, int, int]) -> None:
+    for i, value in enumerate(values):
+        counter[i] += value
+
+
+def _totals(counter: List[int]) -> UsageTotals:
+    return UsageTotals(requests=counter[0], token_count=counter[1], input_count=counter[2], output_count=counter[3])
+
+
+_accountant: Optional[UsageAccountant] = None
+
+
+def setup_usage_accounting(accountant: Optional[UsageAccountant]) -> None:
+    """
+    Count the usage of the chats and workflow runs of all clients with the accountant, None to stop counting.
+    """
+    global _accountant
+
+    _accountant = accountant
+
+
+@contextlib.contextmanager
+def usage_tags(*tags: str) -> Iterator[None]:
+    """
+    Count the usage of the chats and workflow runs requested in the block to the tags too, such as a tenant.
+    Nested blocks add their tags to the outer ones.
+    """
+    token = _usage_tags.set(_usage_tags.get() + tags)
+    try:
+        yield
+    finally:
+        _usage_tags.reset(token)
+
+
+def _usage_scope(
+    kind: str, *, bot_id: Optional[str] = None, workflow_id: Optional[str] = None, user_id: Optional[str] = None
+) -> Optional[UsageScope]:
+    """
+    The scope of a new request, checked against the budgets, or None if usage is not counted.
+    """
+    accountant = _accountant
+    if accountant is None:
+        return None
+    scope = UsageScope(kind=kind, bot_id=bot_id, workflow_id=workflow_id, user_id=user_id, tags=list(_usage_tags.get()))
+    accountant.check(scope)
+    return scope
+
+
+def _record_chat(scope: Optional[UsageScope], chat: Optional["Chat"]) -> None:
+    """
+    Count the usage of a chat once it is completed.
+    """
+    accountant = _accountant
+    if accountant is None or chat is None or chat.usage is None or chat.status != "completed":
+        return
+    if scope is None:
+        scope = UsageScope(kind="chat", tags=list(_usage_tags.get()))
+    if scope.bot_id is None and chat.bot_id:
+        scope = scope.model_copy(update={"bot_id": chat.bot_id})
+    accountant.record(scope, chat.usage, chat_id=chat.id)
+
+
+def _record_workflow(scope: Optional[UsageScope], usage: Optional["ChatUsage"]) -> None:
+    accountant = _accountant
+    if accountant is None or scope is None or usage is None:
+        return
+    accountant.record(scope, usage)
+
+
+def _chat_usage_handler(handler: Callable[..., Any], scope: Optional[UsageScope]) -> Callable[..., Any]:
+    """
+    Wrap a chat stream handler to count the usage of the completed chat event.
+    """
+    if _accountant is None:
+        return handler
+
+    def wrapped(data, raw_response):
+        event = handler(data, raw_response)
+        if event is not None and event.chat is not None:
+            _record_chat(scope, event.chat)
+        return event
+
+    return wrapped
+
+
+def _workflow_usage_handler(handler: Callable[..., Any], scope: Optional[UsageScope]) -> Callable[..., Any]:
+    """
+    Wrap the handler of a sent workflow stream to count the run once: as a request right away, and with the usage of
+    its last message carrying one when it ends. Messages may repeat the usage of the run, so it is not summed across
+    them.
+    """
+    accountant = _accountant
+    if accountant is None or scope is None:
+        return handler
+    accountant.record(scope, None)
+    usage: Optional["ChatUsage"] = None
+
+    def wrapped(data, raw_response):
+        nonlocal usage
+        event = handler(data, raw_response)
+        if event is not None and event.message is not None and event.message.usage is not None:
+            usage = event.message.usage
+        # Done isn't passed on by the handler, so the end is read from the raw event
+        if data.get("event") in _WORKFLOW_END_EVENTS and usage is not None:
+            accountant.record(scope, usage, requests=0)
+            usage = None
+        return event
+
+    return wrapped
+
+
+# The events that end a workflow stream: Done, Error and Interrupt, the values of WorkflowEventType.
+_WORKFLOW_END_EVENTS = ("Done", "Error", "Interrupt")
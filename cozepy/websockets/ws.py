@@ -1,7 +1,6 @@
 import abc
 import asyncio
 import json
-import logging
 import queue
 import sys
 import threading
@@ -44,7 +43,7 @@ import websockets.sync.client
 from pydantic import BaseModel
 
 from cozepy.exception import CozeAPIError
-from cozepy.log import log_debug, log_error, log_info, log_warning, logger
+from cozepy.log import EventLogger, debug_enabled, log_debug, log_error, log_info, log_warning
 from cozepy.model import CozeModel, DynamicStrEnum
 from cozepy.request import Requester
 from cozepy.util import get_methods, get_model_default, remove_url_trailing_slash
@@ -231,20 +230,16 @@ class WebsocketsEventFactory(object):
         return event_class.model_validate(event_data)
 
 
-def _log_receive_event(path: str, event_type: Optional[str], data: Union[str, bytes]):
-    if logger.level > logging.DEBUG:
-        return
-    if event_type and event_type == "conversation.audio.delta":
-        message = json.loads(data)
-        if message and message.get("data") and message.get("data", {}).get("content"):
-            message["data"]["content"] = f"<length: {len(message['data']['content'])}>"
-            log_debug("[%s] receive event, type=%s, event=%s", path, event_type, json.dumps(message))
-            return
-    log_debug("[%s] receive event, type=%s, event=%s", path, event_type, data)
+def _log_receive_event(log: EventLogger, event_type: Optional[str], data: Union[str, bytes], message: Dict):
+    if event_type == "conversation.audio.delta" and (message.get("data") or {}).get("content"):
+        # elide the audio content, without touching the message being dispatched
+        content = message["data"]["content"]
+        data = json.dumps(dict(message, data=dict(message["data"], content=f"<length: {len(content)}>")))
+    log.event(data, event_type)
 
 
 def _log_send_event(path: str, event: WebsocketsEvent):
-    if logger.level > logging.DEBUG:
+    if not debug_enabled():
         return
     if event.event_type == WebsocketsEventType.INPUT_AUDIO_BUFFER_APPEND:
         log_debug(
@@ -369,6 +364,7 @@ class WebsocketsBaseClient(abc.ABC):
             self._handle_error(e)
 
     def _receive_loop(self) -> None:
+        log = EventLogger(f"[{self._path}] receive event")
         try:
             while not self._join_event.is_set():
                 if not self._ws:
@@ -379,7 +375,8 @@ class WebsocketsBaseClient(abc.ABC):
                     data = self._ws.recv(timeout=0.5)
                     message = json.loads(data)
                     event_type = message.get("event_type")
-                    _log_receive_event(self._path, event_type, data)
+                    if log.enabled:
+                        _log_receive_event(log, event_type, data, message)
 
                     event = self._parse_event(message)
                     if event:
@@ -590,6 +587,7 @@ class AsyncWebsocketsBaseClient(abc.ABC):
             await self._handle_error(e)
 
     async def _receive_loop(self) -> None:
+        log = EventLogger(f"[{self._path}] receive event")
         try:
             while True:
                 if not self._ws:
@@ -599,7 +597,8 @@ class AsyncWebsocketsBaseClient(abc.ABC):
                 data = await self._ws.recv()
                 message = json.loads(data)
                 event_type = message.get("event_type")
-                _log_receive_event(self._path, event_type, data)
+                if log.enabled:
+                    _log_receive_event(log, event_type, data, message)
 
                 handler = self._on_event.get(event_type)
                 event = self._parse_event(message)
@@ -5,8 +5,9 @@ from cozepy.chat import (
     Message,
     _chat_stream_handler,
 )
-from cozepy.model import AsyncIteratorHTTPResponse, AsyncStream, IteratorHTTPResponse, Stream
+from cozepy.model import AsyncIteratorHTTPResponse, AsyncStream, IteratorHTTPResponse, Stream, StreamTimeout
 from cozepy.request import Requester
+from cozepy.usage import _chat_usage_handler, _usage_scope
 from cozepy.util import remove_none_values, remove_url_trailing_slash
 
 
@@ -25,6 +26,7 @@ class WorkflowsChatClient(object):
         bot_id: Optional[str] = None,
         conversation_id: Optional[str] = None,
         ext: Optional[Dict[str, str]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
     ) -> Stream[ChatEvent]:
         """
@@ -53,6 +55,8 @@ class WorkflowsChatClient(object):
         :param bot_id: 需要关联的智能体 ID
         :param conversation_id: 对话流对应的会话 ID
         :param ext: 用于指定一些额外的字段，例如经纬度、用户ID等
+        :param stream_timeout: first event, idle and total deadlines of the stream, the response is closed and a
+        CozeStreamTimeoutError is raised when one of them expires
         """
         return self._create(
             workflow_id=workflow_id,
@@ -62,6 +66,7 @@ class WorkflowsChatClient(object):
             bot_id=bot_id,
             conversation_id=conversation_id,
             ext=ext,
+            stream_timeout=stream_timeout,
             **kwargs,
         )
 
@@ -75,6 +80,7 @@ class WorkflowsChatClient(object):
         bot_id: Optional[str] = None,
         conversation_id: Optional[str] = None,
         ext: Optional[Dict[str, str]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
     ) -> Stream[ChatEvent]:
         """
@@ -103,6 +109,8 @@ class WorkflowsChatClient(object):
         :param bot_id: 需要关联的智能体 ID
         :param conversation_id: 对话流对应的会话 ID
         :param ext: 用于指定一些额外的字段，例如经纬度、用户ID等
+        :param stream_timeout: first event, idle and total deadlines of the stream, the response is closed and a
+        CozeStreamTimeoutError is raised when one of them expires
         """
         url = f"{self._base_url}/v1/workflows/chat"
         headers: Optional[dict] = kwargs.get("headers")
@@ -117,14 +125,19 @@ class WorkflowsChatClient(object):
                 "ext": ext,
             }
         )
-        response: IteratorHTTPResponse[str] = self._requester.request(
-            "post", url, True, cast=None, headers=headers, body=body
+        scope = _usage_scope("chat", bot_id=bot_id, workflow_id=workflow_id)
+        request = self._requester.make_request(
+            "POST", url, headers=headers, json=body, stream=True, stream_timeout=stream_timeout
         )
+        response: IteratorHTTPResponse[str] = self._requester.send(request)  # type: ignore
         return Stream(
             response._raw_response,
             response.data,
             fields=["event", "data"],
-            handler=_chat_stream_handler,
+            handler=_chat_usage_handler(_chat_stream_handler, scope),
+            timeout=stream_timeout,
+            sent_at=response.sent_at,
+            headers_at=response.headers_at,
         )
 
 
@@ -143,6 +156,7 @@ class AsyncWorkflowsChatClient(object):
         bot_id: Optional[str] = None,
         conversation_id: Optional[str] = None,
         ext: Optional[Dict[str, str]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
     ) -> AsyncIterator[ChatEvent]:
         """
@@ -171,8 +185,10 @@ class AsyncWorkflowsChatClient(object):
         :param bot_id: 需要关联的智能体 ID
         :param conversation_id: 对话流对应的会话 ID
         :param ext: 用于指定一些额外的字段，例如经纬度、用户ID等
+        :param stream_timeout: first event, idle and total deadlines of the stream, the response is closed and a
+        CozeStreamTimeoutError is raised when one of them expires
         """
-        async for item in await self._create(
+        async with await self._create(
             workflow_id=workflow_id,
             additional_messages=additional_messages,
             parameters=parameters,
@@ -180,9 +196,11 @@ class AsyncWorkflowsChatClient(object):
             bot_id=bot_id,
             conversation_id=conversation_id,
             ext=ext,
+            stream_timeout=stream_timeout,
             **kwargs,
-        ):
-            yield item
+        ) as stream:
+            async for item in stream:
+                yield item
 
     async def _create(
         self,
@@ -194,8 +212,9 @@ class AsyncWorkflowsChatClient(object):
         bot_id: Optional[str] = None,
         conversation_id: Optional[str] = None,
         ext: Optional[Dict[str, str]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
-    ) -> AsyncIterator[ChatEvent]:
+    ) -> AsyncStream[ChatEvent]:
         """
         执行对话流
         可选 可选 如果对话流的输入中包含文件、图片等多模态内容，需要先上传多模态内容以获取文件 ID 或 URL 地址，再将其作为对话流的输入。
@@ -222,6 +241,8 @@ class AsyncWorkflowsChatClient(object):
         :param bot_id: 需要关联的智能体 ID
         :param conversation_id: 对话流对应的会话 ID
         :param ext: 用于指定一些额外的字段，例如经纬度、用户ID等
+        :param stream_timeout: first event, idle and total deadlines of the stream, the response is closed and a
+        CozeStreamTimeoutError is raised when one of them expires
         """
         url = f"{self._base_url}/v1/workflows/chat"
         headers: Optional[dict] = kwargs.get("headers")
@@ -236,12 +257,17 @@ class AsyncWorkflowsChatClient(object):
                 "ext": ext,
             }
         )
-        resp: AsyncIteratorHTTPResponse[str] = await self._requester.arequest(
-            "post", url, True, cast=None, headers=headers, body=body
+        scope = _usage_scope("chat", bot_id=bot_id, workflow_id=workflow_id)
+        request = await self._requester.amake_request(
+            "POST", url, headers=headers, json=body, stream=True, stream_timeout=stream_timeout
         )
+        resp: AsyncIteratorHTTPResponse[str] = await self._requester.asend(request)  # type: ignore
         return AsyncStream(
             resp.data,
             fields=["event", "data"],
-            handler=_chat_stream_handler,
+            handler=_chat_usage_handler(_chat_stream_handler, scope),
             raw_response=resp._raw_response,
+            timeout=stream_timeout,
+            sent_at=resp.sent_at,
+            headers_at=resp.headers_at,
         )
@@ -1,11 +1,12 @@
 from enum import Enum
-from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional
 
 import httpx
 
 from cozepy.chat import ChatUsage
-from cozepy.model import AsyncIteratorHTTPResponse, AsyncStream, CozeModel, IteratorHTTPResponse, Stream
+from cozepy.model import AsyncIteratorHTTPResponse, AsyncStream, CozeModel, IteratorHTTPResponse, Stream, StreamTimeout
 from cozepy.request import Requester
+from cozepy.usage import _record_workflow, _usage_scope, _workflow_usage_handler
 from cozepy.util import remove_none_values, remove_url_trailing_slash
 
 if TYPE_CHECKING:
@@ -132,6 +133,135 @@ def _workflow_stream_handler(data: Dict[str, str], raw_response: httpx.Response)
         return WorkflowEvent(id=id, event=WorkflowEventType.UNKNOWN, unknown=data)
 
 
+class WorkflowNodeOutput(CozeModel):
+    # The name of the node that outputs the message.
+    node_title: str
+    # The message ID of the last received message within the node.
+    node_seq_id: str
+    # The content of all messages of the node, joined in order.
+    content: str
+    # Whether the last data packet of the node has been received.
+    node_is_finish: bool = False
+    usage: Optional[ChatUsage] = None
+
+
+class WorkflowStreamSnapshot(CozeModel):
+    # The outputs of the nodes, in the order they started. A node that outputs again after finishing
+    # starts a new entry.
+    nodes: List[WorkflowNodeOutput] = []
+    interrupt: Optional[WorkflowEventInterrupt] = None
+    error: Optional[WorkflowEventError] = None
+
+    @property
+    def content(self) -> str:
+        return "".join(node.content for node in self.nodes)
+
+
+class _NodeBuffer(object):
+    def __init__(self, message: WorkflowEventMessage):
+        self.message = message
+        self.content: List[str] = []
+        self.usage: Optional[ChatUsage] = None
+
+    def add(self, message: WorkflowEventMessage) -> None:
+        self.message = message
+        if message.content:
+            self.content.append(message.content)
+        if message.usage is not None:
+            self.usage = message.usage
+
+    def build(self) -> WorkflowNodeOutput:
+        if len(self.content) > 1:
+            self.content[:] = ["".join(self.content)]
+        return WorkflowNodeOutput(
+            node_title=self.message.node_title,
+            node_seq_id=self.message.node_seq_id,
+            content=self.content[0] if self.content else "",
+            node_is_finish=self.message.node_is_finish,
+            usage=self.usage,
+        )
+
+
+class _BaseWorkflowStreamAccumulator(object):
+    def __init__(self):
+        self._nodes: List[_NodeBuffer] = []
+        self._running: Dict[str, _NodeBuffer] = {}
+        self._interrupt: Optional[WorkflowEventInterrupt] = None
+        self._error: Optional[WorkflowEventError] = None
+
+    def add(self, event: WorkflowEvent) -> None:
+        """
+        Merge one stream event into the accumulated state.
+        """
+        if event.event == WorkflowEventType.MESSAGE and event.message is not None:
+            message = event.message
+            buffer = self._running.get(message.node_title)
+            if buffer is None:
+                buffer = self._running[message.node_title] = _NodeBuffer(message)
+                self._nodes.append(buffer)
+            buffer.add(message)
+            if message.node_is_finish:
+                del self._running[message.node_title]
+        elif event.event == WorkflowEventType.INTERRUPT:
+            self._interrupt = event.interrupt
+        elif event.event == WorkflowEventType.ERROR:
+            self._error = event.error
+
+    def snapshot(self) -> WorkflowStreamSnapshot:
+        """
+        The node outputs accumulated so far, together with the interrupt or error, if any.
+        """
+        return WorkflowStreamSnapshot(
+            nodes=[buffer.build() for buffer in self._nodes],
+            interrupt=self._interrupt,
+            error=self._error,
+        )
+
+
+class WorkflowStreamAccumulator(_BaseWorkflowStreamAccumulator):
+    """
+    Accumulate the events of workflows.runs.stream into per-node outputs.
+    """
+
+    def consume(self, stream: Iterable[WorkflowEvent]) -> Iterator[WorkflowEvent]:
+        """
+        Accumulate the events while passing them through, so the caller can still handle each event.
+        """
+        for event in stream:
+            self.add(event)
+            yield event
+
+    def collect(self, stream: Iterable[WorkflowEvent]) -> WorkflowStreamSnapshot:
+        """
+        Consume the whole stream and return the final snapshot.
+        """
+        for event in stream:
+            self.add(event)
+        return self.snapshot()
+
+
+class AsyncWorkflowStreamAccumulator(_BaseWorkflowStreamAccumulator):
+    """
+    Accumulate the events of the async workflows.runs.stream into per-node outputs.
+    """
+
+    async def consume(self, stream: AsyncIterable[WorkflowEvent]) -> AsyncIterator[WorkflowEvent]:
+        """
+        Accumulate the events while passing them through, so the caller can still handle each event.
+        """
+        async for event in stream:
+            self.add(event)
+            yield event
+
+    async def collect(self, stream: AsyncIterable[WorkflowEvent]) -> WorkflowStreamSnapshot:
+        """
+        Consume the whole stream and return the final snapshot.
+        """
+        async for event in stream:
+            self.add(event)
+        return self.snapshot()
+
+
 class WorkflowsRunsClient(object):
     def __init__(self, base_url: str, requester: Requester):
         self._base_url = remove_url_trailing_slash(base_url)
@@ -154,6 +284,7 @@ class WorkflowsRunsClient(object):
         bot_id: Optional[str] = None,
         app_id: Optional[str] = None,
         ext: Optional[Dict[str, Any]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
     ) -> Stream[WorkflowEvent]:
         """
@@ -182,6 +313,8 @@ class WorkflowsRunsClient(object):
         :param bot_id: 需要关联的智能体 ID
         :param app_id: 该工作流关联的应用的 ID
         :param ext: 用于指定一些额外的字段，非必要可不填写
+        :param stream_timeout: first event, idle and total deadlines of the stream, the response is closed and a
+        CozeStreamTimeoutError is raised when one of them expires
         """
         url = f"{self._base_url}/v1/workflow/stream_run"
         headers: Optional[dict] = kwargs.get("headers")
@@ -194,14 +327,19 @@ class WorkflowsRunsClient(object):
                 "ext": ext,
             }
         )
-        response: IteratorHTTPResponse[str] = self._requester.request(
-            "post", url, True, cast=None, headers=headers, body=body
+        scope = _usage_scope("workflow", bot_id=bot_id, workflow_id=workflow_id)
+        request = self._requester.make_request(
+            "POST", url, headers=headers, json=body, stream=True, stream_timeout=stream_timeout
         )
+        response: IteratorHTTPResponse[str] = self._requester.send(request)  # type: ignore
         return Stream(
             response._raw_response,
             response.data,
             fields=["id", "event", "data"],
-            handler=_workflow_stream_handler,
+            handler=_workflow_usage_handler(_workflow_stream_handler, scope),
+            timeout=stream_timeout,
+            sent_at=response.sent_at,
+            headers_at=response.headers_at,
         )
 
     def create(
@@ -254,7 +392,10 @@ class WorkflowsRunsClient(object):
                 "ext": ext,
             }
         )
-        return self._requester.request("post", url, False, cast=WorkflowRunResult, headers=headers, body=body)
+        scope = _usage_scope("workflow", bot_id=bot_id, workflow_id=workflow_id)
+        result = self._requester.request("post", url, False, cast=WorkflowRunResult, headers=headers, body=body)
+        _record_workflow(scope, result.usage)
+        return result
 
     def resume(
         self,
@@ -292,6 +433,7 @@ class WorkflowsRunsClient(object):
             "resume_data": resume_data,
             "interrupt_type": interrupt_type,
         }
+        scope = _usage_scope("workflow", workflow_id=workflow_id)
         response: IteratorHTTPResponse[str] = self._requester.request(
             "post", url, True, cast=None, headers=headers, body=body
         )
@@ -299,7 +441,9 @@ class WorkflowsRunsClient(object):
             response._raw_response,
             response.data,
             fields=["id", "event", "data"],
-            handler=_workflow_stream_handler,
+            handler=_workflow_usage_handler(_workflow_stream_handler, scope),
+            sent_at=response.sent_at,
+            headers_at=response.headers_at,
         )
 
 
@@ -327,6 +471,7 @@ class AsyncWorkflowsRunsClient(object):
         bot_id: Optional[str] = None,
         app_id: Optional[str] = None,
         ext: Optional[Dict[str, Any]] = None,
+        stream_timeout: Optional[StreamTimeout] = None,
         **kwargs,
     ) -> AsyncIterator[WorkflowEvent]:
         """
@@ -355,6 +500,8 @@ class AsyncWorkflowsRunsClient(object):
         :param bot_id: 需要关联的智能体 ID
         :param app_id: 该工作流关联的应用的 ID
         :param ext: 用于指定一些额外的字段，非必要可不填写
+        :param stream_timeout: first event, idle and total deadlines of the stream, the response is closed and a
+        CozeStreamTimeoutError is raised when one of them expires
         """
         url = f"{self._base_url}/v1/workflow/stream_run"
         headers: Optional[dict] = kwargs.get("headers")
@@ -367,16 +514,22 @@ class AsyncWorkflowsRunsClient(object):
                 "ext": ext,
             }
         )
-        resp: AsyncIteratorHTTPResponse[str] = await self._requester.arequest(
-            "post", url, True, cast=None, headers=headers, body=body
+        scope = _usage_scope("workflow", bot_id=bot_id, workflow_id=workflow_id)
+        request = await self._requester.amake_request(
+            "POST", url, headers=headers, json=body, stream=True, stream_timeout=stream_timeout
         )
-        async for item in AsyncStream(
+        resp: AsyncIteratorHTTPResponse[str] = await self._requester.asend(request)  # type: ignore
+        async with AsyncStream(
             resp.data,
             fields=["id", "event", "data"],
-            handler=_workflow_stream_handler,
+            handler=_workflow_usage_handler(_workflow_stream_handler, scope),
             raw_response=resp._raw_response,
-        ):
-            yield item
+            timeout=stream_timeout,
+            sent_at=resp.sent_at,
+            headers_at=resp.headers_at,
+        ) as stream:
+            async for item in stream:
+                yield item
 
     async def create(
         self,
@@ -427,7 +580,10 @@ class AsyncWorkflowsRunsClient(object):
                 "ext": ext,
             }
         )
-        return await self._requester.arequest("post", url, False, cast=WorkflowRunResult, headers=headers, body=body)
+        scope = _usage_scope("workflow", bot_id=bot_id, workflow_id=workflow_id)
+        result = await self._requester.arequest("post", url, False, cast=WorkflowRunResult, headers=headers, body=body)
+        _record_workflow(scope, result.usage)
+        return result
 
     async def resume(
         self,
@@ -465,13 +621,17 @@ class AsyncWorkflowsRunsClient(object):
             "resume_data": resume_data,
             "interrupt_type": interrupt_type,
         }
+        scope = _usage_scope("workflow", workflow_id=workflow_id)
         resp: AsyncIteratorHTTPResponse[str] = await self._requester.arequest(
             "post", url, True, cast=None, headers=headers, body=body
         )
-        async for item in AsyncStream(
+        async with AsyncStream(
             resp.data,
             fields=["id", "event", "data"],
-            handler=_workflow_stream_handler,
+            handler=_workflow_usage_handler(_workflow_stream_handler, scope),
             raw_response=resp._raw_response,
-        ):
-            yield item
+            sent_at=resp.sent_at,
+            headers_at=resp.headers_at,
+        ) as stream:
+            async for item in stream:
+                yield item
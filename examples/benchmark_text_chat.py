@@ -2,7 +2,6 @@ import asyncio
 import json
 import logging
 import os
-import time
 from typing import List, Optional
 
 from cozepy import (
@@ -13,6 +12,7 @@ from cozepy import (
     Message,
     TokenAuth,
     setup_logging,
+    setup_stream_metrics,
 )
 
 
@@ -46,10 +46,6 @@ def setup_examples_logger():
         setup_logging(logging.getLevelNamesMapping().get(coze_log.upper(), logging.INFO))
 
 
-def get_current_time_ms():
-    return int(time.time() * 1000)
-
-
 setup_examples_logger()
 
 kwargs = json.loads(os.getenv("COZE_KWARGS") or "{}")
@@ -87,17 +83,18 @@ def cal_latency(current: int, latency_list: List[int]) -> str:
 
 
 async def test_latency(coze: Coze, bot_id: str, text: str) -> (str, str, int):
-    start = get_current_time_ms()
-    stream = coze.chat.stream(
+    # Use the stream as a context manager, so the connection is released after returning on the first delta.
+    with coze.chat.stream(
         bot_id=bot_id,
         user_id="user id",
         additional_messages=[
             Message.build_user_question_text(text),
         ],
-    )
-    for event in stream:
-        if event.event == ChatEventType.CONVERSATION_MESSAGE_DELTA:
-            return stream.response.logid, event.message.content, get_current_time_ms() - start
+    ) as stream:
+        for event in stream:
+            if event.event == ChatEventType.CONVERSATION_MESSAGE_DELTA:
+                # The stream records the time from sending the request to the first content delta.
+                return stream.response.logid, event.message.content, int(stream.stats.first_content * 1000)
 
 
 async def main():
@@ -112,6 +109,9 @@ async def main():
         base_url=coze_api_base,
     )
 
+    # Record the timing stats of streams
+    setup_stream_metrics()
+
     times = 100
     text_latency = []
     for i in range(times):
@@ -128,6 +128,32 @@ class TestSyncApiApps:
             assert app.id == f"id_{total_result}"
         assert total_result == total
 
+    def test_sync_api_apps_list_prefetch(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        total = 5
+        for idx in range(total):
+            mock_list_api_app(respx_mock, total_count=total, page=idx + 1)
+        resp = coze.api_apps.list(page_token="1", page_size=1)
+
+        pages = list(resp.iter_pages(prefetch=2))
+        assert [page.items[0].id for page in pages] == [f"id_{i+1}" for i in range(total)]
+
+        # stop early, the background fetch ends with the iteration
+        for page in resp.iter_pages(prefetch=2):
+            break
+
+    def test_sync_api_apps_list_checkpoint(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        total = 3
+        for idx in range(total):
+            mock_list_api_app(respx_mock, total_count=total, page=idx + 1)
+        resp = coze.api_apps.list(page_token="1", page_size=1)
+
+        checkpoint = resp.checkpoint()
+        assert checkpoint.page_token == "2"
+        assert checkpoint.params == {"page_token": "1", "page_size": 1}
+        assert [page.items[0].id for page in resp.resume(checkpoint)] == ["id_2", "id_3"]
+
     def test_sync_api_apps_events(self, respx_mock):
         coze = Coze(auth=TokenAuth(token="token"))
         api_app_id = "app_id"
@@ -208,6 +234,16 @@ class TestAsyncApiApps:
             assert app.id == f"id_{total_result}"
         assert total_result == total
 
+    async def test_async_api_apps_list_prefetch(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        total = 5
+        for idx in range(total):
+            mock_list_api_app(respx_mock, total_count=total, page=idx + 1)
+        resp = await coze.api_apps.list(page_token="1", page_size=1)
+
+        pages = [page async for page in resp.iter_pages(prefetch=2)]
+        assert [page.items[0].id for page in pages] == [f"id_{i+1}" for i in range(total)]
+
     async def test_async_api_apps_events(self, respx_mock):
         coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
         api_app_id = "app_id"
@@ -0,0 +1,88 @@
+import base64
+import io
+import wave
+
+import pytest
+
+from cozepy import AudioSink, Message, MessageContentType, MessageRole
+
+
+def pcm(size: int, value: int = 1) -> bytes:
+    return bytes([value % 256]) * size
+
+
+def test_audio_sink_frames():
+    # 1kHz, 16-bit mono, 10ms frames of 20 bytes
+    sink = AudioSink(frame_ms=10, sample_rate=1000, capacity=32)
+    assert sink.frame_size == 20
+
+    sink.write(pcm(30, 1))
+    frames = [bytes(frame) for frame in sink.frames()]
+    assert frames == [pcm(20, 1)]
+    assert sink.pending == 10
+
+    # base64 deltas, growing past the initial capacity
+    sink.write(base64.b64encode(pcm(50, 2)).decode())
+    frames = [bytes(frame) for frame in sink.frames()]
+    assert frames == [pcm(10, 1) + pcm(10, 2), pcm(20, 2), pcm(20, 2)]
+    assert bytes(sink.flush() or b"") == b""
+    assert sink.flush() is None
+
+    sink.write(pcm(5, 3))
+    assert list(sink.frames()) == []
+    assert bytes(sink.flush() or b"") == pcm(5, 3)
+
+    assert sink.bytes_written == 85
+    assert sink.duration == pytest.approx(0.0425)
+
+
+def test_audio_sink_reuses_buffer():
+    sink = AudioSink(frame_ms=10, sample_rate=1000, capacity=40)
+    for i in range(100):
+        sink.write(pcm(20, i))
+        # a frame still referenced doesn't block the writes
+        frame = next(sink.frames())
+        assert bytes(frame) == pcm(20, i)
+    assert len(sink._buffer) == 40
+
+
+def test_audio_sink_write_message():
+    sink = AudioSink(frame_ms=10, sample_rate=1000)
+    message = Message(
+        role=MessageRole.ASSISTANT,
+        content=base64.b64encode(pcm(20, 7)).decode(),
+        content_type=MessageContentType.AUDIO,
+    )
+    sink.write_message(message)
+    assert [bytes(frame) for frame in sink.frames()] == [message.get_audio()]
+
+
+def test_audio_sink_wav(tmp_path):
+    path = str(tmp_path / "output.wav")
+    with AudioSink(wav=path) as sink:
+        sink.write(pcm(480))
+        # the file is valid while it is written
+        with wave.open(path, "rb") as wav_file:
+            assert wav_file.getnframes() == 240
+        sink.write(pcm(480))
+
+    with wave.open(path, "rb") as wav_file:
+        assert wav_file.getframerate() == 24000
+        assert wav_file.getsampwidth() == 2
+        assert wav_file.getnchannels() == 1
+        assert wav_file.readframes(wav_file.getnframes()) == pcm(960)
+
+    buffer = io.BytesIO()
+    with AudioSink(wav=buffer, sample_rate=16000) as sink:
+        sink.write(pcm(320))
+    buffer.seek(0)
+    with wave.open(buffer, "rb") as wav_file:
+        assert wav_file.getframerate() == 16000
+        assert wav_file.getnframes() == 160
+
+
+def test_audio_sink_invalid():
+    with pytest.raises(ValueError):
+        AudioSink(frame_ms=0)
+    with pytest.raises(ValueError):
+        AudioSink(frame_ms=1, sample_rate=100)
@@ -1,11 +1,14 @@
 import base64
+import itertools
 import os
 import tempfile
+from typing import List
 
 import httpx
 import pytest
 
 from cozepy import (
+    AsyncChatStreamAccumulator,
     AsyncCoze,
     AsyncTokenAuth,
     Chat,
@@ -13,12 +16,18 @@ from cozepy import (
     ChatEvent,
     ChatEventType,
     ChatStatus,
+    ChatStreamAccumulator,
     ChatUsage,
     Coze,
     CozeAPIError,
+    CozeStreamFirstEventTimeoutError,
     Message,
     MessageObjectString,
+    MessageType,
+    PollStrategy,
+    StreamTimeout,
     TokenAuth,
+    setup_stream_metrics,
 )
 from cozepy.util import random_hex, write_pcm_to_wav_file
 from tests.test_util import logid_key, read_file
@@ -149,6 +158,48 @@ def mock_chat_poll(
     return chat_completed, list_message_logid
 
 
+def mock_chat_poll_sequence(respx_mock, statuses: List[ChatStatus], cancel: bool = False):
+    """
+    Mock a chat whose retrieves return the statuses in turn, and the last one from then on. With cancel, the first
+    cancel fails with 4104 and the second one succeeds, otherwise the chat messages are mocked.
+    """
+    responses = [
+        httpx.Response(200, json={"data": make_chat(status=status).model_dump()}, headers={logid_key(): random_hex(10)})
+        for status in statuses
+    ]
+    respx_mock.post("/v3/chat").mock(
+        httpx.Response(200, json={"data": make_chat().model_dump()}, headers={logid_key(): random_hex(10)})
+    )
+    retrieve_route = respx_mock.post("/v3/chat/retrieve").mock(
+        side_effect=lambda request: responses[min(retrieve_route.call_count, len(responses) - 1)]
+    )
+    if not cancel:
+        msg = Message.build_user_question_text("hi")
+        respx_mock.get("/v3/chat/message/list").mock(
+            httpx.Response(200, json={"data": [msg.model_dump()]}, headers={logid_key(): random_hex(10)})
+        )
+        return retrieve_route, None
+
+    cancel_route = respx_mock.post("/v3/chat/cancel").mock(
+        side_effect=[
+            httpx.Response(200, json={"code": 4104, "msg": "can't be canceled"}, headers={logid_key(): random_hex(10)}),
+            httpx.Response(200, json={"data": make_chat().model_dump()}, headers={logid_key(): random_hex(10)}),
+        ]
+    )
+    return retrieve_route, cancel_route
+
+
+FAST_POLL = PollStrategy(initial_interval=0, jitter=0)
+
+
+def test_poll_strategy_intervals():
+    strategy = PollStrategy(initial_interval=0.1, fast_polls=2, multiplier=3, max_interval=1, jitter=0)
+    assert list(itertools.islice(strategy.intervals(), 5)) == pytest.approx([0.1, 0.1, 0.3, 0.9, 1])
+
+    jittered = list(itertools.islice(PollStrategy(initial_interval=1, jitter=0.5).intervals(), 3))
+    assert all(0.5 <= interval <= 1.5 for interval in jittered)
+
+
 class TestMessageObjectString:
     def test_build_image(self):
         with pytest.raises(ValueError, match="file_id or file_url must be specified"):
@@ -177,6 +228,39 @@ class TestSyncChat:
         assert res.response.logid == mock_logid
         assert res.conversation_id == conversation_id
 
+    def test_sync_chat_stream_accumulator(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        mock_chat_stream(respx_mock, read_file("testdata/chat_text_stream_resp.txt"))
+        accumulator = ChatStreamAccumulator()
+        snapshots = [
+            accumulator.snapshot() for _ in accumulator.consume(coze.chat.stream(bot_id="bot", user_id="user"))
+        ]
+
+        assert snapshots[4].answer == "20星期三"
+        snapshot = snapshots[-1]
+        assert len(snapshot.messages) == 1
+        assert snapshot.messages[0].id == "7382159494123470858"
+        assert snapshot.answer == "2024 年 10 月 1 日是星期三。"
+        assert snapshot.status == ChatStatus.COMPLETED
+        assert snapshot.usage.token_count == 633
+
+    def test_sync_chat_stream_stats(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        mock_chat_stream(respx_mock, read_file("testdata/chat_text_stream_resp.txt"))
+        setup_stream_metrics()
+        try:
+            with coze.chat.stream(bot_id="bot", user_id="user") as stream:
+                events = list(stream)
+        finally:
+            setup_stream_metrics(enabled=False)
+
+        stats = stream.stats
+        assert stats.event_count == len(events)
+        assert stats.headers is not None
+        assert stats.first_event <= stats.first_content <= stats.total
+
     def test_sync_chat_stream(self, respx_mock):
         coze = Coze(auth=TokenAuth(token="token"))
 
@@ -275,6 +359,17 @@ class TestSyncChat:
         assert len(events) == 1
         assert events[0].chat.last_error.code == 5000
 
+    def test_sync_chat_stream_timeout(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        mock_chat_stream(respx_mock, read_file("testdata/chat_text_stream_resp.txt"))
+        stream = coze.chat.stream(bot_id="bot", user_id="user", stream_timeout=StreamTimeout(first_event=5, idle=5))
+        assert len(list(stream)) == 8
+
+        respx_mock.post("/v3/chat").mock(side_effect=httpx.ReadTimeout("read timeout"))
+        with pytest.raises(CozeStreamFirstEventTimeoutError):
+            coze.chat.stream(bot_id="bot", user_id="user", stream_timeout=StreamTimeout(first_event=5))
+
     def test_sync_chat_stream_invalid_event(self, respx_mock):
         coze = Coze(auth=TokenAuth(token="token"))
 
@@ -378,10 +473,90 @@ class TestSyncChat:
         assert res.messages
         assert res.messages[0].content == "hi"
 
+    def test_sync_chat_poll_use_stream(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        mock_logid = mock_chat_stream(respx_mock, read_file("testdata/chat_text_stream_resp.txt"))
+        res = coze.chat.create_and_poll(bot_id="bot", user_id="user", use_stream=True)
+
+        assert res.chat.status == ChatStatus.COMPLETED
+        assert res.chat.usage.token_count == 633
+        assert res.messages.response.logid == mock_logid
+        assert [m.content for m in res.messages if m.type == MessageType.ANSWER] == ["2024 年 10 月 1 日是星期三。"]
+
+    def test_sync_chat_poll_use_stream_in_progress(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        # the stream ends while the chat is in progress, so the chat is polled
+        content = read_file("testdata/chat_text_stream_resp.txt").split("event:conversation.message.delta")[0]
+        mock_chat_stream(respx_mock, content)
+        chat_completed = make_chat("7381473525342978089", ChatStatus.COMPLETED)
+        respx_mock.post("/v3/chat/retrieve").mock(httpx.Response(200, json={"data": chat_completed.model_dump()}))
+        msg = Message.build_user_question_text("hi")
+        respx_mock.get("/v3/chat/message/list").mock(httpx.Response(200, json={"data": [msg.model_dump()]}))
+        res = coze.chat.create_and_poll(bot_id="bot", user_id="user", use_stream=True, poll_strategy=FAST_POLL)
+
+        assert res.chat.status == ChatStatus.COMPLETED
+        assert res.messages[0].content == "hi"
+
+    def test_sync_chat_poll_strategy(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        retrieve_route, _ = mock_chat_poll_sequence(
+            respx_mock, [ChatStatus.IN_PROGRESS, ChatStatus.IN_PROGRESS, ChatStatus.COMPLETED]
+        )
+        res = coze.chat.create_and_poll(bot_id="bot", user_id="user", poll_strategy=FAST_POLL)
+
+        assert res.chat.status == ChatStatus.COMPLETED
+        assert retrieve_route.call_count == 3
+        assert res.messages
+
+    def test_sync_chat_poll_timeout(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        retrieve_route, cancel_route = mock_chat_poll_sequence(respx_mock, [ChatStatus.IN_PROGRESS], cancel=True)
+        res = coze.chat.create_and_poll(bot_id="bot", user_id="user", poll_timeout=0, poll_strategy=FAST_POLL)
+
+        # the first cancel fails with 4104, so the chat is retrieved and canceled again
+        assert cancel_route.call_count == 2
+        assert retrieve_route.call_count >= 1
+        assert res.chat.status == ChatStatus.IN_PROGRESS
+        assert res.messages is None
+
 
 @pytest.mark.respx(base_url="https://api.coze.com")
 @pytest.mark.asyncio
 class TestAsyncChatConversationMessage:
+    async def test_async_chat_poll_use_stream(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+
+        mock_logid = mock_chat_stream(respx_mock, read_file("testdata/chat_text_stream_resp.txt"))
+        res = await coze.chat.create_and_poll(bot_id="bot", user_id="user", use_stream=True)
+
+        assert res.chat.status == ChatStatus.COMPLETED
+        assert res.messages.response.logid == mock_logid
+        assert [m.content for m in res.messages if m.type == MessageType.ANSWER] == ["2024 年 10 月 1 日是星期三。"]
+
+    async def test_async_chat_poll(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+
+        retrieve_route, _ = mock_chat_poll_sequence(respx_mock, [ChatStatus.IN_PROGRESS, ChatStatus.COMPLETED])
+        res = await coze.chat.create_and_poll(bot_id="bot", user_id="user", poll_strategy=FAST_POLL)
+
+        assert res.chat.status == ChatStatus.COMPLETED
+        assert retrieve_route.call_count == 2
+        assert res.messages
+        assert res.messages[0].content == "hi"
+
+    async def test_async_chat_poll_timeout(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+
+        _, cancel_route = mock_chat_poll_sequence(respx_mock, [ChatStatus.IN_PROGRESS], cancel=True)
+        res = await coze.chat.create_and_poll(bot_id="bot", user_id="user", poll_timeout=0, poll_strategy=FAST_POLL)
+
+        assert cancel_route.call_count == 2
+        assert res.messages is None
+
     async def test_async_chat_create(self, respx_mock):
         coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
 
@@ -394,6 +569,16 @@ class TestAsyncChatConversationMessage:
         assert res.response.logid == mock_logid
         assert res.conversation_id == conversation_id
 
+    async def test_async_chat_stream_accumulator(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+
+        mock_chat_stream(respx_mock, read_file("testdata/chat_text_stream_resp.txt"))
+        snapshot = await AsyncChatStreamAccumulator().collect(coze.chat.stream(bot_id="bot", user_id="user"))
+
+        assert snapshot.answer == "2024 年 10 月 1 日是星期三。"
+        assert snapshot.status == ChatStatus.COMPLETED
+        assert snapshot.usage.token_count == 633
+
     async def test_async_chat_stream(self, respx_mock):
         coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
 
@@ -478,6 +663,22 @@ class TestAsyncChatConversationMessage:
         assert len(events) == 1
         assert events[0].chat.last_error.code == 5000
 
+    async def test_async_chat_stream_timeout(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+
+        mock_chat_stream(respx_mock, read_file("testdata/chat_text_stream_resp.txt"))
+        stream = coze.chat.stream(bot_id="bot", user_id="user", stream_timeout=StreamTimeout(first_event=5, idle=5))
+        assert len([event async for event in stream]) == 8
+
+        respx_mock.post("/v3/chat").mock(side_effect=httpx.ReadTimeout("read timeout"))
+        with pytest.raises(CozeStreamFirstEventTimeoutError):
+            [
+                event
+                async for event in coze.chat.stream(
+                    bot_id="bot", user_id="user", stream_timeout=StreamTimeout(first_event=5)
+                )
+            ]
+
     async def test_async_chat_stream_invalid_event(self, respx_mock):
         coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
 
@@ -0,0 +1,274 @@
+from typing import Any, List
+
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncBatchChat,
+    AsyncCoze,
+    AsyncTokenAuth,
+    BatchChat,
+    ChatJob,
+    ChatStatus,
+    Coze,
+    Message,
+    TokenAuth,
+)
+from cozepy.chat.batch import _RateLimiter
+from cozepy.util import random_hex
+from tests.test_util import logid_key, read_file
+
+
+class MockChatServer(object):
+    """
+    Serves chat streams, failing the requests listed in fail with the given response or error, and serving the
+    contents listed in contents instead of a completed chat.
+    """
+
+    def __init__(self, respx_mock):
+        self.content = read_file("testdata/chat_text_stream_resp.txt")
+        self.fail = {}
+        self.contents = {}
+        self.requests = 0
+        respx_mock.post("/v3/chat").mock(side_effect=self.chat)
+
+    def chat(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        failure = self.fail.pop(self.requests, None)
+        if isinstance(failure, Exception):
+            raise failure
+        if failure is not None:
+            return failure
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream", logid_key(): random_hex(10)},
+            content=self.contents.pop(self.requests, self.content),
+        )
+
+
+def dropped_stream():
+    """
+    A chat stream whose connection drops after the chat is created.
+    """
+    yield "\n\n".join(read_file("testdata/chat_text_stream_resp.txt").split("\n\n")[:2]).encode() + b"\n\n"
+    raise httpx.ReadError("connection reset")
+
+
+async def async_dropped_stream():
+    for chunk in dropped_stream():
+        yield chunk
+
+
+def lost_stream():
+    """
+    A chat stream whose connection drops before the chat created event, the chat may have been created.
+    """
+    raise httpx.ReadError("connection reset")
+    yield b""
+
+
+def failed_stream() -> str:
+    content = read_file("testdata/chat_text_stream_resp.txt")
+    return content.replace("conversation.chat.completed", "conversation.chat.failed").replace(
+        '"status":"completed"', '"status":"failed"'
+    )
+
+
+def mock_chat_poll(respx_mock, retrieves: List[Any]):
+    """
+    Mock the retrieves of a chat, which return the responses or raise the errors in turn, and its messages.
+    """
+    route = respx_mock.post("/v3/chat/retrieve").mock(side_effect=retrieves)
+    respx_mock.get("/v3/chat/message/list").mock(
+        httpx.Response(
+            200,
+            json={"data": [Message.build_assistant_answer("hi").model_dump()]},
+            headers={logid_key(): random_hex(10)},
+        )
+    )
+    return route
+
+
+def chat_response(status: ChatStatus) -> httpx.Response:
+    chat = {"id": "chat", "conversation_id": "conversation", "status": status.value}
+    return httpx.Response(200, json={"data": chat}, headers={logid_key(): random_hex(10)})
+
+
+def make_jobs(count: int):
+    return [("bot", f"user_{i}", f"question {i}") for i in range(count)]
+
+
+def api_error(code: int) -> httpx.Response:
+    return httpx.Response(200, json={"code": code, "msg": "failed"}, headers={logid_key(): random_hex(10)})
+
+
+def test_rate_limiter():
+    limiter = _RateLimiter(10)
+    waits = [limiter.reserve() for _ in range(3)]
+    assert waits[0] == 0
+    assert waits[2] == pytest.approx(0.2, abs=0.01)
+    assert _RateLimiter(None).reserve() == 0
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+class TestSyncBatchChat:
+    def test_sync_batch_chat(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        MockChatServer(respx_mock)
+
+        results = list(BatchChat(coze.chat, concurrency=3).run(make_jobs(5)))
+
+        assert [result.index for result in results] == [0, 1, 2, 3, 4]
+        assert [result.job_id for result in results] == ["0", "1", "2", "3", "4"]
+        assert all(result.ok for result in results)
+        assert results[0].chat.status == ChatStatus.COMPLETED
+        assert results[0].usage.token_count == 633
+        assert results[0].messages
+        assert results[0].duration > 0
+
+        unordered = list(BatchChat(coze.chat, concurrency=3, ordered=False).run(make_jobs(5)))
+        assert sorted(result.index for result in unordered) == [0, 1, 2, 3, 4]
+
+    def test_sync_batch_chat_retries(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockChatServer(respx_mock)
+        server.fail = {1: httpx.ConnectError("connection reset"), 2: api_error(4013), 4: api_error(4000)}
+
+        results = list(BatchChat(coze.chat, concurrency=1, retry_interval=0).run(make_jobs(2)))
+
+        assert results[0].ok
+        assert results[0].attempts == 3
+        # 4000 is not transient
+        assert not results[1].ok
+        assert results[1].attempts == 1
+        assert "4000" in results[1].error
+
+    def test_sync_batch_chat_checkpoint(self, respx_mock, tmp_path):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockChatServer(respx_mock)
+        server.fail = {2: api_error(4000)}
+        checkpoint = str(tmp_path / "batch.jsonl")
+
+        first = list(BatchChat(coze.chat, concurrency=1, checkpoint=checkpoint).run(make_jobs(3)))
+        assert [result.ok for result in first] == [True, False, True]
+
+        # the failed job and the new ones run again
+        jobs = make_jobs(4) + [
+            ChatJob(id="extra", bot_id="bot", user_id="user", messages=[Message.build_user_question_text("hi")])
+        ]
+        second = list(BatchChat(coze.chat, checkpoint=checkpoint).run(jobs))
+        assert [result.job_id for result in second] == ["1", "3", "extra"]
+        assert server.requests == 6
+
+    def test_sync_batch_chat_resume(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockChatServer(respx_mock)
+        server.contents = {1: dropped_stream()}
+        retrieve = mock_chat_poll(
+            respx_mock, [httpx.ConnectError("connection reset"), chat_response(ChatStatus.COMPLETED)]
+        )
+
+        results = list(BatchChat(coze.chat, retry_interval=0).run(make_jobs(1)))
+
+        # the chat created before the stream dropped is polled, not started again
+        assert results[0].ok
+        assert results[0].attempts == 2
+        assert server.requests == 1
+        assert retrieve.call_count == 2
+
+    def test_sync_batch_chat_no_duplicate(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockChatServer(respx_mock)
+        # the chat may have been created before the response was lost
+        server.fail = {1: httpx.ReadError("connection reset")}
+
+        results = list(BatchChat(coze.chat, retry_interval=0, use_stream=False).run(make_jobs(1)))
+
+        assert not results[0].ok
+        assert results[0].attempts == 1
+        assert server.requests == 1
+
+    def test_sync_batch_chat_stream_no_duplicate(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockChatServer(respx_mock)
+        server.contents = {1: lost_stream()}
+
+        results = list(BatchChat(coze.chat, retry_interval=0).run(make_jobs(1)))
+
+        # the stream dropped after the request was sent, so the chat isn't started again
+        assert not results[0].ok
+        assert results[0].attempts == 1
+        assert server.requests == 1
+
+    def test_sync_batch_chat_failed_resumed(self, respx_mock, tmp_path):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockChatServer(respx_mock)
+        server.contents = {2: failed_stream()}
+        checkpoint = str(tmp_path / "batch.jsonl")
+
+        first = list(BatchChat(coze.chat, concurrency=1, checkpoint=checkpoint).run(make_jobs(2)))
+        assert first[1].error is None
+        assert first[1].chat.status == ChatStatus.FAILED
+        assert [result.ok for result in first] == [True, False]
+
+        # the failed chat isn't checkpointed, it runs again
+        second = list(BatchChat(coze.chat, checkpoint=checkpoint).run(make_jobs(2)))
+        assert [result.job_id for result in second] == ["1"]
+        assert second[0].ok
+
+    def test_sync_batch_chat_invalid(self):
+        coze = Coze(auth=TokenAuth(token="token"))
+        with pytest.raises(ValueError):
+            BatchChat(coze.chat, concurrency=0)
+        with pytest.raises(ValueError):
+            BatchChat(coze.chat, rate_limit=0)
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncBatchChat:
+    async def test_async_batch_chat(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        MockChatServer(respx_mock)
+
+        results = [result async for result in AsyncBatchChat(coze.chat, concurrency=3).run(make_jobs(5))]
+
+        assert [result.index for result in results] == [0, 1, 2, 3, 4]
+        assert all(result.ok for result in results)
+        assert results[0].usage.token_count == 633
+
+        async def jobs():
+            for job in make_jobs(3):
+                yield job
+
+        unordered = [result async for result in AsyncBatchChat(coze.chat, ordered=False).run(jobs())]
+        assert sorted(result.index for result in unordered) == [0, 1, 2]
+
+    async def test_async_batch_chat_retries(self, respx_mock, tmp_path):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockChatServer(respx_mock)
+        server.fail = {1: api_error(5000), 3: api_error(4000)}
+        checkpoint = str(tmp_path / "batch.jsonl")
+
+        batch = AsyncBatchChat(coze.chat, concurrency=1, retry_interval=0, checkpoint=checkpoint)
+        results = [result async for result in batch.run(make_jobs(2))]
+        assert [result.attempts for result in results] == [2, 1]
+        assert [result.ok for result in results] == [True, False]
+
+        results = [result async for result in batch.run(make_jobs(2))]
+        assert [result.job_id for result in results] == ["1"]
+
+    async def test_async_batch_chat_resume(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockChatServer(respx_mock)
+        server.contents = {1: async_dropped_stream()}
+        retrieve = mock_chat_poll(
+            respx_mock, [httpx.ConnectError("connection reset"), chat_response(ChatStatus.COMPLETED)]
+        )
+
+        results = [result async for result in AsyncBatchChat(coze.chat, retry_interval=0).run(make_jobs(1))]
+
+        assert results[0].ok
+        assert results[0].attempts == 2
+        assert server.requests == 1
+        assert retrieve.call_count == 2
@@ -0,0 +1,188 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncCoze,
+    AsyncTokenAuth,
+    ChatCanceller,
+    ChatCancelToken,
+    ChatEventType,
+)
+from cozepy.util import random_hex
+from tests.test_util import logid_key, read_file
+
+CHAT_CREATED = read_file("testdata/chat_text_stream_resp.txt").split("\n\n")[0] + "\n\n"
+
+
+class MockCancelServer(object):
+    """
+    Serves chat streams that stall after the created event unless complete is set, and chat cancels that fail with
+    the responses or errors listed in fail.
+    """
+
+    def __init__(self, respx_mock, complete: bool = False, fail=()):
+        self.complete = complete
+        self.fail = list(fail)
+        self.cancels = []
+        self.closed = asyncio.Event()
+        respx_mock.post("/v3/chat").mock(side_effect=self.chat)
+        if not complete:
+            respx_mock.post("/v3/chat/cancel").mock(side_effect=self.cancel)
+
+    def chat(self, request: httpx.Request) -> httpx.Response:
+        headers = {"content-type": "text/event-stream", logid_key(): random_hex(10)}
+        if self.complete:
+            return httpx.Response(200, headers=headers, content=read_file("testdata/chat_text_stream_resp.txt"))
+        return httpx.Response(200, headers=headers, content=self.stalled_stream())
+
+    def cancel(self, request: httpx.Request) -> httpx.Response:
+        self.cancels.append(json.loads(request.content))
+        if self.fail:
+            failure = self.fail.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return failure
+        return httpx.Response(
+            200,
+            json={"data": {"id": "chat", "conversation_id": "conversation", "status": "canceled"}},
+            headers={logid_key(): random_hex(10)},
+        )
+
+    async def stalled_stream(self):
+        try:
+            yield CHAT_CREATED.encode()
+            await asyncio.sleep(10)
+        finally:
+            self.closed.set()
+
+
+def api_error(code: int) -> httpx.Response:
+    return httpx.Response(200, json={"code": code, "msg": "failed"}, headers={logid_key(): random_hex(10)})
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncChatCanceller:
+    async def test_async_canceller_close(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockCancelServer(respx_mock)
+        cancellations = []
+        canceller = ChatCanceller(coze.chat, on_cancel=cancellations.append)
+
+        stream = canceller.stream(bot_id="bot", user_id="user")
+        event = await stream.__anext__()
+        assert event.event == ChatEventType.CONVERSATION_CHAT_CREATED
+        await stream.aclose()
+        await canceller.aclose()
+
+        assert server.cancels == [{"conversation_id": event.chat.conversation_id, "chat_id": event.chat.id}]
+        assert cancellations[0].reason == "closed"
+        assert cancellations[0].ok
+        assert cancellations[0].chat_id == event.chat.id
+        assert canceller.stats.stopped == 1
+        assert canceller.stats.cancelled == 1
+
+    async def test_async_canceller_token(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockCancelServer(respx_mock)
+        cancellations = []
+        canceller = ChatCanceller(coze.chat, on_cancel=cancellations.append)
+        token = ChatCancelToken()
+
+        async def disconnect():
+            await asyncio.sleep(0.05)
+            token.cancel()
+
+        asyncio.ensure_future(disconnect())
+        events = await asyncio.wait_for(
+            _collect(canceller.stream(bot_id="bot", user_id="user", token=token)),
+            timeout=1,
+        )
+        await canceller.aclose()
+
+        # the stream ends without an error
+        assert [event.event for event in events] == [ChatEventType.CONVERSATION_CHAT_CREATED]
+        assert server.closed.is_set()
+        assert len(server.cancels) == 1
+        assert cancellations[0].reason == "token"
+        assert token.cancelled
+        assert token._waiters == []
+
+    async def test_async_canceller_task(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockCancelServer(respx_mock)
+        cancellations = []
+        canceller = ChatCanceller(coze.chat, on_cancel=cancellations.append)
+
+        task = asyncio.ensure_future(_collect(canceller.stream(bot_id="bot", user_id="user", token=ChatCancelToken())))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await canceller.aclose()
+
+        assert server.closed.is_set()
+        assert len(server.cancels) == 1
+        assert cancellations[0].reason == "task"
+
+    async def test_async_canceller_retries(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockCancelServer(respx_mock, fail=[httpx.ConnectError("connection reset"), api_error(4013)])
+        cancellations = []
+        canceller = ChatCanceller(coze.chat, retry_interval=0.01, on_cancel=cancellations.append)
+
+        await _stop_after_first(canceller.stream(bot_id="bot", user_id="user"))
+        await canceller.aclose()
+
+        assert len(server.cancels) == 3
+        assert cancellations[0].ok
+        assert cancellations[0].attempts == 3
+        assert canceller.stats.retries == 2
+        assert canceller.stats.cancelled == 1
+
+        # errors that aren't transient aren't retried
+        server.fail = [api_error(4000)]
+        await _stop_after_first(canceller.stream(bot_id="bot", user_id="user"))
+        await canceller.aclose()
+
+        assert not cancellations[1].ok
+        assert cancellations[1].attempts == 1
+        assert canceller.stats.failed == 1
+
+    async def test_async_canceller_completed(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        MockCancelServer(respx_mock, complete=True)
+        canceller = ChatCanceller(coze.chat)
+        token = ChatCancelToken()
+
+        events = await _collect(canceller.stream(bot_id="bot", user_id="user", token=token))
+        assert events[-1].event == ChatEventType.CONVERSATION_CHAT_COMPLETED
+
+        # a chat stopped after it completed isn't canceled
+        stream = canceller.stream(bot_id="bot", user_id="user")
+        async for event in stream:
+            if event.event == ChatEventType.CONVERSATION_CHAT_COMPLETED:
+                break
+        await stream.aclose()
+        await canceller.aclose()
+        assert canceller.stats.stopped == 0
+
+        # a cancelled token stops the streams right away
+        token.cancel()
+        assert await _collect(canceller.stream(bot_id="bot", user_id="user", token=token)) == []
+        assert canceller.stats.unknown == 1
+
+        with pytest.raises(ValueError):
+            ChatCanceller(coze.chat, retries=-1)
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+async def _stop_after_first(events):
+    await events.__anext__()
+    await events.aclose()
@@ -0,0 +1,166 @@
+import json
+
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncCoze,
+    AsyncTokenAuth,
+    ChatContext,
+    ChatContextCache,
+    ChatStatus,
+    Coze,
+    Message,
+    MessageRole,
+    TokenAuth,
+)
+from cozepy.util import random_hex
+from tests.test_util import logid_key, read_file
+
+
+def mock_chat_create(respx_mock):
+    return respx_mock.post("/v3/chat").mock(
+        httpx.Response(
+            200,
+            json={"data": {"id": "chat_id", "conversation_id": "conversation_id", "status": "in_progress"}},
+            headers={logid_key(): random_hex(10)},
+        )
+    )
+
+
+def mock_chat_stream(respx_mock):
+    return respx_mock.post("/v3/chat").mock(
+        httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream", logid_key(): random_hex(10)},
+            content=read_file("testdata/chat_text_stream_resp.txt"),
+        )
+    )
+
+
+def test_chat_context_append():
+    context = ChatContext([Message.build_user_question_text("hi")])
+    context.append(
+        Message.build_assistant_answer("hello"),
+        {"role": "user", "type": "question", "content": "bye", "content_type": "text"},
+    )
+
+    assert len(context) == 3
+    assert [message.content for message in context.messages] == ["hi", "hello", "bye"]
+    assert context.messages[1].role == MessageRole.ASSISTANT
+    assert context.tokens == 4
+
+
+def test_chat_context_trim():
+    context = ChatContext(max_messages=3)
+    context.append(*[Message.build_user_question_text(str(i)) for i in range(5)])
+    assert [message.content for message in context.messages] == ["2", "3", "4"]
+
+    context = ChatContext(max_tokens=10, count_tokens=len)
+    context.append(*[Message.build_user_question_text(content) for content in ["aaaa", "bbbb", "cccc"]])
+    assert [message.content for message in context.messages] == ["bbbb", "cccc"]
+    assert context.tokens == 8
+
+    # the newest message is kept over the budget
+    context.append(Message.build_user_question_text("d" * 20))
+    assert [message.content for message in context.messages] == ["d" * 20]
+
+    context.clear()
+    assert len(context) == 0
+    assert context.tokens == 0
+
+    with pytest.raises(ValueError):
+        ChatContext(max_messages=0)
+    with pytest.raises(ValueError):
+        ChatContext(max_tokens=0)
+
+
+def test_chat_context_json_body():
+    context = ChatContext([Message.build_user_question_text("你好")])
+    body = json.loads(context._json_body({"bot_id": "bot", "stream": False}))
+    assert body["bot_id"] == "bot"
+    assert body["stream"] is False
+    assert body["additional_messages"] == [Message.build_user_question_text("你好").model_dump(mode="json")]
+
+    assert json.loads(ChatContext()._json_body({"bot_id": "bot"}))["additional_messages"] == []
+
+
+def test_chat_context_cache():
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [Message.build_user_question_text("from db")]
+
+    cache = ChatContextCache(max_size=2, max_messages=10)
+    context = cache.get("a", load)
+    assert cache.get("a", load) is context
+    assert len(loads) == 1
+    assert [message.content for message in context.messages] == ["from db"]
+
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+    # b is the least recently used
+    assert "b" not in cache
+    assert "a" in cache
+    assert len(cache) == 2
+
+    assert cache.pop("a") is context
+    assert cache.pop("a") is None
+
+    with pytest.raises(ValueError):
+        ChatContextCache(max_size=0)
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+class TestSyncChatContext:
+    def test_sync_chat_create_with_context(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        route = mock_chat_create(respx_mock)
+        context = ChatContext([Message.build_user_question_text("hi"), Message.build_assistant_answer("hello")])
+
+        chat = coze.chat.create(bot_id="bot", user_id="user", additional_messages=context, auto_save_history=False)
+
+        assert chat.id == "chat_id"
+        request = route.calls[0].request
+        assert request.headers["content-type"] == "application/json"
+        body = json.loads(request.content)
+        assert body["auto_save_history"] is False
+        assert [message["content"] for message in body["additional_messages"]] == ["hi", "hello"]
+
+    def test_sync_chat_stream_with_context(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        route = mock_chat_stream(respx_mock)
+        context = ChatContext([Message.build_user_question_text("hi")])
+
+        events = list(coze.chat.stream(bot_id="bot", user_id="user", additional_messages=context))
+
+        assert events[-1].chat.status == ChatStatus.COMPLETED
+        body = json.loads(route.calls[0].request.content)
+        assert body["stream"] is True
+        assert body["additional_messages"][0]["content"] == "hi"
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncChatContext:
+    async def test_async_chat_create_with_context(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        route = mock_chat_create(respx_mock)
+        context = ChatContext([Message.build_user_question_text("hi")])
+
+        chat = await coze.chat.create(bot_id="bot", user_id="user", additional_messages=context)
+
+        assert chat.id == "chat_id"
+        assert json.loads(route.calls[0].request.content)["additional_messages"][0]["content"] == "hi"
+
+    async def test_async_chat_stream_with_context(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        route = mock_chat_stream(respx_mock)
+        context = ChatContext([Message.build_user_question_text("hi")])
+
+        events = [event async for event in coze.chat.stream(bot_id="bot", user_id="user", additional_messages=context)]
+
+        assert events[-1].chat.status == ChatStatus.COMPLETED
+        assert json.loads(route.calls[0].request.content)["additional_messages"][0]["content"] == "hi"
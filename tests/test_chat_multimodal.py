@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncCoze,
+    AsyncMultimodalMessageBuilder,
+    AsyncTokenAuth,
+    Coze,
+    FileIDCache,
+    MessageAttachment,
+    MessageContentType,
+    MessageObjectString,
+    MessageObjectStringType,
+    MultimodalMessageBuilder,
+    TokenAuth,
+)
+from cozepy.util import random_hex
+from tests.test_util import logid_key
+
+
+class MockUploadServer(object):
+    """
+    Uploads files, numbering their ids in the order of the uploads.
+    """
+
+    def __init__(self, respx_mock, delay: float = 0):
+        self.delay = delay
+        self.uploads = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        respx_mock.post("/v1/files/upload").mock(side_effect=self.upload)
+
+    def upload(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.uploads += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            file_id = f"file_{self.uploads}"
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return httpx.Response(200, json={"data": {"id": file_id}}, headers={logid_key(): random_hex(10)})
+
+
+def test_message_attachment(tmp_path):
+    path = tmp_path / "a.png"
+    path.write_bytes(b"png")
+
+    assert MessageAttachment.image(str(path))._read() == ("a.png", b"png")
+    assert MessageAttachment.image(path, file_name="b.png")._read() == ("b.png", b"png")
+    assert MessageAttachment.file(b"pdf")._read() == ("file", b"pdf")
+    assert MessageAttachment.audio("https://example.com/a.mp3").url == "https://example.com/a.mp3"
+    assert MessageAttachment.image(str(path)).url is None
+
+    with pytest.raises(ValueError):
+        MessageAttachment.image(str(tmp_path / "missing.png"))._read()
+    with pytest.raises(ValueError):
+        MessageAttachment(MessageObjectStringType.TEXT, b"text")
+
+
+def test_file_id_cache():
+    cache = FileIDCache(max_size=2)
+    cache.set("a", "file_a")
+    cache.set("b", "file_b")
+    assert cache.get("a") == "file_a"
+    cache.set("c", "file_c")
+    # b is the least recently used
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    cache = FileIDCache(ttl=0)
+    cache.set("a", "file_a")
+    time.sleep(0.001)
+    assert cache.get("a") is None
+
+    with pytest.raises(ValueError):
+        FileIDCache(max_size=0)
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+class TestSyncMultimodalMessageBuilder:
+    def test_sync_build_user_question(self, respx_mock, tmp_path):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockUploadServer(respx_mock, delay=0.1)
+        path = tmp_path / "a.png"
+        path.write_bytes(b"png a")
+        builder = MultimodalMessageBuilder(coze.files)
+
+        started_at = time.monotonic()
+        message = builder.build_user_question(
+            [
+                "compare these",
+                MessageAttachment.image(path),
+                MessageAttachment.image(b"png b"),
+                MessageAttachment.image("https://example.com/c.png"),
+                MessageAttachment.file(b"pdf"),
+                # the same content is uploaded once
+                MessageAttachment.image(b"png b"),
+                MessageObjectString.build_image(file_id="file_x"),
+            ]
+        )
+
+        assert time.monotonic() - started_at < 0.25
+        assert server.uploads == 3
+        assert server.max_active > 1
+        assert message.content_type == MessageContentType.OBJECT_STRING
+        objects = json.loads(message.content)
+        assert objects[0] == {"type": "text", "text": "compare these", "file_id": None, "file_url": None}
+        assert [obj["type"] for obj in objects[1:]] == ["image", "image", "image", "file", "image", "image"]
+        assert objects[3]["file_url"] == "https://example.com/c.png"
+        assert objects[2]["file_id"] == objects[5]["file_id"]
+        assert {objects[1]["file_id"], objects[2]["file_id"], objects[4]["file_id"]} == {"file_1", "file_2", "file_3"}
+        assert objects[6]["file_id"] == "file_x"
+
+        # the uploaded contents are reused
+        objects = builder.build_objects([MessageAttachment.image(path), MessageAttachment.image(b"png b")])
+        assert server.uploads == 3
+        assert [obj.file_id for obj in objects] == [json.loads(message.content)[i]["file_id"] for i in (1, 2)]
+
+    def test_sync_build_types(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockUploadServer(respx_mock)
+        builder = MultimodalMessageBuilder(coze.files)
+
+        objects = builder.build_objects([MessageAttachment.image(b"same"), MessageAttachment.file(b"same")])
+        objects += builder.build_objects([MessageAttachment.file(b"same")])
+
+        # the file id of a content is reused for attachments of the same type only
+        assert server.uploads == 2
+        assert objects[0].file_id != objects[1].file_id
+        assert objects[1].file_id == objects[2].file_id
+
+    def test_sync_build_invalid(self):
+        coze = Coze(auth=TokenAuth(token="token"))
+        with pytest.raises(ValueError):
+            MultimodalMessageBuilder(coze.files, concurrency=0)
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncMultimodalMessageBuilder:
+    async def test_async_build_user_question(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockUploadServer(respx_mock)
+        cache = FileIDCache()
+        builder = AsyncMultimodalMessageBuilder(coze.files, cache=cache, concurrency=2)
+
+        objects = await builder.build_objects(["look", MessageAttachment.image(b"a"), MessageAttachment.audio(b"b")])
+
+        assert server.uploads == 2
+        assert objects[0].text == "look"
+        assert {objects[1].file_id, objects[2].file_id} == {"file_1", "file_2"}
+        assert objects[2].type == MessageObjectStringType.AUDIO
+        assert len(cache) == 2
+
+        # a builder sharing the cache reuses the uploads
+        message = await AsyncMultimodalMessageBuilder(coze.files, cache=cache).build_user_question(
+            [MessageAttachment.image(b"a")]
+        )
+        assert server.uploads == 2
+        assert json.loads(message.content)[0]["file_id"] == objects[1].file_id
+
+    async def test_async_build_reads_off_loop(self, respx_mock, tmp_path, monkeypatch):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        MockUploadServer(respx_mock)
+        path = tmp_path / "a.png"
+        path.write_bytes(b"png")
+        threads = []
+        read = MessageAttachment._read
+
+        def record_read(attachment):
+            threads.append(threading.get_ident())
+            return read(attachment)
+
+        monkeypatch.setattr(MessageAttachment, "_read", record_read)
+        objects = await AsyncMultimodalMessageBuilder(coze.files).build_objects([MessageAttachment.image(path)])
+
+        # the file is read in the executor, not on the event loop
+        assert objects[0].file_id == "file_1"
+        assert threads and threading.get_ident() not in threads
@@ -0,0 +1,184 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncCoze,
+    AsyncTokenAuth,
+    ChatEventType,
+    ChatSpeculator,
+    ChatStatus,
+    Message,
+    SpeculationStats,
+)
+from cozepy.util import random_hex
+from tests.test_util import logid_key, read_file
+
+CHAT_CREATED = read_file("testdata/chat_text_stream_resp.txt").split("\n\n")[0] + "\n\n"
+
+
+class MockSpeculationServer(object):
+    """
+    Serves chat streams, stalling after the created event for the questions listed in stall. With cancel, the chat
+    cancels are mocked too.
+    """
+
+    def __init__(self, respx_mock, stall=(), cancel: bool = False):
+        self.stall = set(stall)
+        self.questions = []
+        self.bodies = []
+        if cancel:
+            self.cancel_route = respx_mock.post("/v3/chat/cancel").mock(
+                httpx.Response(
+                    200,
+                    json={"data": {"id": "chat", "conversation_id": "conversation", "status": "canceled"}},
+                    headers={logid_key(): random_hex(10)},
+                )
+            )
+        respx_mock.post("/v3/chat").mock(side_effect=self.chat)
+
+    def chat(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        question = body["additional_messages"][-1]["content"]
+        self.questions.append(question)
+        self.bodies.append(body)
+        headers = {"content-type": "text/event-stream", logid_key(): random_hex(10)}
+        if question in self.stall:
+            return httpx.Response(200, headers=headers, content=self.stalled_stream())
+        return httpx.Response(200, headers=headers, content=read_file("testdata/chat_text_stream_resp.txt"))
+
+    async def stalled_stream(self):
+        yield CHAT_CREATED.encode()
+        await asyncio.sleep(10)
+
+
+def test_speculation_stats():
+    assert SpeculationStats().hit_rate == 0
+    assert SpeculationStats(hits=3, misses=1).hit_rate == 0.75
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncChatSpeculator:
+    async def test_async_speculator_hit(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockSpeculationServer(respx_mock, stall=["no"], cancel=True)
+        speculator = ChatSpeculator(coze.chat)
+        history = [Message.build_user_question_text("what day is it"), Message.build_assistant_answer("Monday")]
+
+        assert speculator.prefetch(
+            "user", "yes", bot_id="bot", user_id="user", history=history, auto_save_history=False
+        )
+        assert not speculator.prefetch("user", "yes", bot_id="bot", user_id="user", history=history)
+        speculator.prefetch("user", "no", bot_id="bot", user_id="user", history=history, auto_save_history=False)
+        await asyncio.sleep(0.05)
+
+        events = [
+            event
+            async for event in speculator.stream(
+                "user", "yes", bot_id="bot", user_id="user", history=history, auto_save_history=False
+            )
+        ]
+
+        assert events[0].event == ChatEventType.CONVERSATION_CHAT_CREATED
+        assert events[-1].event == ChatEventType.CONVERSATION_CHAT_COMPLETED
+        # the stream was served by the speculation
+        assert server.questions == ["yes", "no"]
+        assert [message["content"] for message in server.bodies[0]["additional_messages"]] == [
+            "what day is it",
+            "Monday",
+            "yes",
+        ]
+        assert server.bodies[0]["auto_save_history"] is False
+        # the other speculation is cancelled, on the server too
+        assert len(speculator) == 0
+        await speculator.aclose()
+        assert server.cancel_route.call_count == 1
+        assert speculator.stats.started == 2
+        assert speculator.stats.hits == 1
+        assert speculator.stats.cancelled == 1
+        assert speculator.stats.saved >= 0.05
+
+    async def test_async_speculator_hit_stopped(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockSpeculationServer(respx_mock, stall=["yes"], cancel=True)
+        speculator = ChatSpeculator(coze.chat)
+
+        speculator.prefetch("user", "yes", bot_id="bot", user_id="user")
+        await asyncio.sleep(0.05)
+        stream = speculator.stream("user", "yes", bot_id="bot", user_id="user")
+        assert (await stream.__anext__()).event == ChatEventType.CONVERSATION_CHAT_CREATED
+        await stream.aclose()
+        await speculator.aclose()
+
+        # the served chat abandoned by the consumer is cancelled on the server
+        assert server.cancel_route.call_count == 1
+        assert speculator.stats.hits == 1
+        assert speculator.stats.cancelled == 0
+
+    async def test_async_speculator_miss(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockSpeculationServer(respx_mock, stall=["a", "b"])
+        speculator = ChatSpeculator(coze.chat, cancel_remote=False)
+
+        speculator.prefetch("user", "a", bot_id="bot", user_id="user")
+        speculator.prefetch("user", "b", bot_id="bot", user_id="user")
+        speculator.prefetch("other", "a", bot_id="bot", user_id="other")
+        await asyncio.sleep(0.05)
+
+        events = [event async for event in speculator.stream("user", "c", bot_id="bot", user_id="user")]
+
+        assert events[-1].chat.status == ChatStatus.COMPLETED
+        assert server.questions == ["a", "b", "a", "c"]
+        # only the speculations of the key are cancelled
+        assert len(speculator) == 1
+        assert speculator.stats.misses == 1
+        assert speculator.stats.cancelled == 2
+        await speculator.aclose()
+        assert len(speculator) == 0
+
+    async def test_async_speculator_policy(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockSpeculationServer(respx_mock, stall=["a", "b"])
+
+        # the oldest speculation is evicted
+        speculator = ChatSpeculator(coze.chat, max_size=1, cancel_remote=False)
+        speculator.prefetch("user", "a", bot_id="bot", user_id="user")
+        speculator.prefetch("user", "b", bot_id="bot", user_id="user")
+        assert len(speculator) == 1
+        assert speculator.stats.cancelled == 1
+        await speculator.aclose()
+
+        # a speculation with other arguments isn't served
+        speculator = ChatSpeculator(coze.chat, cancel_remote=False)
+        speculator.prefetch("user", "yes", bot_id="bot", user_id="user")
+        events = [event async for event in speculator.stream("user", "yes", bot_id="other_bot", user_id="user")]
+        assert events[-1].event == ChatEventType.CONVERSATION_CHAT_COMPLETED
+        assert speculator.stats.misses == 1
+        assert server.bodies[-1]["bot_id"] == "other_bot"
+
+        # a speculation on another history of the same length isn't served
+        speculator = ChatSpeculator(coze.chat, cancel_remote=False)
+        history = [Message.build_user_question_text("what day is it"), Message.build_assistant_answer("Monday")]
+        other = [Message.build_user_question_text("what day is it"), Message.build_assistant_answer("Tuesday")]
+        speculator.prefetch("user", "yes", bot_id="bot", user_id="user", history=history)
+        events = [
+            event async for event in speculator.stream("user", "yes", bot_id="bot", user_id="user", history=other)
+        ]
+        assert events[-1].event == ChatEventType.CONVERSATION_CHAT_COMPLETED
+        assert speculator.stats.misses == 1
+        assert server.bodies[-1]["additional_messages"][1]["content"] == "Tuesday"
+
+        # expired speculations are cancelled
+        speculator = ChatSpeculator(coze.chat, ttl=0, cancel_remote=False)
+        speculator.prefetch("user", "a", bot_id="bot", user_id="user")
+        await asyncio.sleep(0.01)
+        speculator.prefetch("user", "b", bot_id="bot", user_id="user")
+        assert len(speculator) == 1
+        assert speculator.stats.cancelled == 1
+        await speculator.aclose()
+
+        with pytest.raises(ValueError):
+            ChatSpeculator(coze.chat, max_size=0)
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncCoze,
+    AsyncTokenAuth,
+    ChatEventType,
+    ChatRequiredAction,
+    ChatTools,
+    Coze,
+    TokenAuth,
+)
+from cozepy.util import random_hex
+from tests.test_util import logid_key, read_file
+
+
+def make_tool_calls(*calls):
+    return [
+        {"id": f"call_{i}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+        for i, (name, arguments) in enumerate(calls)
+    ]
+
+
+def make_required_action(*calls) -> ChatRequiredAction:
+    return ChatRequiredAction.model_validate(
+        {"type": "submit_tool_outputs", "submit_tool_outputs": {"tool_calls": make_tool_calls(*calls)}}
+    )
+
+
+def requires_action_stream(*calls) -> str:
+    chat = {
+        "id": "chat_id",
+        "conversation_id": "conversation_id",
+        "bot_id": "bot_id",
+        "status": "requires_action",
+        "required_action": {
+            "type": "submit_tool_outputs",
+            "submit_tool_outputs": {"tool_calls": make_tool_calls(*calls)},
+        },
+    }
+    return f'event:conversation.chat.requires_action\ndata:{json.dumps(chat)}\n\nevent:done\ndata:"[DONE]"\n\n'
+
+
+def mock_tool_chat(respx_mock, *calls):
+    """
+    Mock a chat that requires the tool calls, and completes once their outputs are submitted.
+    """
+    headers = {"content-type": "text/event-stream", logid_key(): random_hex(10)}
+    respx_mock.post("/v3/chat").mock(httpx.Response(200, headers=headers, content=requires_action_stream(*calls)))
+    return respx_mock.post("/v3/chat/submit_tool_outputs").mock(
+        httpx.Response(200, headers=headers, content=read_file("testdata/chat_text_stream_resp.txt"))
+    )
+
+
+def make_tools() -> ChatTools:
+    tools = ChatTools(timeout=0.5)
+
+    @tools.register
+    def get_weather(city: str) -> dict:
+        time.sleep(0.2)
+        return {"city": city, "weather": "sunny"}
+
+    @tools.register(name="schedule")
+    async def get_schedule() -> str:
+        await asyncio.sleep(0.2)
+        return "two interviews"
+
+    @tools.register(timeout=0.05)
+    def slow() -> str:
+        time.sleep(0.3)
+        return "too late"
+
+    @tools.register
+    def broken() -> str:
+        raise RuntimeError("broken")
+
+    return tools
+
+
+CALLS = [("get_weather", {"city": "Beijing"}), ("schedule", {}), ("slow", {}), ("broken", {}), ("missing", {})]
+
+
+def check_outputs(outputs):
+    assert [output.tool_call_id for output in outputs] == [f"call_{i}" for i in range(len(CALLS))]
+    assert json.loads(outputs[0].output) == {"city": "Beijing", "weather": "sunny"}
+    assert outputs[1].output == "two interviews"
+    assert "timed out" in json.loads(outputs[2].output)["error"]
+    assert json.loads(outputs[3].output) == {"error": "broken"}
+    assert json.loads(outputs[4].output) == {"error": "unknown tool: missing"}
+
+
+def test_chat_tools_run():
+    tools = make_tools()
+    started_at = time.monotonic()
+    outputs = tools.run(make_required_action(*CALLS))
+    tools.close()
+
+    check_outputs(outputs)
+    # the tools ran concurrently
+    assert time.monotonic() - started_at < 0.35
+
+
+@pytest.mark.asyncio
+async def test_chat_tools_arun():
+    started_at = time.monotonic()
+    outputs = await make_tools().arun(make_required_action(*CALLS))
+
+    check_outputs(outputs)
+    assert time.monotonic() - started_at < 0.35
+
+
+def test_chat_tools_run_queued():
+    tools = ChatTools(timeout=0.2, concurrency=1)
+
+    @tools.register
+    def wait() -> str:
+        time.sleep(0.15)
+        return "done"
+
+    outputs = tools.run(make_required_action(("wait", {}), ("wait", {})))
+    tools.close()
+
+    # the second call waited for the first one, its timeout counts from its start
+    assert [output.output for output in outputs] == ["done", "done"]
+
+
+def test_chat_tools_invalid():
+    with pytest.raises(ValueError):
+        ChatTools(concurrency=0)
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+class TestSyncChatTools:
+    def test_sync_stream_with_tools(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        submit_route = mock_tool_chat(respx_mock, *CALLS)
+        tools = make_tools()
+
+        events = list(coze.chat.stream_with_tools(tools, bot_id="bot", user_id="user"))
+        tools.close()
+
+        assert events[0].event == ChatEventType.CONVERSATION_CHAT_REQUIRES_ACTION
+        assert events[-1].event == ChatEventType.CONVERSATION_CHAT_COMPLETED
+        body = json.loads(submit_route.calls[0].request.content)
+        assert [output["tool_call_id"] for output in body["tool_outputs"]] == [f"call_{i}" for i in range(len(CALLS))]
+        assert submit_route.calls[0].request.url.params["chat_id"] == "chat_id"
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncChatTools:
+    async def test_async_stream_with_tools(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        submit_route = mock_tool_chat(respx_mock, *CALLS)
+
+        events = [event async for event in coze.chat.stream_with_tools(make_tools(), bot_id="bot", user_id="user")]
+
+        assert events[0].event == ChatEventType.CONVERSATION_CHAT_REQUIRES_ACTION
+        assert events[-1].event == ChatEventType.CONVERSATION_CHAT_COMPLETED
+        assert submit_route.call_count == 1
@@ -1,7 +1,7 @@
 import httpx
 import pytest
 
-from cozepy import AsyncCoze, AsyncTokenAuth, Coze, Message, TokenAuth
+from cozepy import AsyncCoze, AsyncTokenAuth, Coze, Message, PageCheckpoint, PageCheckpointType, TokenAuth
 from cozepy.util import random_hex
 from tests.test_util import logid_key
 
@@ -124,6 +124,36 @@ class TestConversationMessage:
             assert message.content == f"id_{total_result}"
         assert total_result == total
 
+    def test_sync_conversations_messages_list_prefetch(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        total = 10
+        for idx in range(total):
+            mock_list_conversations_messages(respx_mock, total_count=total, page=idx + 1)
+
+        resp = coze.conversations.messages.list(conversation_id="", after_id="", limit=1)
+        pages = list(resp.iter_pages(prefetch=3))
+        assert [page.items[0].content for page in pages] == [f"id_{idx + 1}" for idx in range(total)]
+        assert len(respx_mock.calls) == total
+
+    def test_sync_conversations_messages_list_checkpoint(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        total = 4
+        for idx in range(total):
+            mock_list_conversations_messages(respx_mock, total_count=total, page=idx + 1)
+
+        resp = coze.conversations.messages.list(conversation_id="", after_id="", limit=1)
+        checkpoint = resp.checkpoint()
+        assert checkpoint.type == PageCheckpointType.LAST_ID
+        assert checkpoint.after_id == "id_1"
+
+        pages = list(resp.resume(checkpoint))
+        assert [page.items[0].content for page in pages] == ["id_2", "id_3", "id_4"]
+
+        with pytest.raises(ValueError, match="invalid checkpoint type"):
+            list(resp.resume(PageCheckpoint(type=PageCheckpointType.NUMBER, page_num=1)))
+
     def test_sync_conversations_messages_retrieve(self, respx_mock):
         coze = Coze(auth=TokenAuth(token="token"))
 
@@ -205,6 +235,18 @@ class TestAsyncConversationMessage:
             assert message.content == f"id_{total_result}"
         assert total_result == total
 
+    async def test_async_conversations_messages_list_prefetch(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+
+        total = 10
+        for idx in range(total):
+            mock_list_conversations_messages(respx_mock, total_count=total, page=idx + 1)
+
+        resp = await coze.conversations.messages.list(conversation_id="", after_id="", limit=1)
+        pages = [page async for page in resp.iter_pages(prefetch=3)]
+        assert [page.items[0].content for page in pages] == [f"id_{idx + 1}" for idx in range(total)]
+        assert len(respx_mock.calls) == total
+
     async def test_async_conversations_messages_retrieve(self, respx_mock):
         coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
 
@@ -0,0 +1,154 @@
+import json
+
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncCoze,
+    AsyncMessageSync,
+    AsyncTokenAuth,
+    Coze,
+    Message,
+    MessageSync,
+    SQLiteMessageStore,
+    TokenAuth,
+)
+from cozepy.util import random_hex
+from tests.test_util import logid_key
+
+
+def build_message(idx: int) -> Message:
+    msg = Message.build_user_question_text(f"content_{idx}")
+    msg.id = f"id_{idx}"
+    msg.created_at = idx
+    return msg
+
+
+class MockMessages(object):
+    """
+    A conversation on the server, listed newest first, one message per page.
+    """
+
+    def __init__(self, respx_mock, total: int):
+        self.total = total
+        self.calls = 0
+        respx_mock.post("/v1/conversation/message/list").mock(side_effect=self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        body = json.loads(request.content)
+        start = int(body["after_id"][3:]) - 1 if body["after_id"] else self.total
+        msg = build_message(start)
+        return httpx.Response(
+            200,
+            json={
+                "first_id": msg.id,
+                "last_id": msg.id,
+                "has_more": start > 1,
+                "data": [msg.model_dump()],
+            },
+            headers={logid_key(): random_hex(10)},
+        )
+
+
+def mock_listing(respx_mock, messages):
+    """
+    A conversation on the server that lists the messages on one page, in the given order.
+    """
+    return respx_mock.post("/v1/conversation/message/list").mock(
+        side_effect=lambda request: httpx.Response(
+            200,
+            json={
+                "first_id": messages[0].id,
+                "last_id": messages[-1].id,
+                "has_more": False,
+                "data": [msg.model_dump() for msg in messages],
+            },
+            headers={logid_key(): random_hex(10)},
+        )
+    )
+
+
+def test_sqlite_message_store(tmp_path):
+    path = str(tmp_path / "messages.db")
+    store = SQLiteMessageStore(path)
+    assert store.latest("c") is None
+    store.save("c", [build_message(1), build_message(2)])
+    store.save("c", [build_message(3)])
+    store.close()
+
+    store = SQLiteMessageStore(path)
+    assert store.latest("c").id == "id_3"
+    assert [m.id for m in store.load("c")] == ["id_1", "id_2", "id_3"]
+    assert [m.id for m in store.load("c", limit=2)] == ["id_2", "id_3"]
+    assert store.load("other") == []
+
+    # an edited message keeps its position
+    edited = build_message(2)
+    edited.content = "edited"
+    store.save("c", [edited])
+    assert [m.content for m in store.load("c")] == ["content_1", "edited", "content_3"]
+    assert store.latest("c").id == "id_3"
+
+    # the messages of the newest second
+    same_second = build_message(4)
+    same_second.created_at = 3
+    store.save("c", [same_second])
+    assert [m.id for m in store.newest("c")] == ["id_3", "id_4"]
+    assert store.newest("other") == []
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+class TestSyncMessageSync:
+    def test_sync_message_sync(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockMessages(respx_mock, total=3)
+        sync = MessageSync(coze.conversations.messages, limit=1)
+
+        assert [m.id for m in sync.sync("c")] == ["id_1", "id_2", "id_3"]
+        assert server.calls == 3
+
+        # nothing new, a single page request
+        assert sync.sync("c") == []
+        assert server.calls == 4
+
+        server.total = 5
+        assert [m.id for m in sync.messages("c")] == ["id_1", "id_2", "id_3", "id_4", "id_5"]
+        assert server.calls == 7
+        assert [m.id for m in sync.messages("c", limit=1, sync=False)] == ["id_5"]
+        assert server.calls == 7
+
+    def test_sync_message_sync_same_second(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        messages = [build_message(1), build_message(2), build_message(3)]
+        messages[2].created_at = 2
+        store = SQLiteMessageStore()
+        store.save("c", messages)
+        sync = MessageSync(coze.conversations.messages, store)
+
+        # the server lists the messages of a second in another order than they were stored
+        listing = [messages[1], messages[2], messages[0]]
+        mock_listing(respx_mock, listing)
+        assert sync.sync("c") == []
+
+        # a new message of the same second is still new
+        new = build_message(4)
+        new.created_at = 2
+        listing.insert(0, new)
+        assert [m.id for m in sync.sync("c")] == ["id_4"]
+        assert sync.sync("c") == []
+        assert [m.id for m in store.load("c")] == ["id_1", "id_2", "id_3", "id_4"]
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncMessageSync:
+    async def test_async_message_sync(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockMessages(respx_mock, total=2)
+        sync = AsyncMessageSync(coze.conversations.messages, limit=1)
+
+        assert [m.id for m in await sync.sync("c")] == ["id_1", "id_2"]
+        server.total = 3
+        assert [m.id for m in await sync.sync("c")] == ["id_3"]
+        assert [m.id for m in await sync.messages("c", sync=False)] == ["id_1", "id_2", "id_3"]
@@ -17,6 +17,7 @@ from cozepy import (
     DocumentStatus,
     DocumentUpdateRule,
     DocumentUpdateType,
+    PageCheckpoint,
     TokenAuth,
 )
 from cozepy.util import random_hex
@@ -197,6 +198,49 @@ class TestSyncDatasetsDocuments:
             assert document.document_id == f"id_{total_result}"
         assert total_result == total
 
+    def test_sync_datasets_documents_list_parallel(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        total = 10
+        for idx in range(total):
+            mock_list_datasets_documents(respx_mock, total_count=total, page=idx + 1)
+
+        resp = coze.datasets.documents.list(dataset_id="id", page_num=1, page_size=1)
+        pages = list(resp.iter_pages(concurrency=4))
+
+        assert [page.page_num for page in pages] == list(range(1, total + 1))
+        assert [page.items[0].document_id for page in pages] == [f"id_{idx + 1}" for idx in range(total)]
+        assert len(respx_mock.calls) == total
+
+        # stop early
+        for page in resp.iter_pages(concurrency=4):
+            if page.page_num == 2:
+                break
+
+    def test_sync_datasets_documents_list_checkpoint(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        total = 5
+        for idx in range(total):
+            mock_list_datasets_documents(respx_mock, total_count=total, page=idx + 1)
+
+        resp = coze.datasets.documents.list(dataset_id="id", page_num=1, page_size=1)
+        checkpoint = None
+        for page in resp.iter_pages():
+            checkpoint = page.checkpoint().model_dump_json()
+            if page.page_num == 2:
+                break
+        checkpoint = PageCheckpoint.model_validate_json(checkpoint)
+        assert checkpoint.page_num == 3
+        assert checkpoint.page_size == 1
+        assert checkpoint.body["dataset_id"] == "id"
+
+        resp = coze.datasets.documents.list(dataset_id="id", page_num=1, page_size=1)
+        pages = list(resp.resume(checkpoint))
+        assert [page.items[0].document_id for page in pages] == ["id_3", "id_4", "id_5"]
+        assert not pages[-1].checkpoint().has_more
+        assert list(resp.resume(pages[-1].checkpoint())) == []
+
 
 @pytest.mark.respx(base_url="https://api.coze.com")
 @pytest.mark.asyncio
@@ -319,3 +363,31 @@ class TestAsyncDatasetsDocuments:
             document = page.items[0]
             assert document.document_id == f"id_{total_result}"
         assert total_result == total
+
+    async def test_async_datasets_documents_list_parallel(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+
+        total = 10
+        for idx in range(total):
+            mock_list_datasets_documents(respx_mock, total_count=total, page=idx + 1)
+
+        resp = await coze.datasets.documents.list(dataset_id="id", page_num=1, page_size=1)
+        pages = [page async for page in resp.iter_pages(concurrency=4)]
+
+        assert [page.page_num for page in pages] == list(range(1, total + 1))
+        assert [page.items[0].document_id for page in pages] == [f"id_{idx + 1}" for idx in range(total)]
+        assert len(respx_mock.calls) == total
+
+    async def test_async_datasets_documents_list_checkpoint(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+
+        total = 5
+        for idx in range(total):
+            mock_list_datasets_documents(respx_mock, total_count=total, page=idx + 1)
+
+        resp = await coze.datasets.documents.list(dataset_id="id", page_num=1, page_size=1)
+        checkpoint = resp.checkpoint()
+        assert checkpoint.page_num == 2
+
+        pages = [page async for page in resp.resume(checkpoint)]
+        assert [page.items[0].document_id for page in pages] == ["id_2", "id_3", "id_4", "id_5"]
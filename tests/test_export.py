@@ -0,0 +1,118 @@
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+from typing import Dict, List
+
+import httpx
+import pytest
+
+from cozepy import AsyncCoze, AsyncTokenAuth, Coze, TokenAuth, aexport_csv, aexport_jsonl, export_csv, export_jsonl
+from cozepy.export import _csv_row
+from cozepy.model import CozeModel
+from cozepy.util import random_hex
+from tests.test_api_apps import mock_list_api_app
+from tests.test_util import logid_key
+
+
+def mock_list(respx_mock, total):
+    for idx in range(total):
+        mock_list_api_app(respx_mock, total_count=total, page=idx + 1)
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+class TestSyncExport:
+    def test_sync_export_jsonl(self, respx_mock, tmp_path):
+        coze = Coze(auth=TokenAuth(token="token"))
+        mock_list(respx_mock, 3)
+        path = tmp_path / "apps.jsonl"
+
+        assert export_jsonl(coze.api_apps.list(page_token="1", page_size=1), path) == 3
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["id"] for line in lines] == ["id_1", "id_2", "id_3"]
+
+    def test_sync_export_jsonl_compression(self, respx_mock, tmp_path):
+        coze = Coze(auth=TokenAuth(token="token"))
+        mock_list(respx_mock, 2)
+
+        path = tmp_path / "apps.jsonl.gz"
+        assert export_jsonl(coze.api_apps.list(page_token="1", page_size=1), path) == 2
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert [json.loads(line)["id"] for line in f] == ["id_1", "id_2"]
+
+        buf = io.BytesIO()
+        assert export_jsonl(coze.api_apps.list(page_token="1", page_size=1), buf, compression="bz2") == 2
+        assert not buf.closed
+        assert len(bz2.decompress(buf.getvalue()).splitlines()) == 2
+
+        with pytest.raises(ValueError):
+            export_jsonl(coze.api_apps.list(page_token="1", page_size=1), buf, compression="zip")
+
+    def test_sync_export_jsonl_raw(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        respx_mock.get("https://api.coze.com/v1/api_apps").mock(
+            httpx.Response(
+                200,
+                json={
+                    "items": [
+                        {"id": "id_1", "name": "a", "app_type": "normal", "verify_token": "t", "undeclared": {"x": 1}},
+                        {"id": "id_2", "name": "b", "app_type": "normal", "verify_token": "t"},
+                    ],
+                    "next_page_token": "",
+                    "has_more": False,
+                },
+                headers={logid_key(): random_hex(10)},
+            )
+        )
+        buf = io.BytesIO()
+
+        assert export_jsonl(coze.api_apps.list(page_size=2), buf, raw=True) == 2
+        rows = [json.loads(line) for line in buf.getvalue().splitlines()]
+        # the items as the server returned them, with the fields the model doesn't declare
+        assert rows == [
+            {"id": "id_1", "name": "a", "app_type": "normal", "verify_token": "t", "undeclared": {"x": 1}},
+            {"id": "id_2", "name": "b", "app_type": "normal", "verify_token": "t"},
+        ]
+
+    def test_sync_export_csv(self, respx_mock, tmp_path):
+        coze = Coze(auth=TokenAuth(token="token"))
+        mock_list(respx_mock, 3)
+        path = tmp_path / "apps.csv"
+
+        assert export_csv(coze.api_apps.list(page_token="1", page_size=1), path, fields=["id", "name"]) == 3
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert rows == [{"id": f"id_{i}", "name": "app_name"} for i in range(1, 4)]
+
+
+def test_csv_row_nested():
+    class Item(CozeModel):
+        id: str
+        meta: Dict[str, str]
+        tags: List[str]
+
+    row = _csv_row(Item(id="1", meta={"k": "v"}, tags=["a"]))
+    assert row == {"id": "1", "meta": '{"k": "v"}', "tags": '["a"]'}
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncExport:
+    async def test_async_export_jsonl(self, respx_mock, tmp_path):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        mock_list(respx_mock, 3)
+        path = tmp_path / "apps.jsonl.xz"
+
+        assert await aexport_jsonl(await coze.api_apps.list(page_token="1", page_size=1), path) == 3
+        with lzma.open(path, "rt", encoding="utf-8") as f:
+            assert [json.loads(line)["id"] for line in f] == ["id_1", "id_2", "id_3"]
+
+    async def test_async_export_csv(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        mock_list(respx_mock, 2)
+        buf = io.BytesIO()
+
+        assert await aexport_csv(await coze.api_apps.list(page_token="1", page_size=1), buf, fields=["id"]) == 2
+        assert buf.getvalue().decode("utf-8").splitlines() == ["id", "id_1", "id_2"]
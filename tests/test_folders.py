@@ -1,3 +1,5 @@
+import time
+
 import httpx
 import pytest
 
@@ -140,3 +142,103 @@ class TestAsyncFolders:
         assert resp
         assert resp.id == folder.id
         assert resp.response.logid == folder._raw_response.headers[logid_key()]
+
+
+class MockFolderTree(object):
+    """
+    A folder tree on the server: root -> a, b; a -> a1 (no children_count); b is a known leaf.
+    """
+
+    def __init__(self, respx_mock):
+        self.listed = []
+        # seconds the listing of a folder takes
+        self.delays = {}
+        self.children = {
+            None: [self.folder("a", None, 1), self.folder("b", None, 0)],
+            "a": [self.folder("a1", "a", None)],
+            "a1": [],
+        }
+        respx_mock.get("/v1/folders").mock(side_effect=self.handle)
+
+    @staticmethod
+    def folder(id, parent_folder_id, children_count):
+        return SimpleFolder(
+            id=id,
+            name=f"name_{id}",
+            description="",
+            workspace_id="workspace_id",
+            creator_user_id="user",
+            folder_type=FolderType.DEVELOPMENT,
+            parent_folder_id=parent_folder_id,
+            children_count=children_count,
+        )
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        parent = request.url.params.get("parent_folder_id")
+        self.listed.append(parent)
+        time.sleep(self.delays.get(parent, 0))
+        items = self.children[parent]
+        return httpx.Response(
+            200,
+            json={"data": {"items": [i.model_dump() for i in items], "total_count": len(items)}},
+            headers={logid_key(): random_hex(10)},
+        )
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+class TestSyncFoldersWalk:
+    def test_sync_folders_walk(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockFolderTree(respx_mock)
+
+        walked = list(coze.folders.walk(workspace_id="workspace_id", folder_type=FolderType.DEVELOPMENT))
+        assert [(path, folder.id) for path, folder in walked] == [
+            (("name_a",), "a"),
+            (("name_b",), "b"),
+            (("name_a", "name_a1"), "a1"),
+        ]
+        # b is a leaf and is not listed
+        assert sorted(server.listed, key=str) == [None, "a", "a1"]
+
+        tree = coze.folders.tree(workspace_id="workspace_id", folder_type=FolderType.DEVELOPMENT, max_depth=1)
+        assert [node.folder.id for node in tree] == ["a", "b"]
+        assert tree[0].children == []
+
+        tree = coze.folders.tree(workspace_id="workspace_id", folder_type=FolderType.DEVELOPMENT, concurrency=1)
+        assert [child.folder.id for child in tree[0].children] == ["a1"]
+        assert tree[0].children[0].path == ["name_a", "name_a1"]
+
+        with pytest.raises(ValueError):
+            list(coze.folders.walk(workspace_id="workspace_id", folder_type=FolderType.DEVELOPMENT, concurrency=0))
+
+    def test_sync_folders_walk_stop(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockFolderTree(respx_mock)
+        server.delays = {"a": 0.5}
+
+        walk = coze.folders.walk(workspace_id="workspace_id", folder_type=FolderType.DEVELOPMENT)
+        assert [next(walk)[1].id, next(walk)[1].id] == ["a", "b"]
+        while "a" not in server.listed:
+            time.sleep(0.01)
+        started_at = time.monotonic()
+        walk.close()
+        # stopping early doesn't wait for the listing of a in flight
+        assert time.monotonic() - started_at < 0.3
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncFoldersWalk:
+    async def test_async_folders_walk(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        MockFolderTree(respx_mock)
+
+        walked = [
+            (path, folder.id)
+            async for path, folder in coze.folders.walk(workspace_id="workspace_id", folder_type=FolderType.DEVELOPMENT)
+        ]
+        assert walked == [(("name_a",), "a"), (("name_b",), "b"), (("name_a", "name_a1"), "a1")]
+
+        tree = await coze.folders.tree(workspace_id="workspace_id", folder_type=FolderType.DEVELOPMENT)
+        assert tree[0].children[0].folder.id == "a1"
+        assert tree[1].children == []
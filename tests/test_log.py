@@ -1,12 +1,90 @@
 import logging
+from typing import List
 
 import pytest
 
-from cozepy import setup_logging
+from cozepy import Stream, setup_logging
+from cozepy.log import EventLogger, log_payload, logger
+
+from .test_util import mock_response
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture
+def log_records():
+    handler = ListHandler()
+    logger.addHandler(handler)
+    yield handler.records
+    logger.removeHandler(handler)
+    setup_logging(logging.WARNING)
 
 
 def test_log():
     with pytest.raises(ValueError):
         setup_logging(123)
+    with pytest.raises(ValueError):
+        setup_logging(logging.DEBUG, payload_limit=0)
+    with pytest.raises(ValueError):
+        setup_logging(logging.DEBUG, event_sample_rate=0)
+
+    setup_logging(logging.DEBUG)
+
+
+def test_log_payload(log_records):
+    setup_logging(logging.DEBUG, payload_limit=4)
+    assert log_payload("abc") == "abc"
+    assert log_payload("abcdefgh") == "abcd...<length: 8>"
+    assert log_payload({"k": "v"}) == "{'k'...<length: 10>"
 
+
+def test_event_logger_disabled(log_records):
+    setup_logging(logging.INFO)
+    log = EventLogger("receive event", "logid")
+    assert not log.enabled
+
+    setup_logging(logging.DEBUG)
+    assert not log.enabled  # the level is checked once on creation
+
+
+def test_event_logger(log_records):
+    setup_logging(logging.DEBUG, payload_limit=3)
+    log = EventLogger("receive event", "logid")
+    assert log.enabled
+    log.event("event:a")
+    log.event("event:b", "message")
+
+    assert [r.getMessage() for r in log_records] == [
+        "receive event, logid=logid, event=eve...<length: 7>",
+        "receive event, logid=logid, type=message, event=eve...<length: 7>",
+    ]
+    assert log_records[1].logid == "logid"
+    assert log_records[1].event_seq == 2
+    assert log_records[1].event_type == "message"
+    assert log_records[1].event_size == 7
+
+
+def test_event_logger_sampled(log_records):
+    setup_logging(logging.DEBUG, event_sample_rate=0.5)
+    log = EventLogger("receive event")
+    for _ in range(1000):
+        log.event("event:a")
+
+    assert 0 < len(log_records) < 1000
+    assert log_records[-1].event_seq <= 1000
+
+
+def test_stream_event_log(log_records):
     setup_logging(logging.DEBUG)
+    response = mock_response()
+    s = Stream(response._raw_response, iter(["event:a"]), ["event"], lambda d, r: d)
+    list(s)
+
+    assert [r.getMessage() for r in log_records] == [f"receive event, logid={response.logid}, event=event:a"]
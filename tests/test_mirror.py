@@ -0,0 +1,181 @@
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncCoze,
+    AsyncTokenAuth,
+    AsyncWorkspaceMirror,
+    Coze,
+    Dataset,
+    DatasetStatus,
+    DocumentFormatType,
+    FolderType,
+    MirrorResource,
+    MirrorResourceType,
+    SimpleBot,
+    SimpleFolder,
+    TokenAuth,
+    WorkflowBasic,
+    WorkspaceIndex,
+    WorkspaceMirror,
+)
+from cozepy.util import random_hex
+from tests.test_util import logid_key
+
+
+class MockWorkspace(object):
+    """
+    One workspace on the server, each listing in a single page.
+    """
+
+    def __init__(self, respx_mock):
+        self.bots = [self.bot("bot_1", "support", "folder_1"), self.bot("bot_2", "sales", None)]
+        self.workflows = [
+            WorkflowBasic(workflow_id="wf_1", workflow_name="support", description="", icon_url="", app_id="")
+        ]
+        self.datasets = [
+            Dataset(
+                dataset_id="ds_1",
+                name="faq",
+                description="",
+                space_id="ws",
+                status=DatasetStatus.ENABLED,
+                format_type=DocumentFormatType.DOCUMENT,
+            )
+        ]
+        self.folders = [
+            SimpleFolder(
+                id="folder_1",
+                name="team",
+                description="",
+                workspace_id="ws",
+                creator_user_id="user",
+                folder_type=FolderType.DEVELOPMENT,
+            )
+        ]
+        respx_mock.get("/v1/bots").mock(
+            side_effect=lambda r: self.response({"items": self.bots, "total": len(self.bots)})
+        )
+        respx_mock.get("/v1/workflows").mock(
+            side_effect=lambda r: self.response({"items": self.workflows, "has_more": False})
+        )
+        respx_mock.get("/v1/datasets").mock(
+            side_effect=lambda r: self.response({"dataset_list": self.datasets, "total_count": len(self.datasets)})
+        )
+        respx_mock.get("/v1/folders").mock(side_effect=self.list_folders)
+
+    @staticmethod
+    def bot(id, name, folder_id):
+        return SimpleBot(
+            id=id,
+            name=name,
+            description="",
+            icon_url="",
+            is_published=folder_id is not None,
+            updated_at=0,
+            owner_user_id="user",
+            folder_id=folder_id,
+        )
+
+    def list_folders(self, request: httpx.Request) -> httpx.Response:
+        folders = [
+            f
+            for f in self.folders
+            if f.folder_type == request.url.params["folder_type"]
+            and f.parent_folder_id == request.url.params.get("parent_folder_id")
+        ]
+        return self.response({"items": folders, "total_count": len(folders)})
+
+    def response(self, data) -> httpx.Response:
+        data = {k: [i.model_dump() for i in v] if isinstance(v, list) else v for k, v in data.items()}
+        return httpx.Response(200, json={"data": data}, headers={logid_key(): random_hex(10)})
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+class TestSyncWorkspaceMirror:
+    def test_sync_workspace_mirror(self, respx_mock, tmp_path):
+        coze = Coze(auth=TokenAuth(token="token"))
+        server = MockWorkspace(respx_mock)
+        path = str(tmp_path / "mirror.json")
+        mirror = WorkspaceMirror(coze, ["ws"], path=path)
+
+        changes = mirror.refresh()
+        assert sorted(changes.added) == ["bot_1", "bot_2", "ds_1", "folder_1", "wf_1"]
+        index = mirror.index
+        assert len(index) == 5
+        assert index.get("bot_1").folder_id == "folder_1"
+        assert {r.id for r in index.find(name="support")} == {"bot_1", "wf_1"}
+        assert [r.id for r in index.find(name="support", type=MirrorResourceType.BOT)] == ["bot_1"]
+        assert [r.id for r in index.find(folder_id="folder_1")] == ["bot_1"]
+        assert [r.id for r in index.find(type=MirrorResourceType.BOT, is_published=False)] == ["bot_2"]
+        assert index.find(workspace_id="other") == []
+
+        # only the changed resources are updated
+        assert not mirror.refresh()
+        server.bots = [server.bot("bot_1", "support", "folder_1"), server.bot("bot_3", "sales", None)]
+        server.datasets[0].name = "docs"
+        changes = mirror.refresh()
+        assert changes.added == ["bot_3"]
+        assert changes.updated == ["ds_1"]
+        assert changes.removed == ["bot_2"]
+        assert index.find(name="faq") == []
+        assert [r.id for r in index.find(name="docs")] == ["ds_1"]
+
+        # warm start from the saved mirror
+        warm = WorkspaceMirror(coze, ["ws"], path=path)
+        assert sorted(r.id for r in warm.index.resources()) == ["bot_1", "bot_3", "ds_1", "folder_1", "wf_1"]
+        assert warm.index.get("bot_3").type == MirrorResourceType.BOT
+
+    def test_sync_workspace_mirror_start(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        MockWorkspace(respx_mock)
+        mirror = WorkspaceMirror(coze, ["ws"])
+        mirror.start(interval=60)
+        with pytest.raises(ValueError):
+            mirror.start(interval=60)
+        mirror.stop()
+        assert len(mirror.index) == 5
+
+        with pytest.raises(ValueError):
+            WorkspaceMirror(coze, ["ws"], concurrency=0)
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncWorkspaceMirror:
+    async def test_async_workspace_mirror(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        server = MockWorkspace(respx_mock)
+        mirror = AsyncWorkspaceMirror(coze, ["ws"])
+
+        changes = await mirror.refresh()
+        assert sorted(changes.added) == ["bot_1", "bot_2", "ds_1", "folder_1", "wf_1"]
+        server.workflows[0].workflow_name = "routing"
+        changes = await mirror.refresh()
+        assert changes.updated == ["wf_1"]
+        assert [r.id for r in mirror.index.find(name="routing")] == ["wf_1"]
+
+        mirror.start(interval=60)
+        await mirror.stop()
+
+
+def test_workspace_index_move():
+    index = WorkspaceIndex()
+
+    def bot(workspace_id: str) -> MirrorResource:
+        return MirrorResource(type=MirrorResourceType.BOT, id="bot_1", name="bot", workspace_id=workspace_id)
+
+    index.update("ws_a", MirrorResourceType.BOT, [bot("ws_a")])
+    # the bot moves to ws_b, which is refreshed first
+    changes = index.update("ws_b", MirrorResourceType.BOT, [bot("ws_b")])
+    assert changes.updated == ["bot_1"]
+    changes = index.update("ws_a", MirrorResourceType.BOT, [])
+    assert not changes
+    assert index.get("bot_1").workspace_id == "ws_b"
+    assert [r.id for r in index.find(workspace_id="ws_b")] == ["bot_1"]
+    assert index.find(workspace_id="ws_a") == []
+
+    # moved back, with the old partition refreshed first
+    assert index.update("ws_b", MirrorResourceType.BOT, []).removed == ["bot_1"]
+    assert index.update("ws_a", MirrorResourceType.BOT, [bot("ws_a")]).added == ["bot_1"]
+    assert index.get("bot_1").workspace_id == "ws_a"
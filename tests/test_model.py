@@ -1,11 +1,26 @@
-from typing import Dict
+import asyncio
+import gc
+import time
+import warnings
+from typing import Dict, List
 
 import httpx
 import pytest
 from httpx import Response
 
-from cozepy import AsyncStream, CozeInvalidEventError, ListResponse, Stream
-from cozepy.model import DynamicStrEnum
+from cozepy import (
+    AsyncStream,
+    CozeInvalidEventError,
+    CozeStreamFirstEventTimeoutError,
+    CozeStreamIdleTimeoutError,
+    CozeStreamTotalTimeoutError,
+    ListResponse,
+    Stream,
+    StreamStats,
+    StreamTimeout,
+    setup_stream_metrics,
+)
+from cozepy.model import STREAM_EVENT_GAP_BUCKETS, DynamicStrEnum
 from cozepy.util import anext
 
 from .test_util import mock_response, to_async_iterator
@@ -15,6 +30,26 @@ def mock_sync_handler(d: Dict[str, str], response: Response):
     return d
 
 
+def slow_lines(lines: List[str], delays: List[float]):
+    for line, delay in zip(lines, delays):
+        time.sleep(delay)
+        yield line
+
+
+async def async_slow_lines(lines: List[str], delays: List[float]):
+    for line, delay in zip(lines, delays):
+        await asyncio.sleep(delay)
+        yield line
+
+
+@pytest.fixture
+def stream_stats():
+    stats: List[StreamStats] = []
+    setup_stream_metrics(hook=stats.append)
+    yield stats
+    setup_stream_metrics(enabled=False)
+
+
 class TestSyncStream:
     def test_sync_stream_invalid_event(self):
         items = ["event:x"]
@@ -33,6 +68,124 @@ class TestSyncStream:
         ):
             next(s)
 
+    def test_stream_timeout_not_expired(self):
+        response = mock_response()
+        items = ["event:a", "event:b"]
+        s = Stream(
+            response._raw_response,
+            slow_lines(items, [0, 0]),
+            ["event"],
+            mock_sync_handler,
+            timeout=StreamTimeout(first_event=1, idle=1, total=1),
+        )
+        assert [i["event"] for i in s] == ["a", "b"]
+
+    def test_stream_first_event_timeout(self):
+        response = mock_response()
+        s = Stream(
+            response._raw_response,
+            slow_lines(["event:a"], [0.2]),
+            ["event"],
+            mock_sync_handler,
+            timeout=StreamTimeout(first_event=0.05, idle=10),
+        )
+        with pytest.raises(CozeStreamFirstEventTimeoutError, match="logid: " + response.logid):
+            next(s)
+        assert response._raw_response.is_closed
+
+    def test_stream_idle_timeout(self):
+        response = mock_response()
+        s = Stream(
+            response._raw_response,
+            slow_lines(["event:a", "event:b"], [0, 0.2]),
+            ["event"],
+            mock_sync_handler,
+            timeout=StreamTimeout(first_event=10, idle=0.05),
+        )
+        assert next(s)["event"] == "a"
+        with pytest.raises(CozeStreamIdleTimeoutError):
+            next(s)
+
+    def test_stream_total_timeout(self):
+        response = mock_response()
+        s = Stream(
+            response._raw_response,
+            slow_lines(["event:a", "event:b", "event:c"], [0, 0.04, 0.04]),
+            ["event"],
+            mock_sync_handler,
+            timeout=StreamTimeout(idle=1, total=0.06),
+        )
+        with pytest.raises(CozeStreamTotalTimeoutError):
+            list(s)
+
+    def test_stream_close(self):
+        response = mock_response()
+        s = Stream(response._raw_response, iter(["event:a", "event:b"]), ["event"], mock_sync_handler)
+        assert next(s)["event"] == "a"
+        s.close()
+        assert response._raw_response.is_closed
+
+    def test_stream_context_manager(self):
+        response = mock_response()
+        with Stream(response._raw_response, iter(["event:a", "event:b"]), ["event"], mock_sync_handler) as s:
+            assert next(s)["event"] == "a"
+        assert response._raw_response.is_closed
+
+    def test_stream_leak_warning(self):
+        raw_response = httpx.Response(200, stream=httpx.ByteStream(b""))
+        s = Stream(raw_response, iter(["event:a", "event:b"]), ["event"], mock_sync_handler)
+        next(s)
+        with pytest.warns(ResourceWarning, match="unclosed stream"):
+            del s
+            gc.collect()
+        assert raw_response.is_closed
+
+    def test_stream_exhausted_no_warning(self):
+        response = mock_response()
+        s = Stream(response._raw_response, iter(["event:a"]), ["event"], mock_sync_handler)
+        list(s)
+        assert response._raw_response.is_closed
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            del s
+            gc.collect()
+
+    def test_stream_stats_disabled(self):
+        response = mock_response()
+        s = Stream(response._raw_response, iter(["event:a"]), ["event"], mock_sync_handler)
+        assert list(s)
+        assert s.stats is None
+
+    def test_stream_stats(self, stream_stats):
+        response = mock_response()
+        sent_at = time.monotonic()
+        s = Stream(
+            response._raw_response,
+            slow_lines(["event:a", "event:b", "event:c"], [0.02, 0, 0.06]),
+            ["event"],
+            mock_sync_handler,
+            sent_at=sent_at,
+            headers_at=sent_at + 0.01,
+        )
+        assert next(s)["event"] == "a"
+        assert s.stats.first_event >= 0.02
+        assert s.stats.total is None
+        assert not stream_stats
+
+        list(s)
+        assert len(stream_stats) == 1
+        stats = stream_stats[0]
+        assert stats.logid == response.logid
+        assert stats.headers == pytest.approx(0.01)
+        assert stats.first_content is None
+        assert stats.total >= 0.08
+        assert stats.event_count == 3
+        assert len(stats.event_gap_histogram) == len(STREAM_EVENT_GAP_BUCKETS) + 1
+        assert sum(stats.event_gap_histogram) == 2
+        assert stats.event_gap_histogram[0] == 1
+        assert stats.max_event_gap >= 0.06
+        assert stats.events_per_second > 0
+
 
 @pytest.mark.asyncio
 class TestAsyncStream:
@@ -54,6 +207,84 @@ class TestAsyncStream:
         ):
             await anext(s)
 
+    async def test_stream_timeout_not_expired(self):
+        response = mock_response()
+        s = AsyncStream(
+            async_slow_lines(["event:a", "event:b"], [0, 0]),
+            ["event"],
+            mock_sync_handler,
+            response._raw_response,
+            timeout=StreamTimeout(first_event=1, idle=1, total=1),
+        )
+        assert [i["event"] async for i in s] == ["a", "b"]
+
+    async def test_stream_first_event_timeout(self):
+        response = mock_response()
+        s = AsyncStream(
+            async_slow_lines(["event:a"], [1]),
+            ["event"],
+            mock_sync_handler,
+            response._raw_response,
+            timeout=StreamTimeout(first_event=0.05),
+        )
+        with pytest.raises(CozeStreamFirstEventTimeoutError, match="logid: " + response.logid):
+            await anext(s)
+        assert response._raw_response.is_closed
+
+    async def test_stream_idle_timeout(self):
+        response = mock_response()
+        s = AsyncStream(
+            async_slow_lines(["event:a", "event:b"], [0, 1]),
+            ["event"],
+            mock_sync_handler,
+            response._raw_response,
+            timeout=StreamTimeout(first_event=10, idle=0.05),
+        )
+        assert (await anext(s))["event"] == "a"
+        with pytest.raises(CozeStreamIdleTimeoutError):
+            await anext(s)
+
+    async def test_stream_total_timeout(self):
+        response = mock_response()
+        s = AsyncStream(
+            async_slow_lines(["event:a", "event:b", "event:c"], [0, 0.04, 0.04]),
+            ["event"],
+            mock_sync_handler,
+            response._raw_response,
+            timeout=StreamTimeout(idle=1, total=0.06),
+        )
+        with pytest.raises(CozeStreamTotalTimeoutError):
+            [i async for i in s]
+
+    async def test_stream_aclose(self):
+        response = mock_response()
+        s = AsyncStream(to_async_iterator(["event:a", "event:b"]), ["event"], mock_sync_handler, response._raw_response)
+        assert (await anext(s))["event"] == "a"
+        await s.aclose()
+        assert response._raw_response.is_closed
+
+    async def test_stream_async_context_manager(self):
+        response = mock_response()
+        async with AsyncStream(
+            to_async_iterator(["event:a", "event:b"]), ["event"], mock_sync_handler, response._raw_response
+        ) as s:
+            assert (await anext(s))["event"] == "a"
+        assert response._raw_response.is_closed
+
+    async def test_stream_stats(self, stream_stats):
+        response = mock_response()
+        s = AsyncStream(
+            async_slow_lines(["event:a", "event:b"], [0.02, 0.02]),
+            ["event"],
+            mock_sync_handler,
+            response._raw_response,
+        )
+        assert [i["event"] async for i in s] == ["a", "b"]
+        assert len(stream_stats) == 1
+        assert stream_stats[0].first_event >= 0.02
+        assert stream_stats[0].event_count == 2
+        assert s.stats.total == stream_stats[0].total
+
 
 class TestListResponse:
     def test_slice(self):
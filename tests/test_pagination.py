@@ -0,0 +1,506 @@
+"""
+Conformance suite of the pagination engine: every paged class and cursor flavor against a local fake server.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, List, Optional
+
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncCoze,
+    AsyncLastIDPaged,
+    AsyncNumberPaged,
+    AsyncTokenAuth,
+    AsyncTokenPaged,
+    Coze,
+    LastIDPaged,
+    NumberPaged,
+    PageStats,
+    TokenAuth,
+    TokenPaged,
+    setup_pagination,
+)
+from cozepy.exception import CozeAPIError
+from cozepy.model import CozeModel, LastIDPagedResponse, NumberPagedResponse, TokenPagedResponse
+from cozepy.pagination import _PageSizeTuner, max_page_size
+from cozepy.util import random_hex
+from tests.test_util import logid_key
+
+PAGE_SIZE = 3
+
+
+class Item(CozeModel):
+    id: str
+
+
+class NumberResp(CozeModel, NumberPagedResponse[Item]):
+    items: List[Item]
+    total: Optional[int] = None
+    has_more: Optional[bool] = None
+
+    def get_total(self) -> Optional[int]:
+        return self.total
+
+    def get_has_more(self) -> Optional[bool]:
+        return self.has_more
+
+    def get_items(self) -> List[Item]:
+        return self.items
+
+
+class TokenResp(CozeModel, TokenPagedResponse[Item]):
+    items: List[Item]
+    next_page_token: Optional[str] = None
+    has_more: Optional[bool] = None
+
+    def get_next_page_token(self) -> Optional[str]:
+        return self.next_page_token
+
+    def get_has_more(self) -> Optional[bool]:
+        return self.has_more
+
+    def get_items(self) -> List[Item]:
+        return self.items
+
+
+class LastIDResp(CozeModel, LastIDPagedResponse[Item]):
+    items: List[Item]
+    first_id: str
+    last_id: str
+    has_more: Optional[bool] = None
+
+    def get_first_id(self) -> str:
+        return self.first_id
+
+    def get_last_id(self) -> str:
+        return self.last_id
+
+    def get_has_more(self) -> Optional[bool]:
+        return self.has_more
+
+    def get_items(self) -> List[Item]:
+        return self.items
+
+
+class FakeServer(object):
+    """
+    Serves a listing of total items with each cursor flavor. The number and token listings can leave out the
+    fields that tell whether there are more pages, so that each has-more rule of the engine is exercised.
+    """
+
+    def __init__(self, respx_mock, total: int):
+        self.ids = [f"item_{i}" for i in range(total)]
+        self.requests = 0
+        self.fail_next = 0
+        # page sizes above it time out, like a payload too slow to build
+        self.max_size: Optional[int] = None
+        self.sizes: List[int] = []
+        # the last_id listing leaves has_more out when it is False
+        self.last_id_has_more = True
+        respx_mock.get("/number").mock(side_effect=self.number)
+        respx_mock.get("/token").mock(side_effect=self.token)
+        respx_mock.post("/last_id").mock(side_effect=self.last_id)
+
+    def respond(self, data) -> httpx.Response:
+        self.requests += 1
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            raise httpx.ConnectError("connection reset")
+        return httpx.Response(200, json={"data": data}, headers={logid_key(): random_hex(10)})
+
+    def page(self, start: int, size: int) -> List[dict]:
+        self.sizes.append(size)
+        if self.max_size is not None and size > self.max_size:
+            raise httpx.ReadTimeout("timed out")
+        return [{"id": id} for id in self.ids[start : start + size]]
+
+    def number(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        page_num, size = int(params["page_num"]), int(params["page_size"])
+        start = (page_num - 1) * size
+        data: dict = {"items": self.page(start, size)}
+        if params["mode"] == "total":
+            data["total"] = len(self.ids)
+        elif params["mode"] == "has_more":
+            data["has_more"] = start + size < len(self.ids)
+        return self.respond(data)
+
+    def token(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        start, size = int(params["page_token"] or 0), int(params["page_size"])
+        end = start + size
+        data: dict = {"items": self.page(start, size)}
+        if params["mode"] != "none":
+            data["next_page_token"] = str(end) if end < len(self.ids) else ""
+        if params["mode"] == "has_more":
+            data["has_more"] = end < len(self.ids)
+        return self.respond(data)
+
+    def last_id(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        start = self.ids.index(body["after_id"]) + 1 if body["after_id"] else 0
+        items = self.page(start, PAGE_SIZE)
+        data = {
+            "items": items,
+            "first_id": items[0]["id"] if items else "",
+            "last_id": items[-1]["id"] if items else "",
+        }
+        if self.last_id_has_more:
+            data["has_more"] = start + PAGE_SIZE < len(self.ids)
+        return self.respond(data)
+
+
+FLAVORS = ["number_total", "number_has_more", "number_items", "token_has_more", "token_next", "last_id"]
+
+
+def sync_listing(flavor: str) -> Callable[[], Any]:
+    requester = Coze(auth=TokenAuth(token="token"))._requester
+    kind, _, mode = flavor.partition("_")
+
+    if kind == "number":
+        return lambda: NumberPaged(
+            page_num=1,
+            page_size=PAGE_SIZE,
+            requestor=requester,
+            request_maker=lambda page_num, page_size: requester.make_request(
+                "GET",
+                "https://api.coze.com/number",
+                params={"page_num": page_num, "page_size": page_size, "mode": mode},
+                cast=NumberResp,
+            ),
+        )
+    if kind == "token":
+        return lambda: TokenPaged(
+            page_token="",
+            page_size=PAGE_SIZE,
+            requestor=requester,
+            request_maker=lambda page_token, page_size: requester.make_request(
+                "GET",
+                "https://api.coze.com/token",
+                params={"page_token": page_token, "page_size": page_size, "mode": mode},
+                cast=TokenResp,
+            ),
+        )
+    return lambda: LastIDPaged(
+        before_id="",
+        after_id="",
+        requestor=requester,
+        request_maker=lambda before_id, after_id: requester.make_request(
+            "POST", "https://api.coze.com/last_id", json={"before_id": before_id, "after_id": after_id}, cast=LastIDResp
+        ),
+    )
+
+
+def async_listing(flavor: str) -> Callable[[], Any]:
+    requester = AsyncCoze(auth=AsyncTokenAuth(token="token"))._requester
+    kind, _, mode = flavor.partition("_")
+
+    if kind == "number":
+
+        async def number_request(page_num, page_size):
+            params = {"page_num": page_num, "page_size": page_size, "mode": mode}
+            return await requester.amake_request("GET", "https://api.coze.com/number", params=params, cast=NumberResp)
+
+        return lambda: AsyncNumberPaged.build(
+            page_num=1, page_size=PAGE_SIZE, requestor=requester, request_maker=number_request
+        )
+    if kind == "token":
+
+        async def token_request(page_token, page_size):
+            params = {"page_token": page_token, "page_size": page_size, "mode": mode}
+            return await requester.amake_request("GET", "https://api.coze.com/token", params=params, cast=TokenResp)
+
+        return lambda: AsyncTokenPaged.build(
+            page_token="", page_size=PAGE_SIZE, requestor=requester, request_maker=token_request
+        )
+
+    async def last_id_request(before_id, after_id):
+        body = {"before_id": before_id, "after_id": after_id}
+        return await requester.amake_request("POST", "https://api.coze.com/last_id", json=body, cast=LastIDResp)
+
+    return lambda: AsyncLastIDPaged.build(before_id="", after_id="", requestor=requester, request_maker=last_id_request)
+
+
+def expected_ids(total: int) -> List[str]:
+    return [f"item_{i}" for i in range(total)]
+
+
+def test_max_page_size():
+    assert max_page_size("https://api.coze.com/v1/datasets") == 300
+    assert max_page_size("https://api.coze.com/v1/datasets/123/images") == 299
+    assert max_page_size("https://api.coze.com/v1/workspaces/ws/members/") == 50
+    assert max_page_size("https://api.coze.com/v1/datasets/123") is None
+    assert max_page_size("") is None
+
+
+def test_page_size_tuner():
+    tuner = _PageSizeTuner(10, "https://api.coze.com/v1/workflows/wf/versions")
+    assert tuner.size == 30
+    assert tuner.shrink(30, httpx.ReadTimeout("timed out"))
+    assert tuner.size == 15
+    tuner.observe(15, 15, 1.5)
+    assert tuner.size == 29
+
+    tuner = _PageSizeTuner(10, "https://api.coze.com/v1/bots")
+    tuner.observe(10, 10, 1.0)
+    assert tuner.size == 20
+    # no gain, keep the size
+    tuner.observe(20, 20, 2.0)
+    assert tuner.size == 20
+    tuner.observe(20, 20, 1.0)
+    assert tuner.size == 40
+    # a short page is the end of the listing
+    tuner.observe(40, 3, 0.001)
+    assert tuner.size == 40
+
+    assert tuner.shrink(40, CozeAPIError(4000, "invalid page_size"))
+    assert tuner.size == 20
+    assert tuner.shrink(20, CozeAPIError(413, "payload too large"))
+    assert tuner.size == 10
+    assert not tuner.shrink(10, CozeAPIError(4000, "invalid page_size"))
+    assert not tuner.shrink(10, ValueError("invalid"))
+
+    # only timeouts, payloads too large and invalid page sizes are blamed on the size
+    tuner = _PageSizeTuner(10, "https://api.coze.com/v1/bots")
+    tuner.observe(10, 10, 1.0)
+    assert not tuner.shrink(20, CozeAPIError(4100, "authentication is invalid"))
+    assert not tuner.shrink(20, CozeAPIError(4101, "permission denied"))
+    assert not tuner.shrink(20, CozeAPIError(4000, "invalid space_id"))
+    assert tuner.size == 20
+    assert tuner.shrink(20, CozeAPIError(504, "gateway timeout"))
+    assert tuner.size == 10
+
+
+@pytest.fixture
+def reset_pagination():
+    yield
+    setup_pagination()
+
+
+@pytest.mark.respx(base_url="https://api.coze.com", assert_all_called=False)
+class TestSyncPagination:
+    @pytest.mark.parametrize("flavor", FLAVORS)
+    @pytest.mark.parametrize("total", [0, 1, PAGE_SIZE, 2 * PAGE_SIZE + 1])
+    def test_sync_pagination_items(self, respx_mock, flavor, total):
+        FakeServer(respx_mock, total)
+        listing = sync_listing(flavor)
+
+        assert [item.id for item in listing()] == expected_ids(total)
+        assert [item.id for page in listing().iter_pages(prefetch=2) for item in page.items] == expected_ids(total)
+        if flavor.startswith("number"):
+            pages = listing().iter_pages(concurrency=3)
+            assert [item.id for page in pages for item in page.items] == expected_ids(total)
+
+    @pytest.mark.parametrize("flavor", FLAVORS)
+    def test_sync_pagination_has_more(self, respx_mock, flavor):
+        FakeServer(respx_mock, 2 * PAGE_SIZE + 1)
+        pages = list(sync_listing(flavor)().iter_pages())
+
+        assert len(pages) == 3
+        assert [page.has_more for page in pages] == [True, True, False]
+        assert pages[0].response.logid
+
+    def test_sync_pagination_prefetch_depth(self, respx_mock):
+        server = FakeServer(respx_mock, 10 * PAGE_SIZE)
+        pages = sync_listing("token_next")().iter_pages(prefetch=2)
+
+        # the producer runs at most prefetch pages ahead of the page being processed
+        for fetched in [3, 4, 5]:
+            next(pages)
+            time.sleep(0.05)
+            assert server.requests == fetched
+        pages.close()
+
+    def test_sync_pagination_has_more_fallback(self, respx_mock):
+        server = FakeServer(respx_mock, 2 * PAGE_SIZE + 1)
+
+        # without has_more or a next page token, a full page can't be followed: an empty token would list the first
+        # page again, so the listing stops instead of falling back on the number of items
+        assert [item.id for item in sync_listing("token_none")()] == expected_ids(PAGE_SIZE)
+        assert server.requests == 1
+
+        # without has_more, a last_id listing goes on while the server returns a last id
+        server.last_id_has_more = False
+        pages = list(sync_listing("last_id")().iter_pages())
+        assert [item.id for page in pages for item in page.items] == expected_ids(2 * PAGE_SIZE + 1)
+        assert [page.has_more for page in pages] == [True, True, True, False]
+
+    @pytest.mark.parametrize("flavor", FLAVORS)
+    def test_sync_pagination_checkpoint(self, respx_mock, flavor):
+        total = 2 * PAGE_SIZE + 1
+        FakeServer(respx_mock, total)
+        first = sync_listing(flavor)()
+        checkpoint = first.checkpoint()
+
+        resumed = [item.id for page in first.resume(checkpoint) for item in page.items]
+        assert resumed == expected_ids(total)[PAGE_SIZE:]
+
+    def test_sync_pagination_retries(self, respx_mock, reset_pagination):
+        server = FakeServer(respx_mock, PAGE_SIZE + 1)
+        stats: List[PageStats] = []
+        setup_pagination(retries=2, retry_interval=0, hook=stats.append)
+
+        listing = sync_listing("token_next")
+        server.fail_next = 2
+        assert [item.id for item in listing()] == expected_ids(PAGE_SIZE + 1)
+        assert [s.attempts for s in stats] == [3, 1]
+        assert [s.item_count for s in stats] == [PAGE_SIZE, 1]
+        assert all(s.logid for s in stats)
+
+        setup_pagination(retries=1, retry_interval=0)
+        server.fail_next = 2
+        with pytest.raises(httpx.ConnectError):
+            listing()
+
+        with pytest.raises(ValueError):
+            setup_pagination(retries=-1)
+
+    @pytest.mark.parametrize("flavor", FLAVORS)
+    def test_sync_pagination_auto_page_size(self, respx_mock, flavor):
+        total = 40
+        server = FakeServer(respx_mock, total)
+        server.max_size = 5
+
+        pages = list(sync_listing(flavor)().iter_pages(auto_page_size=True))
+        assert [item.id for page in pages for item in page.items] == expected_ids(total)
+        if not flavor.startswith("last_id"):
+            assert max(server.sizes) > server.max_size
+
+
+@pytest.mark.respx(base_url="https://api.coze.com", assert_all_called=False)
+@pytest.mark.asyncio
+class TestAsyncPagination:
+    @pytest.mark.parametrize("flavor", FLAVORS)
+    @pytest.mark.parametrize("total", [0, 1, PAGE_SIZE, 2 * PAGE_SIZE + 1])
+    async def test_async_pagination_items(self, respx_mock, flavor, total):
+        FakeServer(respx_mock, total)
+        listing = async_listing(flavor)
+
+        assert [item.id async for item in await listing()] == expected_ids(total)
+        pages = (await listing()).iter_pages(prefetch=2)
+        assert [item.id async for page in pages for item in page.items] == expected_ids(total)
+        if flavor.startswith("number"):
+            pages = (await listing()).iter_pages(concurrency=3)
+            assert [item.id async for page in pages for item in page.items] == expected_ids(total)
+
+    @pytest.mark.parametrize("flavor", FLAVORS)
+    async def test_async_pagination_has_more(self, respx_mock, flavor):
+        FakeServer(respx_mock, 2 * PAGE_SIZE + 1)
+        pages = [page async for page in (await async_listing(flavor)()).iter_pages()]
+
+        assert len(pages) == 3
+        assert [page.has_more for page in pages] == [True, True, False]
+
+    async def test_async_pagination_prefetch_depth(self, respx_mock):
+        server = FakeServer(respx_mock, 10 * PAGE_SIZE)
+        pages = (await async_listing("token_next")()).iter_pages(prefetch=2)
+
+        # the producer runs at most prefetch pages ahead of the page being processed
+        for fetched in [3, 4, 5]:
+            await pages.__anext__()
+            await asyncio.sleep(0.05)
+            assert server.requests == fetched
+        await pages.aclose()
+
+    @pytest.mark.parametrize("flavor", FLAVORS)
+    async def test_async_pagination_checkpoint(self, respx_mock, flavor):
+        total = 2 * PAGE_SIZE + 1
+        FakeServer(respx_mock, total)
+        first = await async_listing(flavor)()
+        checkpoint = first.checkpoint()
+
+        resumed = [item.id async for page in first.resume(checkpoint) for item in page.items]
+        assert resumed == expected_ids(total)[PAGE_SIZE:]
+
+    async def test_async_pagination_retries(self, respx_mock, reset_pagination):
+        server = FakeServer(respx_mock, PAGE_SIZE + 1)
+        stats: List[PageStats] = []
+        setup_pagination(retries=1, retry_interval=0, hook=stats.append)
+
+        server.fail_next = 1
+        assert [item.id async for item in await async_listing("last_id")()] == expected_ids(PAGE_SIZE + 1)
+        assert [s.attempts for s in stats] == [2, 1]
+
+    @pytest.mark.parametrize("flavor", FLAVORS)
+    async def test_async_pagination_auto_page_size(self, respx_mock, flavor):
+        total = 40
+        server = FakeServer(respx_mock, total)
+        server.max_size = 5
+
+        pages = (await async_listing(flavor)()).iter_pages(auto_page_size=True)
+        assert [item.id async for page in pages for item in page.items] == expected_ids(total)
+        if not flavor.startswith("last_id"):
+            assert max(server.sizes) > server.max_size
+
+    @pytest.mark.parametrize("flavor", FLAVORS)
+    async def test_async_pagination_amap(self, respx_mock, flavor):
+        total = 2 * PAGE_SIZE + 1
+        FakeServer(respx_mock, total)
+        in_flight, max_in_flight = 0, 0
+
+        async def detail(item: Item) -> str:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            # later items finish first
+            await asyncio.sleep(0.001 * (total - int(item.id.split("_")[1])))
+            in_flight -= 1
+            return item.id.upper()
+
+        paged = await async_listing(flavor)()
+        assert [res async for res in paged.amap(detail, concurrency=3)] == [id.upper() for id in expected_ids(total)]
+        assert max_in_flight == 3
+
+        paged = await async_listing(flavor)()
+        unordered = [res async for res in paged.amap(detail, concurrency=3, ordered=False)]
+        assert unordered != [id.upper() for id in expected_ids(total)]
+        assert sorted(unordered) == sorted(id.upper() for id in expected_ids(total))
+
+        paged = await async_listing(flavor)()
+        assert [res async for res in paged.amap(lambda item: item.id)] == expected_ids(total)
+
+    async def test_async_pagination_afilter_abatch(self, respx_mock):
+        total = 2 * PAGE_SIZE + 1
+        FakeServer(respx_mock, total)
+        listing = async_listing("token_next")
+
+        async def even(item: Item) -> bool:
+            return int(item.id.split("_")[1]) % 2 == 0
+
+        assert [item.id async for item in (await listing()).afilter(even)] == expected_ids(total)[::2]
+        odd = (await listing()).afilter(lambda item: item.id.endswith(("1", "3", "5")), ordered=False)
+        assert sorted([item.id async for item in odd]) == ["item_1", "item_3", "item_5"]
+
+        batches = [[item.id for item in batch] async for batch in (await listing()).abatch(2)]
+        assert batches == [["item_0", "item_1"], ["item_2", "item_3"], ["item_4", "item_5"], ["item_6"]]
+
+        with pytest.raises(ValueError):
+            [batch async for batch in (await listing()).abatch(0)]
+        with pytest.raises(ValueError):
+            [res async for res in (await listing()).amap(lambda item: item, concurrency=0)]
+
+    async def test_async_pagination_amap_error(self, respx_mock):
+        FakeServer(respx_mock, 2 * PAGE_SIZE + 1)
+        cancelled = []
+
+        async def detail(item: Item) -> str:
+            if item.id == "item_0":
+                return item.id
+            if item.id == "item_1":
+                await asyncio.sleep(0.01)
+                raise ValueError("failed")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(item.id)
+                raise
+            return item.id
+
+        with pytest.raises(ValueError):
+            [res async for res in (await async_listing("number_total")()).amap(detail, concurrency=3)]
+        await asyncio.sleep(0)
+        assert "item_2" in cancelled
@@ -1,10 +1,23 @@
+import socket
+import threading
+import time
+from typing import List
+
 import httpx
 import pytest
 
-from cozepy import CozeAPIError, CozePKCEAuthError
+from cozepy import (
+    AsyncCoze,
+    AsyncTokenAuth,
+    Coze,
+    CozeAPIError,
+    CozePKCEAuthError,
+    StreamTimeout,
+    TokenAuth,
+)
 from cozepy.model import CozeModel
 from cozepy.request import Requester
-from tests.test_util import logid_key
+from tests.test_util import logid_key, read_file
 
 
 class ModelForTest(CozeModel):
@@ -125,3 +138,79 @@ class TestAsyncRequester:
         )
 
         await Requester().arequest("post", "https://api.coze.com/api/test", False, DebugModelForTest)
+
+
+class SlowStreamServer(object):
+    """
+    A local HTTP server that answers each request with a chat stream whose events are sent after the given delays.
+    It runs on a real socket, so that the timeouts of the transport apply.
+    """
+
+    def __init__(self, delays: List[float]):
+        events = read_file("testdata/chat_text_stream_resp.txt").strip().split("\n\n")
+        self.chunks = [(delays[i] if i < len(delays) else 0, event + "\n\n") for i, event in enumerate(events)]
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(1)
+        self.base_url = "http://127.0.0.1:%d" % self.sock.getsockname()[1]
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self) -> None:
+        conn, _ = self.sock.accept()
+        with conn:
+            data = b""
+            while b"\r\n\r\n" not in data:
+                data += conn.recv(65536)
+            head, body = data.split(b"\r\n\r\n", 1)
+            length = [
+                int(line.split(b":")[1]) for line in head.lower().split(b"\r\n") if line.startswith(b"content-length:")
+            ]
+            while length and len(body) < length[0]:
+                body += conn.recv(65536)
+            conn.sendall(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+            for delay, chunk in self.chunks:
+                time.sleep(delay)
+                body = chunk.encode()
+                conn.sendall(b"%x\r\n%s\r\n" % (len(body), body))
+            conn.sendall(b"0\r\n\r\n")
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+class TestStreamTimeoutTransport:
+    """
+    The wait for the headers of a stream is bounded by its first deadline through the read timeout of the request,
+    which is restored to the one of the client once the headers arrived, so that the gaps between later events are
+    bounded by the stream deadlines only. This relies on httpcore looking the read timeout of the request up when the
+    body is read, these tests fail if it stops doing so.
+    """
+
+    def test_sync_body_read_timeout_released(self):
+        server = SlowStreamServer([0, 0.3])
+        try:
+            coze = Coze(auth=TokenAuth(token="token"), base_url=server.base_url)
+            stream = coze.chat.stream(
+                bot_id="bot", user_id="user", stream_timeout=StreamTimeout(first_event=0.1, idle=2)
+            )
+            assert len(list(stream)) > 1
+        finally:
+            server.close()
+
+    @pytest.mark.asyncio
+    async def test_async_body_read_timeout_released(self):
+        server = SlowStreamServer([0, 0.3])
+        try:
+            coze = AsyncCoze(auth=AsyncTokenAuth(token="token"), base_url=server.base_url)
+            events = [
+                event
+                async for event in coze.chat.stream(
+                    bot_id="bot", user_id="user", stream_timeout=StreamTimeout(first_event=0.1, idle=2)
+                )
+            ]
+            assert len(events) > 1
+        finally:
+            server.close()
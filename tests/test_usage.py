@@ -0,0 +1,258 @@
+import json
+import time
+
+import httpx
+import pytest
+
+from cozepy import (
+    AsyncCoze,
+    AsyncTokenAuth,
+    ChatUsage,
+    Coze,
+    CozeUsageBudgetError,
+    Message,
+    TokenAuth,
+    UsageAccountant,
+    UsageScope,
+    setup_usage_accounting,
+    usage_tags,
+)
+from cozepy.util import random_hex
+from tests.test_util import logid_key, read_file
+
+WORKFLOW_STREAM = (
+    'id: 0\nevent: Message\ndata: {"content":"hi","node_is_finish":true,"node_seq_id":"0","node_title":"End",'
+    '"usage":{"token_count":30,"output_count":10,"input_count":20}}\n\n'
+    'id: 1\nevent: Done\ndata: {"debug_url":"debug_url"}\n\n'
+)
+# every message carries the usage of the run so far
+WORKFLOW_STREAM_MESSAGES = (
+    'id: 0\nevent: Message\ndata: {"content":"a","node_is_finish":false,"node_seq_id":"0","node_title":"End",'
+    '"usage":{"token_count":12,"output_count":2,"input_count":10}}\n\n'
+    'id: 1\nevent: Message\ndata: {"content":"b","node_is_finish":false,"node_seq_id":"1","node_title":"End"}\n\n'
+    'id: 2\nevent: Message\ndata: {"content":"c","node_is_finish":true,"node_seq_id":"2","node_title":"End",'
+    '"usage":{"token_count":30,"output_count":10,"input_count":20}}\n\n'
+    'id: 3\nevent: Done\ndata: {"debug_url":"debug_url"}\n\n'
+)
+
+
+@pytest.fixture
+def accountant():
+    accountant = UsageAccountant()
+    setup_usage_accounting(accountant)
+    yield accountant
+    setup_usage_accounting(None)
+
+
+def mock_chat_stream(respx_mock):
+    return respx_mock.post("/v3/chat").mock(
+        httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream", logid_key(): random_hex(10)},
+            content=read_file("testdata/chat_text_stream_resp.txt"),
+        )
+    )
+
+
+def mock_chat_retrieve(respx_mock, chat_id: str = "chat"):
+    respx_mock.post("/v3/chat/retrieve").mock(
+        httpx.Response(
+            200,
+            json={
+                "data": {
+                    "id": chat_id,
+                    "conversation_id": "conversation",
+                    "bot_id": "bot",
+                    "status": "completed",
+                    "usage": {"token_count": 10, "output_count": 4, "input_count": 6},
+                }
+            },
+            headers={logid_key(): random_hex(10)},
+        )
+    )
+
+
+def mock_workflow(respx_mock, stream: bool = True):
+    headers = {logid_key(): random_hex(10)}
+    respx_mock.post("/v1/workflow/run").mock(
+        httpx.Response(
+            200,
+            json={"data": {"debug_url": "url", "data": "{}", "usage": {"token_count": 5, "input_count": 5}}},
+            headers=headers,
+        )
+    )
+    if not stream:
+        return
+    respx_mock.post("/v1/workflow/stream_run").mock(
+        httpx.Response(200, headers={"content-type": "text/event-stream", **headers}, content=WORKFLOW_STREAM)
+    )
+
+
+def test_usage_accountant():
+    flushed = []
+    accountant = UsageAccountant(on_flush=flushed.append)
+    scope = UsageScope(kind="chat", bot_id="bot", user_id="user", tags=["tenant"])
+
+    accountant.record(scope, ChatUsage(token_count=10, input_count=6, output_count=4), chat_id="chat")
+    # a chat is counted once
+    accountant.record(scope, ChatUsage(token_count=10, input_count=6, output_count=4), chat_id="chat")
+    accountant.record(UsageScope(kind="workflow", workflow_id="workflow"), ChatUsage(token_count=5))
+
+    snapshot = accountant.snapshot()
+    assert snapshot.total.requests == 2
+    assert snapshot.total.token_count == 15
+    assert snapshot.bots["bot"].input_count == 6
+    assert snapshot.users["user"].output_count == 4
+    assert snapshot.tags["tenant"].token_count == 10
+    assert snapshot.workflows["workflow"].token_count == 5
+    assert accountant.used("bot", "bot").token_count == 10
+    assert accountant.used("bot", "other").token_count == 0
+
+    # flush ends the period
+    assert accountant.flush().total.token_count == 15
+    assert flushed[0].total.token_count == 15
+    assert accountant.snapshot().total.token_count == 0
+    assert flushed[0].ended_at >= flushed[0].started_at
+
+    with pytest.raises(ValueError):
+        accountant.set_budget("team", "a", 10)
+    with pytest.raises(ValueError):
+        UsageAccountant(flush_interval=0)
+
+
+def test_usage_accountant_budget():
+    rejected = []
+
+    def before_request(scope, accountant):
+        if scope.user_id == "blocked":
+            rejected.append(scope)
+            raise PermissionError("blocked")
+
+    accountant = UsageAccountant(before_request=before_request)
+    accountant.set_budget("tag", "tenant", 10)
+    scope = UsageScope(kind="chat", bot_id="bot", tags=["tenant"])
+    accountant.check(scope)
+    accountant.record(scope, ChatUsage(token_count=10))
+
+    with pytest.raises(CozeUsageBudgetError) as e:
+        accountant.check(scope)
+    assert (e.value.dimension, e.value.key, e.value.budget, e.value.used) == ("tag", "tenant", 10, 10)
+    accountant.check(UsageScope(kind="chat", bot_id="bot"))
+
+    with pytest.raises(PermissionError):
+        accountant.check(UsageScope(kind="chat", user_id="blocked"))
+    assert len(rejected) == 1
+
+    accountant.set_budget("tag", "tenant", None)
+    accountant.check(scope)
+
+
+def test_usage_accountant_flush_interval():
+    flushed = []
+    accountant = UsageAccountant(on_flush=flushed.append, flush_interval=0.01)
+    time.sleep(0.05)
+    accountant.close()
+    count = len(flushed)
+    assert count >= 2
+    time.sleep(0.03)
+    assert len(flushed) == count
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+class TestSyncUsage:
+    def test_sync_chat_usage(self, respx_mock, accountant):
+        coze = Coze(auth=TokenAuth(token="token"))
+        mock_chat_stream(respx_mock)
+        mock_chat_retrieve(respx_mock)
+
+        with usage_tags("tenant"):
+            stream = coze.chat.stream(bot_id="bot", user_id="user")
+        list(stream)
+        coze.chat.retrieve(conversation_id="conversation", chat_id="chat")
+        coze.chat.retrieve(conversation_id="conversation", chat_id="chat")
+
+        snapshot = accountant.snapshot()
+        assert snapshot.total.requests == 2
+        assert snapshot.total.token_count == 643
+        assert snapshot.users["user"].token_count == 633
+        # the tags are the ones of the request
+        assert snapshot.tags["tenant"].token_count == 633
+        assert snapshot.bots["bot"].token_count == 643
+
+    def test_sync_chat_budget(self, respx_mock, accountant):
+        coze = Coze(auth=TokenAuth(token="token"))
+        route = mock_chat_stream(respx_mock)
+        accountant.set_budget("user", "user", 600)
+
+        list(coze.chat.stream(bot_id="bot", user_id="user", additional_messages=[Message.build_user_question_text("")]))
+        with pytest.raises(CozeUsageBudgetError):
+            coze.chat.stream(bot_id="bot", user_id="user")
+        # the rejected request isn't sent
+        assert route.call_count == 1
+        list(coze.chat.stream(bot_id="bot", user_id="other"))
+
+    def test_sync_workflow_usage(self, respx_mock, accountant):
+        coze = Coze(auth=TokenAuth(token="token"))
+        mock_workflow(respx_mock)
+
+        coze.workflows.runs.create(workflow_id="workflow")
+        events = list(coze.workflows.runs.stream(workflow_id="workflow", bot_id="bot"))
+
+        assert json.loads(events[0].message.usage.model_dump_json())["token_count"] == 30
+        snapshot = accountant.snapshot()
+        assert snapshot.workflows["workflow"].token_count == 35
+        assert snapshot.workflows["workflow"].requests == 2
+        assert snapshot.bots["bot"].input_count == 20
+
+    def test_sync_workflow_usage_messages(self, respx_mock, accountant):
+        coze = Coze(auth=TokenAuth(token="token"))
+        respx_mock.post("/v1/workflow/stream_run").mock(
+            httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream", logid_key(): random_hex(10)},
+                content=WORKFLOW_STREAM_MESSAGES,
+            )
+        )
+
+        stream = coze.workflows.runs.stream(workflow_id="workflow")
+        # the run is counted once it is sent
+        assert accountant.snapshot().workflows["workflow"].requests == 1
+        assert len(list(stream)) == 3
+
+        # the run is counted once, with the usage of its last message
+        usage = accountant.snapshot().workflows["workflow"]
+        assert (usage.requests, usage.token_count, usage.input_count, usage.output_count) == (1, 30, 20, 10)
+
+    def test_sync_usage_disabled(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+        mock_chat_stream(respx_mock)
+        list(coze.chat.stream(bot_id="bot", user_id="user"))
+
+
+@pytest.mark.respx(base_url="https://api.coze.com")
+@pytest.mark.asyncio
+class TestAsyncUsage:
+    async def test_async_chat_usage(self, respx_mock, accountant):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        mock_chat_stream(respx_mock)
+        mock_chat_retrieve(respx_mock, chat_id="other_chat")
+
+        async for _ in coze.chat.stream(bot_id="bot", user_id="user"):
+            pass
+        await coze.chat.retrieve(conversation_id="conversation", chat_id="other_chat")
+
+        snapshot = accountant.snapshot()
+        assert snapshot.total.token_count == 643
+        assert snapshot.users["user"].requests == 1
+
+    async def test_async_workflow_usage(self, respx_mock, accountant):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+        mock_workflow(respx_mock, stream=False)
+        accountant.set_budget("workflow", "workflow", 5)
+
+        await coze.workflows.runs.create(workflow_id="workflow")
+        with pytest.raises(CozeUsageBudgetError):
+            async for _ in coze.workflows.runs.stream(workflow_id="workflow"):
+                pass
+
+        assert accountant.snapshot().workflows["workflow"].token_count == 5
@@ -4,6 +4,7 @@ import pytest
 from cozepy import (
     AsyncCoze,
     AsyncTokenAuth,
+    AsyncWorkflowStreamAccumulator,
     Coze,
     TokenAuth,
     WorkflowEventType,
@@ -12,6 +13,7 @@ from cozepy import (
     WorkflowRunHistory,
     WorkflowRunMode,
     WorkflowRunResult,
+    WorkflowStreamAccumulator,
 )
 from cozepy.util import random_hex
 from tests.test_util import logid_key, read_file
@@ -122,6 +124,19 @@ class TestSyncWorkflowsRuns:
         assert events
         assert len(events) == 9
 
+    def test_sync_workflows_runs_stream_accumulator(self, respx_mock):
+        coze = Coze(auth=TokenAuth(token="token"))
+
+        mock_create_workflows_runs_stream(respx_mock, read_file("testdata/workflow_run_stream_resp.txt"))
+        snapshot = WorkflowStreamAccumulator().collect(coze.workflows.runs.stream(workflow_id="id"))
+
+        assert [node.node_title for node in snapshot.nodes] == ["Message", "", "问答"]
+        assert snapshot.nodes[0].content == "msg为什么小明要带一把尺子去看电影因为他听说电影很长，怕坐不下！"
+        assert snapshot.nodes[0].node_seq_id == "4"
+        assert snapshot.nodes[0].node_is_finish
+        assert snapshot.error.error_code == 4000
+        assert snapshot.interrupt.node_title == "问答"
+
     def test_sync_workflows_runs_resume(self, respx_mock):
         coze = Coze(auth=TokenAuth(token="token"))
 
@@ -224,6 +239,18 @@ class TestAsyncWorkflowsRuns:
         assert events
         assert len(events) == 9
 
+    async def test_async_workflows_runs_stream_accumulator(self, respx_mock):
+        coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
+
+        mock_create_workflows_runs_stream(respx_mock, read_file("testdata/workflow_run_stream_resp.txt"))
+        accumulator = AsyncWorkflowStreamAccumulator()
+        events = [event async for event in accumulator.consume(coze.workflows.runs.stream(workflow_id="id"))]
+
+        assert len(events) == 9
+        snapshot = accumulator.snapshot()
+        assert len(snapshot.nodes) == 3
+        assert snapshot.content.startswith("msg为什么小明")
+
     async def test_async_workflows_runs_resume(self, respx_mock):
         coze = AsyncCoze(auth=AsyncTokenAuth(token="token"))
 